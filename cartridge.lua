@@ -41,6 +41,7 @@ local hotreload = require('cartridge.hotreload')
 local confapplier = require('cartridge.confapplier')
 local vshard_utils = require('cartridge.vshard-utils')
 local cluster_cookie = require('cartridge.cluster-cookie')
+local internal_metrics = require('cartridge.internal-metrics')
 local service_registry = require('cartridge.service-registry')
 local logging_whitelist = require('cartridge.logging_whitelist')
 local pool = require('cartridge.pool')
@@ -843,6 +844,7 @@ local function cfg(opts, box_opts)
             disable_errstack = opts.disable_errstack,
         })
         lua_api_boxinfo.set_webui_prefix(opts.webui_prefix)
+        internal_metrics.init(httpd, {prefix = opts.webui_prefix})
 
         if opts.webui_enabled then
             local ok, err = HttpInitError:pcall(webui.init, httpd, {
@@ -897,6 +899,8 @@ local function cfg(opts, box_opts)
         disable_unrecoverable_instances = 'boolean',
         check_doubled_buckets = 'boolean',
         check_doubled_buckets_period = 'number',
+        issues_snapshot_ttl = 'number',
+        internal_metrics = 'boolean',
     })
 
     if err ~= nil then
@@ -905,6 +909,10 @@ local function cfg(opts, box_opts)
 
     issues.disable_unrecoverable(res.disable_unrecoverable_instances)
     issues.check_doubled_buckets(res.check_doubled_buckets, res.check_doubled_buckets_period)
+    issues.set_snapshot_ttl(res.issues_snapshot_ttl)
+    if res.internal_metrics ~= nil then
+        internal_metrics.set_enabled(res.internal_metrics)
+    end
 
     if opts.upload_prefix ~= nil then
         local path = opts.upload_prefix
@@ -980,6 +988,9 @@ local function cfg(opts, box_opts)
     if opts.twophase_upload_config_timeout then
         twophase.set_upload_config_timeout(opts.twophase_upload_config_timeout)
     end
+    if opts.twophase_upload_chunk_size then
+        twophase.set_upload_chunk_size(opts.twophase_upload_chunk_size)
+    end
     if opts.twophase_validate_config_timeout then
         twophase.set_validate_config_timeout(opts.twophase_validate_config_timeout)
     end
@@ -1203,6 +1214,10 @@ return {
     -- @function failover_promote
     failover_promote = lua_api_failover.promote,
     --- .
+    -- @refer cartridge.lua-api.failover.get_timeline
+    -- @function failover_get_timeline
+    failover_get_timeline = lua_api_failover.get_timeline,
+    --- .
     -- @refer cartridge.lua-api.failover.get_failover_enabled
     -- @function admin_get_failover
     admin_get_failover = lua_api_failover.get_failover_enabled,
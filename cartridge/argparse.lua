@@ -121,6 +121,7 @@ local cluster_opts = {
 
     twophase_netbox_call_timeout = 'number', -- **number**
     twophase_upload_config_timeout = 'number', -- **number**
+    twophase_upload_chunk_size = 'number', -- **number**
     twophase_validate_config_timeout = 'number', -- **number**
     twophase_apply_config_timeout = 'number', -- **number**
 }
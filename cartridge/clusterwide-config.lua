@@ -23,6 +23,10 @@
 -- Nevertheless one can keep any other extensions because they aren't
 -- unmarshalled implicitly.
 --
+-- Sections are unmarshalled lazily: `get_readonly(section)` decodes only
+-- the requested one. Unchanged sections aren't decoded (and hashed for
+-- `get_checksum`) again after `set_plaintext` or in a patched copy.
+--
 -- (**Added** in v1.2.0-17)
 --
 -- @usage
@@ -72,6 +76,69 @@ local SaveConfigError = errors.new_class('SaveConfigError')
 local PatchConfigError = errors.new_class('PatchConfigError')
 local RemoveConfigError = errors.new_class('RemoveConfigError')
 
+-- CRC32 is linear, so the checksum of concatenated sections can be
+-- combined from the checksums of the sections themselves (like zlib
+-- `crc32_combine` does). It allows rehashing modified sections only.
+
+-- Operator for shifting the register by one zero bit (CRC-32C poly)
+local crc32_zero_bit = {[1] = 0x82F63B78}
+for n = 2, 32 do
+    crc32_zero_bit[n] = bit.lshift(1, n - 2)
+end
+
+local function gf2_matrix_times(mat, vec)
+    local sum = 0
+    local i = 1
+    while vec ~= 0 do
+        if bit.band(vec, 1) ~= 0 then
+            sum = bit.bxor(sum, mat[i])
+        end
+        vec = bit.rshift(vec, 1)
+        i = i + 1
+    end
+    return sum
+end
+
+local function gf2_matrix_square(mat)
+    local square = {}
+    for n = 1, 32 do
+        square[n] = gf2_matrix_times(mat, mat[n])
+    end
+    return square
+end
+
+-- Operators for shifting the register by 2^k zero bytes
+local crc32_shift_ops = {}
+do
+    local op = crc32_zero_bit
+    for _ = 1, 3 do
+        op = gf2_matrix_square(op)
+    end
+    for k = 1, 32 do
+        crc32_shift_ops[k] = op
+        op = gf2_matrix_square(op)
+    end
+end
+
+--- Combine checksums `crc32(a)` and `crc32_update(0, b)`
+-- into `crc32(a .. b)`.
+-- @local
+local function crc32_combine(crc1, crc2, len2)
+    local k = 1
+    while len2 ~= 0 do
+        if len2 % 2 == 1 then
+            crc1 = gf2_matrix_times(crc32_shift_ops[k], crc1)
+        end
+        len2 = math.floor(len2 / 2)
+        k = k + 1
+    end
+    crc1 = bit.bxor(crc1, crc2)
+    if crc1 < 0 then
+        crc1 = crc1 + 2^32
+    end
+    return crc1
+end
+
 local function generate_checksum(clusterwide_config)
     checks('ClusterwideConfig')
 
@@ -81,22 +148,166 @@ local function generate_checksum(clusterwide_config)
     end
     table.sort(keys)
 
-    local checksum = digest.crc32.new()
+    -- Digests of unchanged sections are taken from the previous run,
+    -- the cache is shared with copies (it's never modified in place).
+    local digests = clusterwide_config._digests or {}
+    local new_digests = {}
+
+    local checksum = digest.crc32.crc_begin
     for _, section in ipairs(keys) do
-        checksum:update(string.format('[%s] = ', section))
-        checksum:update(clusterwide_config._plaintext[section])
+        local content = clusterwide_config._plaintext[section]
+        local entry = digests[section]
+        if entry == nil or entry.content ~= content then
+            local header = string.format('[%s] = ', section)
+            entry = {
+                content = content,
+                crc = digest.crc32_update(
+                    digest.crc32_update(0, header), content
+                ),
+                len = #header + #content,
+            }
+        end
+        new_digests[section] = entry
+        checksum = crc32_combine(checksum, entry.crc, entry.len)
     end
 
-    rawset(clusterwide_config, '_checksum', checksum:result())
+    rawset(clusterwide_config, '_digests', new_digests)
+    rawset(clusterwide_config, '_checksum', checksum)
     return clusterwide_config
 end
 
+-- Decoded sections without inclusions, indexed by plaintext.
+-- Tables are read-only and stay here as long as any config uses them,
+-- so configs sharing a section (e.g. active and patched one during
+-- two-phase commit) decode it only once.
+local decoded_sections = setmetatable({}, {__mode = 'v'})
+
+local function has_inclusions(tbl)
+    if tbl['__file'] then
+        return true
+    end
+    for _, v in pairs(tbl) do
+        if type(v) == 'table' and has_inclusions(v) then
+            return true
+        end
+    end
+    return false
+end
+
+local function resolve_inclusions(clusterwide_config, key, value)
+    if type(value) ~= 'table' then
+        return value
+    end
+
+    if value['__file'] then
+        local content = clusterwide_config._plaintext[value['__file']]
+        if content == nil then
+            return nil, LoadConfigError:new(
+                'Error loading section %q:' ..
+                ' inclusion %q not found',
+                key, value['__file']
+            )
+        end
+        return content
+    end
+
+    for k, v in pairs(value) do
+        local err
+        value[k], err = resolve_inclusions(clusterwide_config, k, v)
+        if err ~= nil then
+            return nil, err
+        end
+    end
+    return value
+end
+
+local function decode_section(clusterwide_config, fname)
+    local section = fname .. '.yml'
+    local content = clusterwide_config._plaintext[section]
+
+    local data = decoded_sections[content]
+    if data ~= nil then
+        return data
+    end
+
+    local ok, data = pcall(yaml.decode, content)
+    if not ok then
+        local err = LoadConfigError:new(
+            'Error parsing section %q: %s',
+            section, data
+        )
+        return nil, err
+    end
+
+    if type(data) ~= 'table' then
+        return data
+    elseif not has_inclusions(data) then
+        utils.table_setro(data)
+        decoded_sections[content] = data
+        return data
+    end
+
+    local data, err = resolve_inclusions(clusterwide_config, fname, data)
+    if err ~= nil then
+        return nil, err
+    end
+
+    if type(data) == 'table' then
+        utils.table_setro(data)
+    end
+    return data
+end
+
+--- Get unmarshalled section, decoding it on the first access.
+-- @local
+local function load_section(clusterwide_config, section_name)
+    local _plaintext = clusterwide_config._plaintext
+    local _sections = clusterwide_config._sections
+
+    if _sections[section_name] ~= nil then
+        return _sections[section_name]
+    end
+
+    local fname = string.match(section_name, "^(.+)%.yml$")
+    if fname and _plaintext[section_name] ~= nil
+    and _plaintext[fname] ~= nil
+    then
+        return nil, LoadConfigError:new(
+            'Ambiguous sections %q and %q',
+            fname, section_name
+        )
+    end
+
+    local data, err
+    if _plaintext[section_name] ~= nil then
+        if _plaintext[section_name .. '.yml'] ~= nil then
+            return nil, LoadConfigError:new(
+                'Ambiguous sections %q and %q',
+                section_name, section_name .. '.yml'
+            )
+        end
+        data = _plaintext[section_name]
+    elseif _plaintext[section_name .. '.yml'] ~= nil
+    and fio.basename(section_name) ~= ''
+    then
+        data, err = decode_section(clusterwide_config, section_name)
+        if err ~= nil then
+            return nil, err
+        end
+    end
+
+    _sections[section_name] = data
+    return data
+end
+
 local function update_luatables(clusterwide_config)
     checks('ClusterwideConfig')
 
-    local root = {}
+    -- The root is made read-only in advance, it saves traversing
+    -- the sections which are read-only already.
+    local new_luatables = utils.table_setro({})
     for section, content in pairs(clusterwide_config._plaintext) do
-        root[section] = content
+        rawset(new_luatables, section, content)
         if clusterwide_config._plaintext[section .. '.yml'] ~= nil then
             local err = LoadConfigError:new(
                 'Ambiguous sections %q and %q',
@@ -110,52 +321,15 @@ local function update_luatables(clusterwide_config)
             goto continue
         end
 
-        local ok, data = pcall(yaml.decode, content)
-        if not ok then
-            local err = LoadConfigError:new(
-                'Error parsing section %q: %s',
-                section, data
-            )
+        local data, err = load_section(clusterwide_config, fname)
+        if err ~= nil then
             return nil, err
         end
-        root[fname] = data
+        rawset(new_luatables, fname, data)
 
         ::continue::
     end
 
-    local function _load(tbl)
-        local err = nil
-        for k, v in pairs(tbl) do
-            if type(v) ~= 'table' then
-                goto continue
-            end
-
-            if v['__file'] then
-                tbl[k] = clusterwide_config._plaintext[v['__file']]
-                if not tbl[k] then
-                    return nil, LoadConfigError:new(
-                        'Error loading section %q:' ..
-                        ' inclusion %q not found',
-                        k, v['__file']
-                    )
-                end
-            else
-                tbl[k], err = _load(v)
-                if err ~= nil then
-                    return nil, err
-                end
-            end
-            ::continue::
-        end
-        return tbl, err
-    end
-
-    local new_luatables, err = _load(root)
-    if err ~= nil then
-        return nil, err
-    end
-
-    utils.table_setro(new_luatables)
     rawset(clusterwide_config, '_luatables', new_luatables)
     return clusterwide_config
 end
@@ -179,6 +353,8 @@ clusterwide_config_mt = {
             local _plaintext = table.deepcopy(self._plaintext)
             return setmetatable({
                 _plaintext = utils.table_setro(_plaintext),
+                _sections = {},
+                _digests = self._digests,
                 locked = false,
             }, clusterwide_config_mt)
         end,
@@ -198,6 +374,9 @@ clusterwide_config_mt = {
 
             rawset(self, '_checksum', nil)
             rawset(self, '_luatables', nil)
+            -- Inclusions may refer to the section, so forget everything.
+            -- Sections which didn't change aren't decoded again anyway.
+            rawset(self, '_sections', {})
             return self
         end,
 
@@ -216,15 +395,18 @@ clusterwide_config_mt = {
             checks('ClusterwideConfig', '?string')
             assert(self._plaintext ~= nil)
 
-            if self._luatables == nil then
-                LoadConfigError:assert(self:update_luatables())
-            end
-
             if section_name == nil then
+                if self._luatables == nil then
+                    LoadConfigError:assert(self:update_luatables())
+                end
                 return self._luatables
-            else
+            elseif self._luatables ~= nil then
                 return self._luatables[section_name]
             end
+
+            local data, err = load_section(self, section_name)
+            LoadConfigError:assert(err == nil, err)
+            return data
         end,
 
         get_deepcopy = function(self, section_name)
@@ -313,6 +495,7 @@ local function new(data)
 
     local cfg = setmetatable({
         _plaintext = utils.table_setro(data),
+        _sections = {},
         locked = false
     }, clusterwide_config_mt)
 
@@ -28,6 +28,7 @@ local cluster_cookie = require('cartridge.cluster-cookie')
 local ClusterwideConfig = require('cartridge.clusterwide-config')
 local logging_whitelist = require('cartridge.logging_whitelist')
 local invalid_format = require('cartridge.invalid-format')
+local internal_metrics = require('cartridge.internal-metrics')
 yaml.cfg({
     encode_load_metatables = false,
     decode_save_metatables = false,
@@ -40,6 +41,11 @@ local StateError = errors.new_class('StateError')
 local OperationError = errors.new_class('OperationError')
 local RestartReplicationError = errors.new_class('RestartReplicationError')
 
+local apply_config_seconds = internal_metrics.histogram(
+    'cartridge_apply_config_seconds',
+    'Duration of applying the clusterwide config on the instance'
+)
+
 vars:new('state', '')
 vars:new('error')
 vars:new('state_notification', fiber.cond())
@@ -283,8 +289,12 @@ local function apply_config(clusterwide_config)
         'Unexpected state ' .. vars.state
     )
 
+    local start = internal_metrics.clock()
     vars.clusterwide_config = clusterwide_config
     set_state('ConfiguringRoles')
+    -- Issues of the previous topology are irrelevant now.
+    -- Required lazily, cartridge.issues depends on confapplier.
+    require('cartridge.issues').invalidate_snapshot()
 
     local topology_cfg = clusterwide_config:get_readonly('topology')
     local allowed_uris = {}
@@ -325,6 +335,7 @@ local function apply_config(clusterwide_config)
     )
     if not ok then
         set_state('OperationError', err)
+        apply_config_seconds:observe_since(start)
         return nil, err
     end
 
@@ -353,6 +364,7 @@ local function apply_config(clusterwide_config)
         end
     end
 
+    apply_config_seconds:observe_since(start)
     return ok, err
 end
 
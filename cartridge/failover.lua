@@ -43,6 +43,7 @@ local stateboard_client = require('cartridge.stateboard-client')
 local etcd2_client = require('cartridge.etcd2-client')
 local raft_failover = require('cartridge.failover.raft')
 local leader_autoreturn = require('cartridge.failover.leader_autoreturn')
+local timeline = require('cartridge.failover.timeline')
 local manual_election_mode = require('cartridge.failover.manual_election_mode')
 local argparse = require('cartridge.argparse')
 local sync_spaces = require('cartridge.sync-spaces')
@@ -89,6 +90,7 @@ vars:new('options', {
     WAITLSN_TIMEOUT = 3, -- One may treat it as WAIT_CONSISTENCY_TIMEOUT
     LONGPOLL_TIMEOUT = 30,
     NETBOX_CALL_TIMEOUT = 1,
+    TIMELINE_SIZE = 256,
 })
 vars:new('failover_paused', false)
 
@@ -142,9 +144,9 @@ end
 --- Schedule new reconfigure_all task.
 -- @function schedule_add
 -- @local
-local function schedule_add()
+local function schedule_add(step)
     schedule_clear()
-    local task = fiber.new(reconfigure_all, vars.cache.active_leaders)
+    local task = fiber.new(reconfigure_all, vars.cache.active_leaders, step)
     local id = task:id()
     task:name('cartridge.failover.task')
     vars.schedule[id] = task
@@ -427,13 +429,18 @@ local function fencing_watch()
             deadline = fiber.clock() + vars.fencing_timeout
         end
     until fiber.clock() > deadline
+    local detected_at = clock.time()
 
     if not accept_appointments({[vars.replicaset_uuid] = box.NULL}) then
         log.error('Assertion failed. Was fencing actuated twice?')
         return
     end
 
-    local id = schedule_add()
+    local step = timeline.new_step()
+    timeline.add(step, 'detection', {time = detected_at})
+    timeline.add(step, 'decision')
+
+    local id = schedule_add(step)
     log.warn('Fencing actuated, reapply scheduled (fiber %d)', id)
 end
 
@@ -646,7 +653,7 @@ local function constitute_oneself(active_leaders, opts)
     return true
 end
 
-function reconfigure_all(active_leaders)
+function reconfigure_all(active_leaders, step)
     local confapplier = require('cartridge.confapplier')
 ::start_over::
 
@@ -663,6 +670,9 @@ function reconfigure_all(active_leaders)
         fiber.sleep(t1 + vars.options.WAITLSN_TIMEOUT - t2)
         goto start_over
     end
+    timeline.add(step, 'appointment', {
+        leader_uuid = active_leaders[vars.replicaset_uuid],
+    })
 
     -- WARNING: implicit yield
     -- The event may arrive while two-phase commit is in progress.
@@ -695,6 +705,7 @@ function reconfigure_all(active_leaders)
         if err ~= nil then
             error(err)
         end
+        timeline.add(step, 'box_cfg', {read_only = not vars.cache.is_rw})
 
         local state = 'RolesConfigured'
 
@@ -725,6 +736,11 @@ function reconfigure_all(active_leaders)
             on_apply_config(mod, state)
         end
 
+        if state ~= 'RolesConfigured' then
+            timeline.add(step, 'apply', {error = state})
+        else
+            timeline.add(step, 'apply')
+        end
         return true
     end)
 
@@ -733,6 +749,7 @@ function reconfigure_all(active_leaders)
         log.info('Failover step finished in %.6f sec', apply_total_elapsed)
     else
         log.warn('Failover step failed after %.6f sec: %s', apply_total_elapsed, err)
+        timeline.add(step, 'apply', {error = tostring(err)})
     end
     confapplier.set_state('RolesConfigured')
 end
@@ -776,6 +793,7 @@ local function failover_loop(args)
         -- WARNING: implicit yield
         local appointments, err = FailoverError:pcall(args.get_appointments)
         fiber.testcancel()
+        local detected_at = clock.time()
 
         local csw1 = utils.fiber_csw()
 
@@ -800,7 +818,12 @@ local function failover_loop(args)
         end
 
         if accept_appointments(appointments) then
-            local id = schedule_add()
+            local step = timeline.new_step()
+            timeline.add(step, 'detection', {time = detected_at})
+            timeline.add(step, 'decision', {
+                leader_uuid = vars.cache.active_leaders[vars.replicaset_uuid],
+            })
+            local id = schedule_add(step)
             log.info(
                 'Failover triggered, reapply' ..
                 ' scheduled (fiber %d)', id
@@ -1176,6 +1199,14 @@ local function cfg(clusterwide_config, opts)
     return true
 end
 
+--- Get recorded failover events.
+-- @function get_timeline
+-- @local
+-- @treturn {table,...} See `cartridge.failover.timeline`
+local function get_timeline()
+    return timeline.get()
+end
+
 --- Get map of replicaset leaders.
 -- @function get_active_leaders
 -- @local
@@ -1386,6 +1417,7 @@ end
 return {
     cfg = cfg,
     get_active_leaders = get_active_leaders,
+    get_timeline = get_timeline,
     get_coordinator = get_coordinator,
     get_error = get_error,
     check_cookie_hash_error = check_cookie_hash_error,
@@ -0,0 +1,79 @@
+--- Timeline of failover events.
+--
+-- Every leadership change is recorded as a step consisting of events:
+--
+-- * `detection` - new appointments are fetched
+--   (membership event, state provider longpoll or Raft status);
+-- * `decision` - appointments are accepted and the leader changes;
+-- * `appointment` - the instance constitutes itself as a leader
+--   or a replica (consistent switchover is reached if it's needed);
+-- * `box_cfg` - `box.cfg({read_only = ...})` is applied;
+-- * `apply` - roles are reconfigured.
+--
+-- Events are stamped with the wall clock time, so timelines of
+-- different instances can be compared. Only the last
+-- `TIMELINE_SIZE` events are kept.
+--
+-- @module cartridge.failover.timeline
+-- @local
+
+local clock = require('clock')
+local checks = require('checks')
+
+local vars = require('cartridge.vars').new('cartridge.failover')
+vars:new('timeline', {})
+vars:new('timeline_step', 0)
+
+--- Start a new step.
+-- @function new_step
+-- @treturn number Step number
+local function new_step()
+    vars.timeline_step = vars.timeline_step + 1
+    return vars.timeline_step
+end
+
+--- Record an event.
+--
+-- Events outside of a step (e.g. when the config is applied)
+-- aren't recorded.
+--
+-- @function add
+-- @tparam ?number step
+-- @tparam string event
+-- @tparam[opt] table details
+--   Extra fields (`time`, `leader_uuid`, `read_only`, `error`)
+local function add(step, event, details)
+    checks('?number', 'string', '?table')
+    if step == nil then
+        return
+    end
+
+    local record = {
+        step = step,
+        event = event,
+        time = clock.time(),
+        mode = vars.mode,
+    }
+    for k, v in pairs(details or {}) do
+        record[k] = v
+    end
+
+    local timeline = vars.timeline
+    table.insert(timeline, record)
+    while #timeline > vars.options.TIMELINE_SIZE do
+        table.remove(timeline, 1)
+    end
+end
+
+--- Get recorded events, the oldest first.
+-- @function get
+-- @treturn {table,...}
+local function get()
+    return table.deepcopy(vars.timeline)
+end
+
+return {
+    new_step = new_step,
+    add = add,
+    get = get,
+}
@@ -1,5 +1,6 @@
 local log = require('log')
 local json = require('json')
+local digest = require('digest')
 local checks = require('checks')
 local errors = require('errors')
 
@@ -11,6 +12,7 @@ local schema = require('graphql.schema')
 local execute = require('graphql.execute')
 local funcall = require('cartridge.funcall')
 local validate = require('graphql.validate')
+local internal_metrics = require('cartridge.internal-metrics')
 
 
 vars:new('graphql_schema', nil)
@@ -19,14 +21,102 @@ vars:new('on_resolve_triggers', {})
 vars:new('callbacks', {})
 vars:new('mutations', {})
 vars:new('disable_errstack', false)
+-- Parsed and validated queries, see `lru_get` below
+vars:new('query_cache_size', 128)
+vars:new('query_cache', nil)
+vars:new('persisted_queries', nil)
+vars:new('schema_version', 0)
 
 local e_graphql_internal = errors.new_class('Graphql internal error')
 local e_graphql_parse = errors.new_class('Graphql parsing failed')
 local e_graphql_validate = errors.new_class('Graphql validation failed')
 local e_graphql_execute = errors.new_class('Graphql execution failed')
 
+local graphql_seconds = internal_metrics.histogram(
+    'cartridge_graphql_seconds',
+    'Duration of GraphQL request stages',
+    {'stage'}
+)
+local graphql_errors_total = internal_metrics.counter(
+    'cartridge_graphql_errors_total',
+    'GraphQL requests failed',
+    {'stage'}
+)
+
+-- Bounded LRU cache: a hash table plus a doubly linked list of entries,
+-- most recently used ones at the head. It's a plain table, so it
+-- survives hot reload together with vars.
+local function lru_new()
+    local head = {}
+    head.prev = head
+    head.next = head
+    return {
+        head = head,
+        entries = {},
+        count = 0,
+        hits = 0,
+        misses = 0,
+    }
+end
+
+local function lru_unlink(entry)
+    entry.prev.next = entry.next
+    entry.next.prev = entry.prev
+end
+
+local function lru_push(lru, entry)
+    local head = lru.head
+    entry.prev = head
+    entry.next = head.next
+    head.next.prev = entry
+    head.next = entry
+end
+
+local function lru_get(lru, key)
+    local entry = lru.entries[key]
+    if entry == nil then
+        lru.misses = lru.misses + 1
+        return nil
+    end
+    lru.hits = lru.hits + 1
+    lru_unlink(entry)
+    lru_push(lru, entry)
+    return entry.value
+end
+
+local function lru_set(lru, key, value, size)
+    local entry = lru.entries[key]
+    if entry ~= nil then
+        entry.value = value
+        lru_unlink(entry)
+        lru_push(lru, entry)
+        return
+    end
+
+    entry = {key = key, value = value}
+    lru.entries[key] = entry
+    lru.count = lru.count + 1
+    lru_push(lru, entry)
+
+    while lru.count > size do
+        local last = lru.head.prev
+        lru_unlink(last)
+        lru.entries[last.key] = nil
+        lru.count = lru.count - 1
+    end
+end
+
+-- Cached ASTs were validated against the previous schema,
+-- drop them together with it
+local function invalidate_schema()
+    vars.graphql_schema = nil
+    vars.schema_version = vars.schema_version + 1
+    vars.query_cache = nil
+end
+
 local function set_model(model_entrypoints)
     vars.model = model_entrypoints
+    invalidate_schema()
 end
 
 local function funcall_wrap(fun_name, operation, field_name)
@@ -63,7 +153,7 @@ local function add_callback_prefix(prefix, doc)
         description = doc,
     }
     vars.callbacks[prefix] = obj
-    vars.graphql_schema = nil
+    invalidate_schema()
     return obj
 end
 
@@ -86,7 +176,7 @@ local function add_mutation_prefix(prefix, doc)
         description = doc,
     }
     vars.mutations[prefix] = obj
-    vars.graphql_schema = nil
+    invalidate_schema()
     return obj
 end
 
@@ -131,7 +221,7 @@ local function add_callback(opts)
             description = opts.doc,
         }
     end
-    vars.graphql_schema = nil
+    invalidate_schema()
 end
 
 local function add_mutation(opts)
@@ -175,7 +265,7 @@ local function add_mutation(opts)
             description = opts.doc,
         }
     end
-    vars.graphql_schema = nil
+    invalidate_schema()
 end
 
 local function get_schema()
@@ -215,6 +305,79 @@ local function get_schema()
     return vars.graphql_schema
 end
 
+local function get_query_cache()
+    local cache = vars.query_cache
+    if cache == nil or cache.schema_version ~= vars.schema_version then
+        cache = lru_new()
+        cache.schema_version = vars.schema_version
+        vars.query_cache = cache
+    end
+    return cache
+end
+
+-- Parse the query and validate it against the schema. Successfully
+-- validated ASTs are cached by the query text, so that the same
+-- queries polled by WebUI and monitoring skip both steps.
+local function parse_query(schema_obj, query)
+    local size = vars.query_cache_size
+    local cache
+    if size > 0 then
+        cache = get_query_cache()
+        local ast = lru_get(cache, query)
+        if ast ~= nil then
+            return ast
+        end
+    end
+
+    local ast, err = e_graphql_parse:pcall(parse.parse, query)
+    if ast == nil then
+        return nil, err
+    end
+
+    local _, err = e_graphql_validate:pcall(validate.validate, schema_obj, ast)
+    if err ~= nil then
+        return nil, err
+    end
+
+    if cache ~= nil then
+        lru_set(cache, query, ast, size)
+    end
+    return ast
+end
+
+-- Automatic persisted queries, the protocol of Apollo:
+-- https://github.com/apollographql/apollo-link-persisted-queries
+--
+-- A client sends the query hash only. If the hash is unknown,
+-- it repeats the request with both the hash and the query text,
+-- and the query is remembered for the next time.
+local function get_persisted_query(hash, query)
+    hash = hash:lower()
+    local size = vars.query_cache_size
+    if vars.persisted_queries == nil then
+        vars.persisted_queries = lru_new()
+    end
+
+    if query ~= nil then
+        if type(query) ~= 'string' or digest.sha256_hex(query) ~= hash then
+            return nil, {message = "Provided sha256Hash does not match query"}
+        end
+        if size > 0 then
+            lru_set(vars.persisted_queries, hash, query, size)
+        end
+        return query
+    end
+
+    query = lru_get(vars.persisted_queries, hash)
+    if query == nil then
+        return nil, {
+            message = 'PersistedQueryNotFound',
+            extensions = {code = 'PERSISTED_QUERY_NOT_FOUND'},
+        }
+    end
+    return query
+end
+
 local function http_finalize(obj)
     checks('table')
     return auth.render_response({
@@ -246,7 +409,26 @@ local function _execute_graphql(req)
         })
     end
 
-    if parsed.query == nil or type(parsed.query) ~= "string" then
+    local query = parsed.query
+    local persisted = type(parsed.extensions) == 'table'
+        and parsed.extensions.persistedQuery or nil
+    if persisted ~= nil then
+        if type(persisted) ~= 'table' or type(persisted.sha256Hash) ~= 'string' then
+            return http_finalize({
+                errors = {{message = "'persistedQuery' should have 'sha256Hash' field"}},
+            })
+        end
+
+        local err
+        query, err = get_persisted_query(persisted.sha256Hash, query)
+        if query == nil then
+            return http_finalize({
+                errors = {err},
+            })
+        end
+    end
+
+    if query == nil or type(query) ~= "string" then
         return http_finalize({
             errors = {{message = "Body should have 'query' field"}},
         })
@@ -275,21 +457,14 @@ local function _execute_graphql(req)
     if parsed.variables ~= nil then
         variables = parsed.variables
     end
-    local query = parsed.query
-
-    local ast, err = e_graphql_parse:pcall(parse.parse, query)
-
-    if not ast then
-        log.error('%s', err)
-        return http_finalize({
-            errors = {{message = err.err}},
-        })
-    end
 
+    local parse_start = internal_metrics.clock()
     local schema_obj = get_schema()
-    local _, err = e_graphql_validate:pcall(validate.validate, schema_obj, ast)
+    local ast, err = parse_query(schema_obj, query)
+    graphql_seconds:observe_since(parse_start, 'parse')
 
-    if err then
+    if ast == nil then
+        graphql_errors_total:inc(1, 'parse')
         log.error('%s', err)
         return http_finalize({
             errors = {{message = err.err}},
@@ -298,11 +473,14 @@ local function _execute_graphql(req)
 
     local rootValue = {}
 
+    local execute_start = internal_metrics.clock()
     local data, err = e_graphql_execute:pcall(execute.execute,
         schema_obj, ast, rootValue, variables, operationName
     )
+    graphql_seconds:observe_since(execute_start, 'execute')
 
     if data == nil then
+        graphql_errors_total:inc(1, 'execute')
         if not errors.is_error_object(err) then
             err = e_graphql_execute:new(err or "Unknown error")
         end
@@ -406,6 +584,24 @@ local function on_resolve(trigger_new, trigger_old)
     return trigger_new
 end
 
+--- Set the size of GraphQL query caches.
+--
+-- Up to `size` parsed and validated queries are kept, the least
+-- recently used ones are evicted. The same limit applies to the
+-- persisted queries, which let clients send a `sha256Hash` of the
+-- query in `extensions.persistedQuery` instead of the query text.
+--
+-- Zero size disables caching.
+--
+-- @function set_query_cache_size
+-- @tparam number size
+local function set_query_cache_size(size)
+    checks('number')
+    vars.query_cache_size = size
+    vars.query_cache = nil
+    vars.persisted_queries = nil
+end
+
 return {
     init = init,
     set_model = set_model,
@@ -416,4 +612,5 @@ return {
     add_callback = add_callback,
     add_mutation = add_mutation,
     on_resolve = on_resolve,
+    set_query_cache_size = set_query_cache_size,
 }
@@ -0,0 +1,368 @@
+--- Internal metrics of cartridge hot paths.
+--
+-- A tiny registry of counters and histograms, which are updated by
+-- the two-phase commit, the connection pool, the config applier and
+-- the GraphQL endpoint. It doesn't depend on the `metrics` rock and
+-- is disabled by default: every update starts with a flag check and
+-- returns immediately, so the instrumentation is almost free.
+--
+-- Enable it with `--internal-metrics` argument
+-- (or `TARANTOOL_INTERNAL_METRICS` environment variable) or
+-- `set_enabled(true)`. Collected values are served over HTTP at
+-- `<webui_prefix>/admin/metrics` in the Prometheus text format,
+-- the endpoint responds 404 while collecting is disabled.
+--
+-- Histograms share the fixed bucket layout `BUCKETS` (in seconds).
+--
+-- @module cartridge.internal-metrics
+-- @local
+
+local fiber = require('fiber')
+local checks = require('checks')
+
+local vars = require('cartridge.vars').new('cartridge.internal-metrics')
+vars:new('enabled', false)
+-- name -> collector
+vars:new('collectors', {})
+-- collector names in the order of declaration
+vars:new('names', {})
+
+--- Upper bounds of histogram buckets, seconds.
+-- @table BUCKETS
+local BUCKETS = {
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+}
+local BUCKETS_COUNT = #BUCKETS
+
+local counter_mt = {__index = {}}
+local histogram_mt = {__index = {}}
+
+local function series_key(...)
+    local n = select('#', ...)
+    if n == 0 then
+        return ''
+    elseif n == 1 then
+        return tostring((...))
+    end
+    local values = {...}
+    for i = 1, n do
+        values[i] = tostring(values[i])
+    end
+    return table.concat(values, '\0')
+end
+
+local function get_series(self, key, ...)
+    local series = self.series[key]
+    if series == nil then
+        series = {label_values = {...}}
+        if self.kind == 'histogram' then
+            series.buckets = table.new(BUCKETS_COUNT, 0)
+            for i = 1, BUCKETS_COUNT do
+                series.buckets[i] = 0
+            end
+            series.sum = 0
+            series.count = 0
+        else
+            series.value = 0
+        end
+        self.series[key] = series
+    end
+    return series
+end
+
+--- Increment the counter.
+-- @function counter:inc
+-- @tparam number value
+-- @param ... label values, in order of `label_names`
+function counter_mt.__index:inc(value, ...)
+    if not vars.enabled then
+        return
+    end
+    local series = get_series(self, series_key(...), ...)
+    series.value = series.value + value
+end
+
+--- Put an observation into the histogram.
+-- @function histogram:observe
+-- @tparam number value
+-- @param ... label values, in order of `label_names`
+function histogram_mt.__index:observe(value, ...)
+    if not vars.enabled then
+        return
+    end
+    local series = get_series(self, series_key(...), ...)
+    for i = 1, BUCKETS_COUNT do
+        if value <= BUCKETS[i] then
+            series.buckets[i] = series.buckets[i] + 1
+            break
+        end
+    end
+    series.sum = series.sum + value
+    series.count = series.count + 1
+end
+
+--- Observe time elapsed since `start` (obtained from `clock()`).
+-- @function histogram:observe_since
+-- @tparam number start
+-- @param ... label values, in order of `label_names`
+function histogram_mt.__index:observe_since(start, ...)
+    if not vars.enabled then
+        return
+    end
+    self:observe(fiber.clock() - start, ...)
+end
+
+local function declare(kind, mt, name, help, label_names)
+    local collector = vars.collectors[name]
+    if collector == nil then
+        collector = {
+            name = name,
+            kind = kind,
+            series = {},
+        }
+        vars.collectors[name] = collector
+        table.insert(vars.names, name)
+    end
+    -- Refresh on hot reload
+    collector.help = help
+    collector.label_names = label_names or {}
+    return setmetatable(collector, mt)
+end
+
+--- Declare a counter.
+--
+-- Declaring the same name twice returns the same collector.
+--
+-- @function counter
+-- @tparam string name
+-- @tparam string help
+-- @tparam[opt] {string,...} label_names
+local function counter(name, help, label_names)
+    checks('string', 'string', '?table')
+    return declare('counter', counter_mt, name, help, label_names)
+end
+
+--- Declare a histogram.
+--
+-- Declaring the same name twice returns the same collector.
+--
+-- @function histogram
+-- @tparam string name
+-- @tparam string help
+-- @tparam[opt] {string,...} label_names
+local function histogram(name, help, label_names)
+    checks('string', 'string', '?table')
+    return declare('histogram', histogram_mt, name, help, label_names)
+end
+
+--- Get the clock value to be passed to `observe_since`.
+-- @function clock
+-- @treturn number
+local clock = fiber.clock
+
+--- Enable or disable collecting. Values collected earlier are kept.
+-- @function set_enabled
+-- @tparam boolean enabled
+local function set_enabled(enabled)
+    checks('boolean')
+    vars.enabled = enabled
+end
+
+local function is_enabled()
+    return vars.enabled
+end
+
+--- Drop all collected values. Declared collectors are kept.
+-- @function reset
+local function reset()
+    for _, collector in pairs(vars.collectors) do
+        collector.series = {}
+    end
+end
+
+--- Get a snapshot of collected values.
+--
+-- @function collect
+-- @treturn {table,...}
+--   Collectors in order of declaration, each one with `name`, `kind`,
+--   `help`, `label_names` and `series`. Histogram series buckets are
+--   cumulative and don't include `+Inf`, it equals to `count`.
+local function collect()
+    local ret = {}
+    for _, name in ipairs(vars.names) do
+        local collector = vars.collectors[name]
+        local keys = {}
+        for key, _ in pairs(collector.series) do
+            table.insert(keys, key)
+        end
+        table.sort(keys)
+
+        local series = {}
+        for _, key in ipairs(keys) do
+            local s = collector.series[key]
+            local labels = {}
+            for i, label_name in ipairs(collector.label_names) do
+                labels[label_name] = s.label_values[i]
+            end
+
+            if collector.kind == 'histogram' then
+                local buckets = {}
+                local cumulative = 0
+                for i, le in ipairs(BUCKETS) do
+                    cumulative = cumulative + s.buckets[i]
+                    buckets[i] = {le = le, count = cumulative}
+                end
+                table.insert(series, {
+                    labels = labels,
+                    buckets = buckets,
+                    sum = s.sum,
+                    count = s.count,
+                })
+            else
+                table.insert(series, {labels = labels, value = s.value})
+            end
+        end
+
+        table.insert(ret, {
+            name = collector.name,
+            kind = collector.kind,
+            help = collector.help,
+            label_names = table.copy(collector.label_names),
+            series = series,
+        })
+    end
+    return ret
+end
+
+local function format_value(value)
+    if value ~= value then
+        return 'NaN'
+    elseif value == math.huge then
+        return '+Inf'
+    elseif value == -math.huge then
+        return '-Inf'
+    end
+    return string.format('%.16g', value)
+end
+
+local function escape_label(value)
+    return (tostring(value)
+        :gsub('\\', '\\\\')
+        :gsub('\n', '\\n')
+        :gsub('"', '\\"'))
+end
+
+local function format_labels(label_names, labels, le)
+    local pairs_list = {}
+    for _, label_name in ipairs(label_names) do
+        if labels[label_name] ~= nil then
+            table.insert(pairs_list, string.format('%s="%s"',
+                label_name, escape_label(labels[label_name])
+            ))
+        end
+    end
+    if le ~= nil then
+        table.insert(pairs_list, string.format('le="%s"', le))
+    end
+    if #pairs_list == 0 then
+        return ''
+    end
+    return '{' .. table.concat(pairs_list, ',') .. '}'
+end
+
+--- Render collected values in the Prometheus text format.
+-- @function render
+-- @treturn string
+local function render()
+    local lines = {}
+    for _, collector in ipairs(collect()) do
+        local name = collector.name
+        local label_names = collector.label_names
+        local help = collector.help:gsub('\\', '\\\\'):gsub('\n', '\\n')
+        table.insert(lines, string.format('# HELP %s %s', name, help))
+        table.insert(lines, string.format('# TYPE %s %s',
+            name, collector.kind
+        ))
+
+        for _, s in ipairs(collector.series) do
+            if collector.kind == 'histogram' then
+                for _, bucket in ipairs(s.buckets) do
+                    table.insert(lines, string.format('%s_bucket%s %s', name,
+                        format_labels(label_names, s.labels, format_value(bucket.le)),
+                        format_value(bucket.count)
+                    ))
+                end
+                table.insert(lines, string.format('%s_bucket%s %s', name,
+                    format_labels(label_names, s.labels, '+Inf'),
+                    format_value(s.count)
+                ))
+                table.insert(lines, string.format('%s_sum%s %s', name,
+                    format_labels(label_names, s.labels), format_value(s.sum)
+                ))
+                table.insert(lines, string.format('%s_count%s %s', name,
+                    format_labels(label_names, s.labels), format_value(s.count)
+                ))
+            else
+                table.insert(lines, string.format('%s%s %s', name,
+                    format_labels(label_names, s.labels), format_value(s.value)
+                ))
+            end
+        end
+    end
+    table.insert(lines, '')
+    return table.concat(lines, '\n')
+end
+
+local function http_handler(req)
+    local auth = require('cartridge.auth')
+    if not auth.authorize_request(req) then
+        return auth.render_response({
+            status = 401,
+            headers = {['content-type'] = 'text/plain; charset=utf-8'},
+            body = 'Unauthorized',
+        })
+    end
+
+    -- The route is registered before the options are parsed and
+    -- collecting can be switched at runtime, so it's checked here
+    if not vars.enabled then
+        return auth.render_response({
+            status = 404,
+            headers = {['content-type'] = 'text/plain; charset=utf-8'},
+            body = 'Internal metrics are disabled',
+        })
+    end
+
+    return auth.render_response({
+        status = 200,
+        headers = {['content-type'] = 'text/plain; version=0.0.4; charset=utf-8'},
+        body = render(),
+    })
+end
+
+local function init(httpd, opts)
+    checks('table', {
+        prefix = 'string',
+    })
+
+    httpd:route({
+        path = opts.prefix .. '/admin/metrics',
+        method = 'GET',
+    }, http_handler)
+end
+
+return {
+    BUCKETS = BUCKETS,
+
+    counter = counter,
+    histogram = histogram,
+    clock = clock,
+
+    set_enabled = set_enabled,
+    is_enabled = is_enabled,
+    reset = reset,
+    collect = collect,
+    render = render,
+    init = init,
+}
@@ -163,6 +163,24 @@ vars:new('check_doubled_buckets_period', 24*60*60) -- 24 hours
 vars:new('instance_uuid')
 vars:new('replicaset_uuid')
 
+-- Issues snapshot shared by all readers (e.g. WebUI tabs polling the
+-- same router). `{issues = {...}, err = ..., unrecoverable_uuids = {...},
+-- clock = ..., config = ...}`. It never changes the topology.
+vars:new('snapshot', nil)
+-- Issues of every instance the snapshot is built from,
+-- `{[uri] = {issues = {...}, err = ..., clock = ..., config = ...}}`
+vars:new('instance_issues', {})
+-- Max snapshot age, seconds. Zero means only concurrent requests
+-- share the result.
+vars:new('snapshot_ttl', 0)
+-- Refresh in progress, see `shared_refresh`
+vars:new('refresh', nil)
+vars:new('snapshot_cond', fiber.cond())
+vars:new('snapshot_last_read', 0)
+vars:new('aggregator_fiber', nil)
+-- The aggregator stops if nobody reads the snapshot for that long
+local AGGREGATOR_IDLE_TIMEOUT = 60
+
 local function describe(uri)
     local member = membership.get_member(uri)
     if member ~= nil and member.payload.alias ~= nil then
@@ -587,32 +605,19 @@ end
 local disk_failure_cache = {}
 local doubled_buckets_count_cache = 0
 local last_doubled_buckets_check = fiber.time()
-local function list_on_cluster()
-    local state, err = confapplier.get_state()
-    if state == 'Unconfigured' and lua_api_proxy.can_call()  then
-        -- Try to proxy call
-        local ret = lua_api_proxy.call(mod_name .. '.list_on_cluster')
-        if ret ~= nil then
-            return ret
-        -- else
-            -- Don't return an error, go on
-        end
-    elseif state == 'InitError' or state == 'BootError' then
-        return nil, err
-    end
 
-    local ret = {}
+local function get_uri_list(topology_cfg)
     local uri_list = {}
-    local topology_cfg = confapplier.get_readonly('topology')
-
-    if topology_cfg == nil then
-        return ret
-    end
-
     local refined_uri_list = topology.refine_servers_uri(topology_cfg)
     for _, uuid, _ in fun.filter(topology.not_disabled, topology_cfg.servers) do
         table.insert(uri_list, refined_uri_list[uuid])
     end
+    return uri_list
+end
+
+-- Issues the router detects on its own, without polling instances
+local function list_on_cluster_local(topology_cfg, uri_list)
+    local ret = {}
 
     if vars.replicaset_uuid == nil or vars.instance_uuid == nil then
         local box_info = box.info
@@ -790,12 +795,16 @@ local function list_on_cluster()
             )
         })
     end
-    -- Get each instance issues (replication, failover, memory usage)
 
+    return ret, unrecoverable_uuids
+end
+
+-- Get each instance issues (replication, failover, memory usage)
+local function list_on_instances(uri_list)
     local twophase_vars = require('cartridge.vars').new('cartridge.twophase')
     local patch_in_progress = assert(twophase_vars.locks)['clusterwide']
 
-    local issues_map, err = pool.map_call(
+    return pool.map_call(
         '_G.__cartridge_issues_list_on_instance',
         {{
             checksum = confapplier.get_active_config():get_checksum(),
@@ -803,15 +812,25 @@ local function list_on_cluster()
         }},
         {uri_list = uri_list, timeout = 1}
     )
+end
 
-    local uuids_to_disable = {}
-    for _, issues in pairs(issues_map) do
+local function merge_instances_issues(ret, issues_list)
+    for _, issues in pairs(issues_list) do
         for _, issue in pairs(issues) do
             table.insert(ret, issue)
-            if issue.topic == 'disk_failure' then
-                table.insert(uuids_to_disable, issue.instance_uuid)
-                disk_failure_cache[issue.instance_uuid] = issue
-            end
+        end
+    end
+    return ret
+end
+
+-- Remember failed disks and disable broken instances. It's done
+-- only when issues are requested, the snapshot stays read-only.
+local function handle_issues(ret, unrecoverable_uuids)
+    local uuids_to_disable = {}
+    for _, issue in ipairs(ret) do
+        if issue.topic == 'disk_failure' then
+            table.insert(uuids_to_disable, issue.instance_uuid)
+            disk_failure_cache[issue.instance_uuid] = issue
         end
     end
 
@@ -829,7 +848,248 @@ local function list_on_cluster()
     -- to use this counter in tarantool/metrics
     rawset(_G, '__cartridge_issues_cnt', #ret)
 
-    return ret, err
+    return ret
+end
+
+local function list_on_cluster()
+    local state, err = confapplier.get_state()
+    if state == 'Unconfigured' and lua_api_proxy.can_call()  then
+        -- Try to proxy call
+        local ret = lua_api_proxy.call(mod_name .. '.list_on_cluster')
+        if ret ~= nil then
+            return ret
+        -- else
+            -- Don't return an error, go on
+        end
+    elseif state == 'InitError' or state == 'BootError' then
+        return nil, err
+    end
+
+    local topology_cfg = confapplier.get_readonly('topology')
+    if topology_cfg == nil then
+        return {}
+    end
+
+    local uri_list = get_uri_list(topology_cfg)
+    local ret, unrecoverable_uuids = list_on_cluster_local(topology_cfg, uri_list)
+    local issues_map, err = list_on_instances(uri_list)
+    ret = merge_instances_issues(ret, issues_map)
+    return handle_issues(ret, unrecoverable_uuids), err
+end
+
+--- Drop the issues snapshot.
+--
+-- It's called when the config is applied, so the snapshot never
+-- describes a topology that doesn't exist anymore.
+--
+-- @function invalidate_snapshot
+-- @local
+local function invalidate_snapshot()
+    vars.snapshot = nil
+    vars.instance_issues = {}
+end
+
+-- Run `fn` unless it's already running, concurrent callers get the
+-- same result, even if it failed. They never retry on their own.
+local function shared_refresh(fn)
+    local refresh = vars.refresh
+    if refresh ~= nil then
+        while not refresh.done do
+            if fiber.find(refresh.fiber_id) == nil then
+                -- The fiber was killed (e.g. by hot reload)
+                vars.refresh = nil
+                return shared_refresh(fn)
+            end
+            vars.snapshot_cond:wait(1)
+        end
+    else
+        refresh = {done = false, fiber_id = fiber.id()}
+        vars.refresh = refresh
+        refresh.ok, refresh.issues, refresh.err = pcall(fn)
+        refresh.done = true
+        if vars.refresh == refresh then
+            vars.refresh = nil
+        end
+        vars.snapshot_cond:broadcast()
+    end
+
+    if not refresh.ok then
+        error(refresh.issues, 0)
+    end
+    return refresh.issues, refresh.err
+end
+
+local function is_configured(state)
+    return state ~= 'Unconfigured'
+        and state ~= 'InitError'
+        and state ~= 'BootError'
+end
+
+-- Poll instances and update their entries in the snapshot
+local function refresh_instances(uri_list)
+    if #uri_list == 0 then
+        return
+    end
+
+    local config = confapplier.get_active_config()
+    local issues_map, err = list_on_instances(uri_list)
+    local errmap = err and err.suberrors or {}
+    local now = fiber.clock()
+    for _, uri in ipairs(uri_list) do
+        vars.instance_issues[uri] = {
+            issues = issues_map[uri] or {},
+            err = errmap[uri],
+            clock = now,
+            config = config,
+        }
+    end
+end
+
+local function is_fresh(entry, config, ttl)
+    return entry ~= nil
+        and entry.config == config
+        and fiber.clock() - entry.clock < ttl
+end
+
+-- Combine the issues detected by the router with the ones of every
+-- instance. Only instances missing in the snapshot or outdated
+-- are polled. It has no side effects, see `handle_issues`.
+local function build_snapshot()
+    local config = confapplier.get_active_config()
+    local topology_cfg = confapplier.get_readonly('topology')
+    if topology_cfg == nil then
+        vars.snapshot = {issues = {}, unrecoverable_uuids = {},
+            clock = fiber.clock(), config = config}
+        return vars.snapshot
+    end
+
+    local uri_list = get_uri_list(topology_cfg)
+    local outdated = {}
+    for _, uri in ipairs(uri_list) do
+        if not is_fresh(vars.instance_issues[uri], config, vars.snapshot_ttl) then
+            table.insert(outdated, uri)
+        end
+    end
+    refresh_instances(outdated)
+
+    local ret, unrecoverable_uuids = list_on_cluster_local(topology_cfg, uri_list)
+    local instance_issues = {}
+    local issues_list = {}
+    local errmap = {}
+    for _, uri in ipairs(uri_list) do
+        local entry = vars.instance_issues[uri]
+        if entry ~= nil then
+            instance_issues[uri] = entry
+            table.insert(issues_list, entry.issues)
+            errmap[uri] = entry.err
+        end
+    end
+    -- Forget expelled and disabled instances
+    vars.instance_issues = instance_issues
+
+    -- Same error as polling all instances at once would return
+    local err
+    if next(errmap) ~= nil then
+        err = pool.unite_errors(errmap)
+    end
+
+    vars.snapshot = {
+        issues = merge_instances_issues(ret, issues_list),
+        err = err,
+        unrecoverable_uuids = unrecoverable_uuids,
+        clock = fiber.clock(),
+        config = config,
+    }
+    return vars.snapshot
+end
+
+-- Instances are polled one by one, spread evenly over TTL/2,
+-- then the snapshot is rebuilt. Readers never find it older than TTL.
+local function aggregator_step()
+    local ttl = vars.snapshot_ttl
+    local topology_cfg = confapplier.get_readonly('topology')
+    if topology_cfg == nil or not is_configured(confapplier.get_state()) then
+        fiber.sleep(ttl / 2)
+        return
+    end
+
+    local uri_list = get_uri_list(topology_cfg)
+    local interval = ttl / 2 / math.max(#uri_list, 1)
+    for _, uri in ipairs(uri_list) do
+        -- Sleep first, the reader which started the fiber
+        -- is polling all instances right now
+        fiber.sleep(interval)
+        if vars.snapshot_ttl <= 0 then
+            return
+        end
+
+        local config = confapplier.get_active_config()
+        -- Readers could have polled it recently
+        if not is_fresh(vars.instance_issues[uri], config, ttl / 2) then
+            refresh_instances({uri})
+        end
+    end
+
+    shared_refresh(build_snapshot)
+end
+
+local function aggregator_loop()
+    while vars.snapshot_ttl > 0
+    and fiber.clock() - vars.snapshot_last_read < AGGREGATOR_IDLE_TIMEOUT
+    do
+        local ok, err = pcall(aggregator_step)
+        if not ok then
+            log.warn('Issues aggregation failed: %s', err)
+            fiber.sleep(vars.snapshot_ttl / 2)
+        end
+    end
+    vars.aggregator_fiber = nil
+end
+
+--- List issues using the snapshot.
+--
+-- Same as `list_on_cluster`, but the result is shared: concurrent
+-- calls wait for a single refresh. With `set_snapshot_ttl` a background
+-- fiber keeps the issues of every instance up to date while the
+-- snapshot is being read.
+--
+-- @function list_on_cluster_cached
+-- @local
+-- @treturn {table,...} issues
+-- @treturn[opt] table Error description
+local function list_on_cluster_cached()
+    vars.snapshot_last_read = fiber.clock()
+
+    local ttl = vars.snapshot_ttl
+    if ttl <= 0 or not is_configured(confapplier.get_state()) then
+        return shared_refresh(list_on_cluster)
+    end
+
+    -- The fiber is killed by hot reload, restart it
+    if vars.aggregator_fiber == nil
+    or vars.aggregator_fiber:status() == 'dead'
+    then
+        vars.aggregator_fiber = fiber.new(aggregator_loop)
+        vars.aggregator_fiber:name('cartridge.issues-aggregator')
+    end
+
+    local snapshot = vars.snapshot
+    if not is_fresh(snapshot, confapplier.get_active_config(), ttl) then
+        snapshot = shared_refresh(build_snapshot)
+    end
+
+    local ret = table.copy(snapshot.issues)
+    return handle_issues(ret, snapshot.unrecoverable_uuids), snapshot.err
+end
+
+--- Set the max age of the issues snapshot.
+--
+-- @function set_snapshot_ttl
+-- @local
+-- @tparam number ttl seconds, 0 disables the snapshot
+local function set_snapshot_ttl(ttl)
+    vars.snapshot_ttl = ttl or 0
+    invalidate_snapshot()
 end
 
 --- Validate limits configuration.
@@ -890,6 +1150,7 @@ local function set_limits(limits)
     end
 
     vars.limits = fun.chain(vars.limits, limits):tomap()
+    invalidate_snapshot()
     return true
 end
 
@@ -897,6 +1158,9 @@ _G.__cartridge_issues_list_on_instance = list_on_instance
 
 return {
     list_on_cluster = list_on_cluster,
+    list_on_cluster_cached = list_on_cluster_cached,
+    invalidate_snapshot = invalidate_snapshot,
+    set_snapshot_ttl = set_snapshot_ttl,
     default_limits = default_limits,
     validate_limits = validate_limits,
     set_limits = set_limits,
@@ -378,6 +378,33 @@ local function switch_to_off_election_mode(opts)
     return failover.switch_to_off_election_mode(opts)
 end
 
+--- Get failover events recorded on the current instance.
+--
+-- Every leadership change is a step of `detection`, `decision`,
+-- `appointment`, `box_cfg` and `apply` events, the oldest first.
+--
+-- @function get_timeline
+-- @treturn {FailoverEvent,...}
+local function get_timeline()
+    --- Failover event.
+    --
+    -- @table FailoverEvent
+    -- @tfield number step
+    --   Leadership change the event belongs to
+    -- @tfield string event
+    -- @tfield number time
+    --   Wall clock time (in seconds)
+    -- @tfield ?string mode
+    -- @tfield ?string leader_uuid
+    --   Leader of the current replicaset
+    --   (for `decision` and `appointment`)
+    -- @tfield ?boolean read_only
+    --   Applied value (for `box_cfg`)
+    -- @tfield ?string error
+    --   Failure description (for `apply`)
+    return failover.get_timeline()
+end
+
 local --[[const]] PING_TIMEOUT = 3 -- seconds
 --- Gets status of the state provider if stateful failover is enabled.
 --
@@ -431,6 +458,7 @@ return {
     switch_to_manual_election_mode = switch_to_manual_election_mode,
     switch_to_off_election_mode = switch_to_off_election_mode,
     get_state_provider_status = get_state_provider_status,
+    get_timeline = get_timeline,
     get_failover_enabled = get_failover_enabled, -- deprecated
     set_failover_enabled = set_failover_enabled, -- deprecated
 }
@@ -12,6 +12,7 @@ local netbox = require('net.box')
 
 local vars = require('cartridge.vars').new('cartridge.pool')
 local cluster_cookie = require('cartridge.cluster-cookie')
+local internal_metrics = require('cartridge.internal-metrics')
 
 vars:new('connections', {})
 vars:new('options', {
@@ -24,6 +25,25 @@ local FormatURIError = errors.new_class('FormatURIError')
 local NetboxConnectError = errors.new_class('NetboxConnectError')
 local NetboxMapCallError = errors.new_class('NetboxMapCallError')
 
+local connect_seconds = internal_metrics.histogram(
+    'cartridge_pool_connect_seconds',
+    'Time spent waiting for net.box connections to be established'
+)
+local connect_errors_total = internal_metrics.counter(
+    'cartridge_pool_connect_errors_total',
+    'Connections failed to be established'
+)
+local map_call_seconds = internal_metrics.histogram(
+    'cartridge_pool_map_call_seconds',
+    'Duration of map_call fan-out until every URI responds',
+    {'fn_name'}
+)
+local map_call_errors_total = internal_metrics.counter(
+    'cartridge_pool_map_call_errors_total',
+    'URIs failed to respond to map_call',
+    {'fn_name'}
+)
+
 --- Enrich URI with credentials.
 -- Suitable to connect other cluster instances.
 --
@@ -146,8 +166,15 @@ local function connect(uri, opts)
         return conn
     end
 
+    if conn:is_connected() then
+        return conn
+    end
+
+    local start = internal_metrics.clock()
     local ok = conn:wait_connected(wait_connected)
+    connect_seconds:observe_since(start)
     if not ok then
+        connect_errors_total:inc(1)
         return nil, NetboxConnectError:new('%q: %s',
             uri, conn.error or "Connection not established (yet)"
         )
@@ -175,6 +202,54 @@ local function _gather_netbox_call(
     errmap[uri] = err
 end
 
+--- Gather errors of several URIs into a single one.
+--
+-- It's the error `map_call` returns, the original ones
+-- are kept in `suberrors`.
+--
+-- @function unite_errors
+-- @local
+--
+-- @tparam {URI=error,...} errmap
+-- @treturn table
+--   United error object.
+local function unite_errors(errmap)
+    local err_classes = {}
+    for _, v in pairs(errmap) do
+        if v.class_name then
+            err_classes[v.class_name] = v
+        end
+    end
+
+    local united_error = NetboxMapCallError:new('')
+    local united_error_err = {}
+    local united_error_str = {}
+    for _, v in pairs(err_classes) do
+        table.insert(united_error_err, v.err)
+        table.insert(united_error_str, string.format('* %s', v))
+    end
+
+    united_error.err = table.concat(united_error_err, '\n')
+    united_error.str = string.format("%s: %s:\n%s",
+        united_error.class_name,
+        'multiple errors occured',
+        table.concat(united_error_str, '\n')
+    )
+    united_error.stack = nil
+    united_error.suberrors = errmap
+
+    local __index = table.copy(errmap)
+    __index.tostring = NetboxMapCallError.tostring
+    local instance_mt = {
+        class_name = NetboxMapCallError.class_name,
+        __tostring = NetboxMapCallError.tostring,
+        __index = __index,
+    }
+    setmetatable(united_error, instance_mt)
+
+    return united_error
+end
+
 --- Perform a remote call to multiple URIs and map results.
 --
 -- (**Added** in v1.2.0-17)
@@ -225,6 +300,7 @@ local function map_call(fn_name, args, opts)
     local futures = table.new(0, #opts.uri_list)
 
     local timeout = opts.timeout or vars.options.MAP_CALL_TIMEOUT
+    local start = internal_metrics.clock()
     local deadline = fiber.clock() + timeout
 
     for _, uri in ipairs(opts.uri_list) do
@@ -275,44 +351,20 @@ local function map_call(fn_name, args, opts)
         future:discard()
     end
 
+    map_call_seconds:observe_since(start, fn_name)
     if next(errmap) == nil then
         return retmap
     end
 
-    local err_classes = {}
-    for _, v in pairs(errmap) do
-        if v.class_name then
-            err_classes[v.class_name] = v
+    if internal_metrics.is_enabled() then
+        local count = 0
+        for _ in pairs(errmap) do
+            count = count + 1
         end
+        map_call_errors_total:inc(count, fn_name)
     end
 
-    local united_error = NetboxMapCallError:new('')
-    local united_error_err = {}
-    local united_error_str = {}
-    for _, v in pairs(err_classes) do
-        table.insert(united_error_err, v.err)
-        table.insert(united_error_str, string.format('* %s', v))
-    end
-
-    united_error.err = table.concat(united_error_err, '\n')
-    united_error.str = string.format("%s: %s:\n%s",
-        united_error.class_name,
-        'multiple errors occured',
-        table.concat(united_error_str, '\n')
-    )
-    united_error.stack = nil
-    united_error.suberrors = errmap
-
-    local __index = table.copy(errmap)
-    __index.tostring = NetboxMapCallError.tostring
-    local instance_mt = {
-        class_name = NetboxMapCallError.class_name,
-        __tostring = NetboxMapCallError.tostring,
-        __index = __index,
-    }
-    setmetatable(united_error, instance_mt)
-
-    return retmap, united_error
+    return retmap, unite_errors(errmap)
 end
 
 
@@ -339,6 +391,7 @@ return {
     connect = connect,
     format_uri = format_uri,
     map_call = map_call,
+    unite_errors = unite_errors,
     change_port = change_port,
     init = init,
 }
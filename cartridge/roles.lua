@@ -20,6 +20,7 @@ local vars = require('cartridge.vars').new('cartridge.roles')
 local utils = require('cartridge.utils')
 local hotreload = require('cartridge.hotreload')
 local service_registry = require('cartridge.service-registry')
+local internal_metrics = require('cartridge.internal-metrics')
 
 local RegisterRoleError = errors.new_class('RegisterRoleError')
 local ValidateConfigError = errors.new_class('ValidateConfigError')
@@ -27,6 +28,12 @@ local ApplyConfigError = errors.new_class('ApplyConfigError')
 local ReloadError = errors.new_class('HotReloadError')
 local StopRoleError = errors.new_class('StopRoleError')
 
+local role_seconds = internal_metrics.histogram(
+    'cartridge_role_seconds',
+    'Duration of role init and apply_config callbacks',
+    {'role', 'stage'}
+)
+
 vars:new('module_names')
 vars:new('roles_by_number', {})
 vars:new('roles_by_role_name', {})
@@ -435,6 +442,9 @@ local function apply_config(conf, opts)
                 local _, _err = ApplyConfigError:pcall(
                     role.M.init, opts
                 )
+                role_seconds:observe(clock.monotonic() - start_time,
+                    role.role_name, 'init'
+                )
                 if _err ~= nil then
                     if err == nil then
                         err = _err
@@ -457,6 +467,9 @@ local function apply_config(conf, opts)
                 local _, _err = ApplyConfigError:pcall(
                     role.M.apply_config, conf, opts
                 )
+                role_seconds:observe(clock.monotonic() - start_time,
+                    role.role_name, 'apply_config'
+                )
                 if _err ~= nil then
                     if err == nil then
                         err = _err
@@ -3,6 +3,7 @@
 -- @module cartridge.rpc
 
 local fun = require('fun')
+local fiber = require('fiber')
 local checks = require('checks')
 local json = require('json')
 local errors = require('errors')
@@ -19,8 +20,30 @@ local twophase = require('cartridge.twophase')
 local service_registry = require('cartridge.service-registry')
 local label_utils = require('cartridge.label-utils')
 
+local vars = require('cartridge.vars').new('cartridge.rpc')
+local roles_vars = require('cartridge.vars').new('cartridge.roles')
+
 local RemoteCallError = errors.new_class('RemoteCallError')
 
+-- Candidates are memoized per role and options. The cache is bound to
+-- the objects it was built from: the topology of the active config,
+-- active leaders and registered roles. They're replaced (not modified)
+-- on every change, so comparing the references is enough. Membership
+-- events drop the cache explicitly.
+vars:new('candidates_cache', {})
+vars:new('candidates_cache_size', 0)
+vars:new('candidates_sources', {})
+vars:new('membership_notification', nil)
+vars:new('membership_watcher', nil)
+
+-- Subscribe once, otherwise every hot reload leaks a subscription
+if vars.membership_notification == nil then
+    vars.membership_notification = membership.subscribe()
+end
+
+-- Labels combinations are unlimited, don't let the cache grow forever
+local CANDIDATES_CACHE_MAX_SIZE = 1024
+
 local function call_local(role_name, fn_name, args)
     checks('string', 'string', '?table')
     local role = service_registry.get(role_name)
@@ -59,6 +82,56 @@ local function member_is_healthy(uri, instance_uuid)
     return true
 end
 
+local function reset_candidates_cache()
+    vars.candidates_cache = {}
+    vars.candidates_cache_size = 0
+end
+
+local function membership_watcher()
+    while true do
+        vars.membership_notification:wait()
+        reset_candidates_cache()
+    end
+end
+
+local function candidates_key(role_name, opts)
+    local key = role_name
+        .. (opts.leader_only and '/leader' or '/any')
+        .. (opts.healthy_only and '/healthy' or '/all')
+
+    if opts.labels == nil then
+        return key
+    end
+
+    local labels = {}
+    for name, value in pairs(opts.labels) do
+        table.insert(labels, tostring(name) .. '=' .. tostring(value))
+    end
+    table.sort(labels)
+    return key .. '/' .. table.concat(labels, ',')
+end
+
+local function list_candidates(topology_cfg, active_leaders, role_name, opts)
+    local servers = assert(topology_cfg.servers)
+    local replicasets = assert(topology_cfg.replicasets)
+
+    local candidates = {}
+    for _, instance_uuid, server in fun.filter(topology.not_disabled, servers) do
+        local replicaset_uuid = server.replicaset_uuid
+        local replicaset = replicasets[replicaset_uuid]
+
+        if roles.get_enabled_roles(replicaset.roles)[role_name]
+        and (not opts.healthy_only or member_is_healthy(server.uri, instance_uuid))
+        and (not opts.leader_only or active_leaders[replicaset_uuid] == instance_uuid)
+        and (not opts.labels or label_utils.labels_match(opts.labels, server.labels))
+        then
+            table.insert(candidates, server.uri)
+        end
+    end
+
+    return candidates
+end
+
 --- List candidates suitable for performing a remote call.
 -- Candidates are deduced from a local config and membership, which may
 -- differ from replica to replica (e.g. during `patch_clusterwide`). It
@@ -99,28 +172,43 @@ local function get_candidates(role_name, opts)
         return {}
     end
 
-    local servers = assert(topology_cfg.servers)
-    local replicasets = assert(topology_cfg.replicasets)
-    local active_leaders
-    if opts.leader_only then
-        active_leaders = failover.get_active_leaders()
+    -- The fiber is killed by hot reload, restart it. Membership events
+    -- could be missed meanwhile, so the cache is dropped too.
+    if vars.membership_watcher == nil
+    or vars.membership_watcher:status() == 'dead'
+    then
+        reset_candidates_cache()
+        vars.membership_watcher = fiber.new(membership_watcher)
+        vars.membership_watcher:name('cartridge.rpc-candidates')
     end
 
-    local candidates = {}
-    for _, instance_uuid, server in fun.filter(topology.not_disabled, servers) do
-        local replicaset_uuid = server.replicaset_uuid
-        local replicaset = replicasets[replicaset_uuid]
+    local active_leaders = failover.get_active_leaders()
+    local sources = vars.candidates_sources
+    if sources.topology_cfg ~= topology_cfg
+    or sources.active_leaders ~= active_leaders
+    or sources.roles ~= roles_vars.roles_by_number
+    then
+        reset_candidates_cache()
+        vars.candidates_sources = {
+            topology_cfg = topology_cfg,
+            active_leaders = active_leaders,
+            roles = roles_vars.roles_by_number,
+        }
+    end
 
-        if roles.get_enabled_roles(replicaset.roles)[role_name]
-        and (not opts.healthy_only or member_is_healthy(server.uri, instance_uuid))
-        and (not opts.leader_only or active_leaders[replicaset_uuid] == instance_uuid)
-        and (not opts.labels or label_utils.labels_match(opts.labels, server.labels))
-        then
-            table.insert(candidates, server.uri)
+    local key = candidates_key(role_name, opts)
+    local candidates = vars.candidates_cache[key]
+    if candidates == nil then
+        candidates = list_candidates(topology_cfg, active_leaders, role_name, opts)
+        if vars.candidates_cache_size >= CANDIDATES_CACHE_MAX_SIZE then
+            reset_candidates_cache()
         end
+        vars.candidates_cache[key] = candidates
+        vars.candidates_cache_size = vars.candidates_cache_size + 1
     end
 
-    return candidates
+    -- Callers are free to modify the result
+    return table.copy(candidates)
 end
 
 --- Connect to an instance with an enabled role.
@@ -30,8 +30,10 @@
 -- @module cartridge.tar
 -- @local
 
+local ffi = require('ffi')
 local errors = require('errors')
 local checks = require('checks')
+local buffer = require('buffer')
 
 local PackTarError = errors.new_class('PackTarError')
 local UnpackTarError = errors.new_class('UnpackTarError')
@@ -57,80 +59,58 @@ local HEADER_CONF = {
 }
 local BLOCKSIZE = 512
 
-local function checksum(header)
-    checks('string')
-    -- The chksum field represents the simple sum of all bytes in the
-    -- header block. Each 8-bit byte in the header is added to an
-    -- unsigned integer, initialized to zero, the precision of which
-    -- shall be no less than seventeen bits.
+-- Fields which are the same in every header written by `pack`,
+-- the rest of them are left zeroed.
+local HEADER_CONST = {
+    {HEADER_CONF.MODE,      '644'},
+    {HEADER_CONF.TYPEFLAG,  '0'},
+    {HEADER_CONF.MAGIC,     'ustar'},
+    {HEADER_CONF.VERSION,   '00'},
+}
 
-    local checksum = 256 -- I have no idea why, but tar works this way
-    for i = 1, BLOCKSIZE do
-        if i <= HEADER_CONF.CHKSUM.OFFSET
-        or i > HEADER_CONF.CHKSUM.OFFSET + HEADER_CONF.CHKSUM.SIZE
-        then
-            -- When calculating the checksum, the chksum field is
-            -- treated as if it were all blanks.
-            checksum = checksum + (header:byte(i) or 0)
-        end
+local function sum_bytes(str)
+    local sum = 0
+    for i = 1, #str do
+        sum = sum + str:byte(i)
     end
+    return sum
+end
 
-    return checksum
+-- The chksum field is treated as if it were all blanks
+-- when calculating the checksum. I have no idea why,
+-- but tar works this way: 8 blanks add up to 256.
+local CHECKSUM_BASE = 256
+for _, field in ipairs(HEADER_CONST) do
+    CHECKSUM_BASE = CHECKSUM_BASE + sum_bytes(field[2])
 end
 
-local function get_header(file)
-    local header = {
-        name =      file.name,
-        mode =      '644',
-        uid =       '\0',
-        gid =       '\0',
-        size =      string.format('%o', #file.content),
-        mtime =     '\0',
-        chksum =    nil,
-        typeflag =  '0',
-        linkname =  '\0',
-        magic =     'ustar',
-        version =   '00',
-        uname =     '\0',
-        gname =     '\0',
-        devmajor =  '\0',
-        devminor =  '\0',
-        prefix =    '\0',
-        _ =         '\0',
-    }
-    local checksum = 256
-    for _, v in pairs(header) do
-        for i = 1, #v do
-            checksum = checksum + v:byte(i)
-        end
-    end
-    header.chksum = string.format('%o', checksum)
+local function blocked(size)
+    return math.ceil(size / BLOCKSIZE) * BLOCKSIZE
+end
 
-    local ret = {}
+local function write_field(ptr, conf, value)
+    ffi.copy(ptr + conf.OFFSET, value, math.min(#value, conf.SIZE))
+end
+
+local function write_header(ptr, name, content_size)
+    ffi.fill(ptr, BLOCKSIZE, 0)
 
-    table.insert(ret, string.ljust(header.name,     HEADER_CONF.NAME.SIZE,     '\0'))
-    table.insert(ret, string.ljust(header.mode,     HEADER_CONF.MODE.SIZE,     '\0'))
-    table.insert(ret, string.ljust(header.uid,      HEADER_CONF.UID.SIZE,      '\0'))
-    table.insert(ret, string.ljust(header.gid,      HEADER_CONF.GID.SIZE,      '\0'))
-    table.insert(ret, string.ljust(header.size,     HEADER_CONF.SIZE.SIZE,     '\0'))
-    table.insert(ret, string.ljust(header.mtime,    HEADER_CONF.MTIME.SIZE,    '\0'))
-    table.insert(ret, string.ljust(header.chksum,   HEADER_CONF.CHKSUM.SIZE,   '\0'))
-    table.insert(ret, string.ljust(header.typeflag, HEADER_CONF.TYPEFLAG.SIZE, '\0'))
-    table.insert(ret, string.ljust(header.linkname, HEADER_CONF.LINKNAME.SIZE, '\0'))
-    table.insert(ret, string.ljust(header.magic,    HEADER_CONF.MAGIC.SIZE,    '\0'))
-    table.insert(ret, string.ljust(header.version,  HEADER_CONF.VERSION.SIZE,  '\0'))
-    table.insert(ret, string.ljust(header.uname,    HEADER_CONF.UNAME.SIZE,    '\0'))
-    table.insert(ret, string.ljust(header.gname,    HEADER_CONF.GNAME.SIZE,    '\0'))
-    table.insert(ret, string.ljust(header.devmajor, HEADER_CONF.DEVMAJOR.SIZE, '\0'))
-    table.insert(ret, string.ljust(header.devminor, HEADER_CONF.DEVMINOR.SIZE, '\0'))
-    table.insert(ret, string.ljust(header.prefix,   HEADER_CONF.PREFIX.SIZE,   '\0'))
-    table.insert(ret, string.ljust(header._,        HEADER_CONF._.SIZE,        '\0'))
-
-    return table.concat(ret)
+    local size = string.format('%o', content_size)
+    for _, field in ipairs(HEADER_CONST) do
+        write_field(ptr, field[1], field[2])
+    end
+    write_field(ptr, HEADER_CONF.NAME, name)
+    write_field(ptr, HEADER_CONF.SIZE, size)
+
+    local checksum = CHECKSUM_BASE + sum_bytes(name) + sum_bytes(size)
+    write_field(ptr, HEADER_CONF.CHKSUM, string.format('%o', checksum))
 end
 
 --- Create TAR archive.
 --
+-- The archive is assembled in a single buffer allocated outside of
+-- the Lua heap, its size is known in advance.
+--
 -- @function pack
 -- @tparam {string=string} files
 -- @treturn string The archive
@@ -139,7 +119,7 @@ end
 local function pack(config)
     checks('table')
 
-    local ret = {}
+    local size = 2 * BLOCKSIZE
     for filename, content in pairs(config) do
         if type(filename) ~= 'string' then
             local err = "bad argument #1 to pack" ..
@@ -158,59 +138,85 @@ local function pack(config)
             )
         end
 
-        table.insert(ret, get_header({
-            name = filename,
-            content = content,
-        }))
-        table.insert(ret, string.ljust(
-            content,
-            math.ceil(#content / BLOCKSIZE) * BLOCKSIZE,
-            '\0'
-        ))
+        size = size + BLOCKSIZE + blocked(#content)
+    end
+
+    local buf = buffer.ibuf()
+    local ptr = buf:alloc(size)
+
+    -- The table isn't modified, so the order is the same
+    local offset = 0
+    for filename, content in pairs(config) do
+        write_header(ptr + offset, filename, #content)
+        offset = offset + BLOCKSIZE
+
+        ffi.copy(ptr + offset, content, #content)
+        ffi.fill(ptr + offset + #content, blocked(#content) - #content, 0)
+        offset = offset + blocked(#content)
     end
-    table.insert(ret, string.rep('\0', 2 * BLOCKSIZE))
+    ffi.fill(ptr + offset, 2 * BLOCKSIZE, 0)
 
-    return table.concat(ret)
+    local tar = ffi.string(ptr, size)
+    buf:recycle()
+    return tar
 end
 
-local function read_header_block(header, conf)
-    local block = string.sub(header,
-        conf.OFFSET + 1,
-        conf.OFFSET + conf.SIZE
-    )
-    return string.gsub(block, '%z+$', '')
+local function read_header_block(ptr, conf)
+    -- Trailing zeroes are stripped
+    local len = conf.SIZE
+    while len > 0 and ptr[conf.OFFSET + len - 1] == 0 do
+        len = len - 1
+    end
+    return ffi.string(ptr + conf.OFFSET, len)
 end
 
-local function header_format_validation(header)
-    if #header ~= BLOCKSIZE then
-        return nil, UnpackTarError:new('Truncated file')
+local function checksum(ptr)
+    -- The chksum field represents the simple sum of all bytes in the
+    -- header block. Each 8-bit byte in the header is added to an
+    -- unsigned integer, initialized to zero, the precision of which
+    -- shall be no less than seventeen bits.
+
+    local checksum = 256 -- the chksum field itself, see CHECKSUM_BASE
+    for i = 0, BLOCKSIZE - 1 do
+        if i < HEADER_CONF.CHKSUM.OFFSET
+        or i >= HEADER_CONF.CHKSUM.OFFSET + HEADER_CONF.CHKSUM.SIZE
+        then
+            checksum = checksum + ptr[i]
+        end
     end
 
-    local magic = read_header_block(header, HEADER_CONF.MAGIC)
+    return checksum
+end
+
+local function header_format_validation(ptr)
+    local magic = read_header_block(ptr, HEADER_CONF.MAGIC)
     -- Version should be 'ustar\0' or 'ustar '
     if magic ~= 'ustar' and magic ~= 'ustar ' then
         return nil, UnpackTarError:new('Bad format (invalid magic)')
     end
 
-    local version = read_header_block(header, HEADER_CONF.VERSION)
+    local version = read_header_block(ptr, HEADER_CONF.VERSION)
     -- Version should be '00' or ' \0'
     if version ~= '00' and version ~= ' ' then
         return nil, UnpackTarError:new('Bad format (invalid version)')
     end
 
-    local chksum = read_header_block(header, HEADER_CONF.CHKSUM)
-    if tonumber(chksum, 8) ~= checksum(header) then
+    local chksum = read_header_block(ptr, HEADER_CONF.CHKSUM)
+    if tonumber(chksum, 8) ~= checksum(ptr) then
         return nil, UnpackTarError:new('Checksum mismatch')
     end
 
     return true, nil
 end
 
-local function read_header(tar, offset)
-    local block = string.sub(tar, offset + 1, offset + BLOCKSIZE)
-    if string.startswith(block, '\0') then
+local function read_header(ptr, len, offset)
+    local block = ptr + offset
+    if block[0] == 0 then
         return {}
     end
+    if len < offset + BLOCKSIZE then
+        return nil, UnpackTarError:new('Truncated file')
+    end
     local ok, err = header_format_validation(block)
     if not ok then
         return nil, err
@@ -227,6 +233,7 @@ end
 --- Parse TAR archive.
 --
 -- Only regular files are extracted, directories are ommitted.
+-- Headers are parsed in place, without slicing the archive.
 --
 -- @function unpack
 -- @tparam string tar
@@ -239,10 +246,12 @@ local function unpack(tar)
         return nil, UnpackTarError:new('Truncated file')
     end
 
+    -- The pointer is valid as long as `tar` string is referenced
+    local ptr = ffi.cast('const uint8_t *', tar)
     local ret = {}
     local offset = 0
     while offset < #tar do
-        local header, err = read_header(tar, offset)
+        local header, err = read_header(ptr, #tar, offset)
         if header == nil then
             return nil, err
         end
@@ -254,16 +263,13 @@ local function unpack(tar)
         offset = offset + BLOCKSIZE
 
         local content_size = tonumber(header.size, 8)
-        local blocked_size = math.ceil(content_size / BLOCKSIZE) * BLOCKSIZE
+        local blocked_size = blocked(content_size)
         if #tar < offset + blocked_size then
             return nil, UnpackTarError:new('Truncated file')
         end
 
         if header.type == '0' or header.type == '' then
-            ret[header.name] = string.sub(tar,
-                offset + 1,
-                offset + content_size
-            )
+            ret[header.name] = ffi.string(ptr + offset, content_size)
         end
 
         offset = offset + blocked_size
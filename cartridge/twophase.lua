@@ -18,6 +18,7 @@ local pool = require('cartridge.pool')
 local utils = require('cartridge.utils')
 local upload = require('cartridge.upload')
 local topology = require('cartridge.topology')
+local internal_metrics = require('cartridge.internal-metrics')
 local confapplier = require('cartridge.confapplier')
 local service_registry = require('cartridge.service-registry')
 local ClusterwideConfig = require('cartridge.clusterwide-config')
@@ -29,6 +30,17 @@ local Commit2pcError = errors.new_class('Commit2pcError')
 local ForceReapplyError = errors.new_class('ForceReapplyError')
 local GetSchemaError = errors.new_class('GetSchemaError')
 
+local twophase_seconds = internal_metrics.histogram(
+    'cartridge_twophase_seconds',
+    'Duration of two-phase commit stages on the coordinator',
+    {'activity', 'phase'}
+)
+local twophase_errors_total = internal_metrics.counter(
+    'cartridge_twophase_errors_total',
+    'Two-phase commit stages failed on the coordinator',
+    {'activity', 'phase'}
+)
+
 yaml.cfg({
     encode_load_metatables = false,
     decode_save_metatables = false,
@@ -42,6 +54,7 @@ vars:new('on_patch_triggers', {})
 vars:new('options', {
     netbox_call_timeout = 1,
     upload_config_timeout = 30,
+    upload_chunk_size = 1024 * 1024,
     validate_config_timeout = 10,
     apply_config_timeout = 10,
 })
@@ -71,6 +84,15 @@ local function get_upload_config_timeout()
     return vars.options.upload_config_timeout
 end
 
+local function set_upload_chunk_size(size)
+    checks('number')
+    vars.options.upload_chunk_size = size
+end
+
+local function get_upload_chunk_size()
+    return vars.options.upload_chunk_size
+end
+
 local function set_validate_config_timeout(timeout)
     checks('number')
     vars.options.validate_config_timeout = timeout
@@ -451,12 +473,16 @@ local function twophase_commit(opts)
         if opts.upload_data then
             log.warn('(2PC) %s upload phase...', activity_name)
 
+            local start = internal_metrics.clock()
             upload_id, err = upload.upload(opts.upload_data, {
                 uri_list = opts.uri_list,
                 netbox_call_timeout = vars.options.netbox_call_timeout,
                 transmission_timeout = vars.options.upload_config_timeout,
+                chunk_size = vars.options.upload_chunk_size,
             })
+            twophase_seconds:observe_since(start, activity_name, 'upload')
             if not upload_id then
+                twophase_errors_total:inc(1, activity_name, 'upload')
                 _2pc_error = err
                 goto finish
             end
@@ -464,10 +490,12 @@ local function twophase_commit(opts)
 
         log.warn('(2PC) %s prepare phase...', activity_name)
 
+        local start = internal_metrics.clock()
         local retmap, errmap = pool.map_call(opts.fn_prepare, {upload_id}, {
             uri_list = opts.uri_list,
             timeout = vars.options.validate_config_timeout,
         })
+        twophase_seconds:observe_since(start, activity_name, 'prepare')
 
         for _, uri in ipairs(opts.uri_list) do
             if retmap[uri] then
@@ -487,6 +515,7 @@ local function twophase_commit(opts)
         end
 
         if _2pc_error ~= nil then
+            twophase_errors_total:inc(1, activity_name, 'prepare')
             goto abort
         else
             goto apply
@@ -497,10 +526,12 @@ local function twophase_commit(opts)
     do
         log.warn('(2PC) %s commit phase...', activity_name)
 
+        local start = internal_metrics.clock()
         local retmap, errmap = pool.map_call(opts.fn_commit, nil, {
             uri_list = opts.uri_list,
             timeout = vars.options.apply_config_timeout,
         })
+        twophase_seconds:observe_since(start, activity_name, 'commit')
 
         for _, uri in ipairs(opts.uri_list) do
             if retmap[uri] then
@@ -514,6 +545,9 @@ local function twophase_commit(opts)
                 _2pc_error = err
             end
         end
+        if _2pc_error ~= nil then
+            twophase_errors_total:inc(1, activity_name, 'commit')
+        end
 
         goto finish
     end
@@ -522,10 +556,12 @@ local function twophase_commit(opts)
     do
         log.warn('(2PC) %s abort phase...', activity_name)
 
+        local start = internal_metrics.clock()
         local retmap, errmap = pool.map_call(opts.fn_abort, nil,{
             uri_list = abortion_list,
             timeout = vars.options.netbox_call_timeout,
         })
+        twophase_seconds:observe_since(start, activity_name, 'abort')
 
         for _, uri in ipairs(abortion_list) do
             if retmap[uri] then
@@ -892,6 +928,8 @@ return {
     get_netbox_call_timeout = get_netbox_call_timeout,
     set_upload_config_timeout = set_upload_config_timeout,
     get_upload_config_timeout = get_upload_config_timeout,
+    set_upload_chunk_size = set_upload_chunk_size,
+    get_upload_chunk_size = get_upload_chunk_size,
     set_validate_config_timeout = set_validate_config_timeout,
     get_validate_config_timeout = get_validate_config_timeout,
     set_apply_config_timeout = set_apply_config_timeout,
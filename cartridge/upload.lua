@@ -31,6 +31,14 @@ vars:new('inbox', {})
 -- before previous stages finish.
 vars:new('upload_fibers', {})
 
+-- Chunks written by `upload_transmit_chunk`, they let an interrupted
+-- streaming upload resume instead of starting over.
+-- `{[upload_id] = {[offset] = size}}`
+vars:new('chunks', {})
+-- Unlike other stages, chunks of the same upload are written
+-- concurrently. `{[upload_id] = {[fiber_id] = fiber}}`
+vars:new('chunk_fibers', {})
+
 -- Temporary directory used for saving files during upload.
 vars:new('upload_prefix', '/tmp')
 
@@ -110,6 +118,64 @@ local function upload_transmit(upload_id, payload)
     return true
 end
 
+-- Streaming counterpart of `upload_transmit()`. Large payloads are sent
+-- in chunks, each one is written at its offset, so they may arrive in
+-- any order and be retransmitted.
+local function upload_transmit_chunk(upload_id, offset, chunk)
+    checks('string', 'number', 'string')
+
+    local fibers = vars.chunk_fibers[upload_id]
+    if fibers == nil then
+        fibers = {}
+        vars.chunk_fibers[upload_id] = fibers
+    end
+    local self = fiber.self()
+    fibers[self:id()] = self
+
+    local upload_path = get_upload_path(upload_id)
+    local payload_path = fio.pathjoin(upload_path, 'payload')
+
+    local err
+    local file = fio.open(payload_path, {'O_CREAT', 'O_WRONLY'}, tonumber(644, 8))
+    if file == nil then
+        err = UploadError:new('%s: %s', payload_path, errno.strerror())
+    else
+        if not file:pwrite(chunk, offset) then
+            err = UploadError:new('%s: %s', payload_path, errno.strerror())
+        end
+        file:close()
+    end
+
+    -- If the fiber is cancelled, the `chunk_fibers` is cleaned up
+    -- during the `upload_cleanup` stage (which in fact cancelled it).
+    fiber.testcancel()
+    fibers[self:id()] = nil
+
+    if err ~= nil then
+        return nil, err
+    end
+
+    local chunks = vars.chunks[upload_id]
+    if chunks == nil then
+        chunks = {}
+        vars.chunks[upload_id] = chunks
+    end
+    chunks[offset] = #chunk
+    return true
+end
+
+-- Offsets of the chunks already written, the uploader only resends
+-- the missing ones.
+local function upload_chunks(upload_id)
+    checks('string')
+    local offsets = {}
+    for offset, _ in pairs(vars.chunks[upload_id] or {}) do
+        table.insert(offsets, offset)
+    end
+    table.sort(offsets)
+    return offsets
+end
+
 -- The uploaded data is read from the shared resource on every instance,
 -- not only on the transmitter.
 local function upload_finish(upload_id)
@@ -143,6 +209,11 @@ local function upload_cleanup(upload_id)
         pcall(fiber.cancel, vars.upload_fibers[upload_id])
         vars.upload_fibers[upload_id] = nil
     end
+    for _, f in pairs(vars.chunk_fibers[upload_id] or {}) do
+        pcall(fiber.cancel, f)
+    end
+    vars.chunk_fibers[upload_id] = nil
+    vars.chunks[upload_id] = nil
 
     local upload_path = get_upload_path(upload_id)
     local random_path = utils.randomize_path(upload_path)
@@ -173,6 +244,155 @@ local function upload_cleanup(upload_id)
     return true
 end
 
+-- Send chunks of the payload keeping at most `window` requests in
+-- flight, so that the memory used for the peer is bounded by
+-- `window * chunk_size` whatever the payload size is.
+local function send_chunks(conn, upload_id, payload, offsets, opts, deadline)
+    local inflight = {}
+    local err
+
+    local function wait_oldest()
+        local future = table.remove(inflight, 1)
+        local timeout = math.max(deadline - fiber.clock(), 0)
+        local ret, _err = errors.netbox_wait_async(future, timeout)
+        future:discard()
+        if ret == nil and err == nil then
+            err = _err or UploadError:new('Unknown error')
+        end
+    end
+
+    for _, offset in ipairs(offsets) do
+        if #inflight >= opts.window then
+            wait_oldest()
+        end
+        if err ~= nil then
+            break
+        end
+
+        local chunk = payload:sub(offset + 1, offset + opts.chunk_size)
+        local future, _err = errors.netbox_call(conn,
+            '_G.__cartridge_upload_transmit_chunk', {upload_id, offset, chunk},
+            {is_async = true}
+        )
+        if future == nil then
+            err = _err
+            break
+        end
+        table.insert(inflight, future)
+    end
+
+    while #inflight > 0 do
+        wait_oldest()
+    end
+
+    if err ~= nil then
+        return nil, err
+    end
+    return true
+end
+
+-- Stream the payload to a single transmitter. After a failure the peer
+-- is asked which chunks it has already written (they're tracked by
+-- `upload_id`), and only the rest is sent again.
+local function transmit_chunks(uri, upload_id, payload, opts, deadline)
+    local conn, err = pool.connect(uri, {
+        wait_connected = math.max(deadline - fiber.clock(), 0),
+    })
+    if conn == nil then
+        return nil, err
+    end
+
+    -- Peers running an older version can't receive chunks,
+    -- they get the whole payload in a single call
+    local streaming
+    streaming, err = errors.netbox_eval(conn,
+        "return rawget(_G, '__cartridge_upload_transmit_chunk') ~= nil",
+        {}, {timeout = math.max(deadline - fiber.clock(), 0)}
+    )
+    if streaming == nil then
+        return nil, err
+    elseif not streaming then
+        return errors.netbox_call(conn,
+            '_G.__cartridge_upload_transmit', {upload_id, payload},
+            {timeout = math.max(deadline - fiber.clock(), 0)}
+        )
+    end
+
+    local offsets = {}
+    for offset = 0, #payload - 1, opts.chunk_size do
+        table.insert(offsets, offset)
+    end
+
+    for attempt = 1, opts.attempts do
+        local ok, _err = send_chunks(conn, upload_id, payload, offsets, opts, deadline)
+        if ok then
+            return true
+        end
+        err = _err
+
+        if attempt == opts.attempts or fiber.clock() >= deadline then
+            break
+        end
+
+        log.warn('Resuming upload to %s: %s', uri, err)
+        local received, _err = errors.netbox_call(conn,
+            '_G.__cartridge_upload_chunks', {upload_id},
+            {timeout = math.max(deadline - fiber.clock(), 0)}
+        )
+        if received == nil then
+            return nil, _err
+        end
+
+        local written = {}
+        for _, offset in ipairs(received) do
+            written[offset] = true
+        end
+        local missing = {}
+        for _, offset in ipairs(offsets) do
+            if not written[offset] then
+                table.insert(missing, offset)
+            end
+        end
+        offsets = missing
+    end
+
+    return nil, err
+end
+
+-- Same as `pool.map_call('_G.__cartridge_upload_transmit')`, but
+-- payloads are streamed to every transmitter in its own fiber, and a
+-- slow peer doesn't hold the others' buffers.
+local function transmit_stream(uri_list, upload_id, payload, opts)
+    local deadline = fiber.clock() + (opts.transmission_timeout or 10)
+    local retmap, errmap = {}, {}
+    local fibers = {}
+
+    for _, uri in ipairs(uri_list) do
+        local f = fiber.new(function()
+            local ok, err = UploadError:pcall(transmit_chunks,
+                uri, upload_id, payload, opts, deadline
+            )
+            retmap[uri] = ok
+            errmap[uri] = err
+        end)
+        f:name('upload_transmit')
+        f:set_joinable(true)
+        fibers[uri] = f
+    end
+
+    for uri, f in pairs(fibers) do
+        local ok, err = f:join()
+        if not ok then
+            errmap[uri] = UploadError:new(err)
+        end
+    end
+
+    if next(errmap) == nil then
+        return retmap
+    end
+    return retmap, errmap
+end
+
 --- Spread the data across the cluster.
 --
 -- For each separate upload, a random `upload_id` is generated. All the
@@ -188,8 +408,17 @@ end
 --
 -- @param data
 --   any Lua object.
--- @tparam {string,...} uri_list
+-- @tparam table opts
+-- @tparam {string,...} opts.uri_list
 --   array of URIs.
+-- @tparam ?number opts.netbox_call_timeout
+-- @tparam ?number opts.transmission_timeout
+-- @tparam ?number opts.chunk_size
+--   Payloads larger than that are streamed to transmitters in chunks
+--   (default: `nil`, the payload is sent in a single call).
+-- @tparam ?number opts.window
+--   Number of chunks sent to a transmitter without waiting for
+--   acknowledgements (default: 4).
 --
 -- @treturn[1] string `upload_id` (if at least one upload succeded)
 -- @treturn[2] nil
@@ -199,6 +428,8 @@ local function upload(data, opts)
         uri_list = 'table',
         netbox_call_timeout = '?number',
         transmission_timeout = '?number',
+        chunk_size = '?number',
+        window = '?number',
     })
     local ok, payload = pcall(msgpack.encode, data)
     if not ok then
@@ -239,13 +470,24 @@ local function upload(data, opts)
     end
 
     do -- transmit
-        local retmap, errmap = pool.map_call(
-            '_G.__cartridge_upload_transmit', {upload_id, payload},
-            {
-                uri_list = transmitters_list,
-                timeout = opts.transmission_timeout,
-            }
-        )
+        local retmap, errmap
+        if opts.chunk_size ~= nil and opts.chunk_size > 0
+        and #payload > opts.chunk_size then
+            retmap, errmap = transmit_stream(transmitters_list, upload_id, payload, {
+                transmission_timeout = opts.transmission_timeout,
+                chunk_size = opts.chunk_size,
+                window = opts.window or 4,
+                attempts = 3,
+            })
+        else
+            retmap, errmap = pool.map_call(
+                '_G.__cartridge_upload_transmit', {upload_id, payload},
+                {
+                    uri_list = transmitters_list,
+                    timeout = opts.transmission_timeout,
+                }
+            )
+        end
 
         for _, uri in ipairs(transmitters_list) do
             if retmap == nil or retmap[uri] == nil then
@@ -311,6 +553,10 @@ end
 
 _G.__cartridge_upload_begin = function(...) return errors.pcall('E', upload_begin, ...) end
 _G.__cartridge_upload_transmit = function(...) return errors.pcall('E', upload_transmit, ...) end
+_G.__cartridge_upload_transmit_chunk = function(...)
+    return errors.pcall('E', upload_transmit_chunk, ...)
+end
+_G.__cartridge_upload_chunks = function(...) return errors.pcall('E', upload_chunks, ...) end
 _G.__cartridge_upload_finish = function(...) return errors.pcall('E', upload_finish, ...) end
 _G.__cartridge_upload_cleanup = function(...) return errors.pcall('E', upload_cleanup, ...) end
 
@@ -88,6 +88,30 @@ local gql_type_state_provider_status = gql_types.object({
     }
 })
 
+local gql_type_timeline_event = gql_types.object({
+    name = 'FailoverEvent',
+    description = 'Failover event recorded on the instance',
+    fields = {
+        step = {
+            kind = gql_types.int.nonNull,
+            description = 'Leadership change the event belongs to',
+        },
+        event = {
+            kind = gql_types.string.nonNull,
+            description = 'One of "detection", "decision",' ..
+                ' "appointment", "box_cfg" or "apply".',
+        },
+        time = {
+            kind = gql_types.float.nonNull,
+            description = 'Wall clock time (in seconds)',
+        },
+        mode = gql_types.string,
+        leader_uuid = gql_types.string,
+        read_only = gql_types.boolean,
+        error = gql_types.string,
+    }
+})
+
 local function get_failover_params(_, _)
     local failover_params = lua_api_failover.get_params()
     local masked_pwd = '******'
@@ -131,6 +155,10 @@ local function promote(_, args)
     return lua_api_failover.promote({[replicaset_uuid] = instance_uuid}, opts)
 end
 
+local function get_timeline(_, _)
+    return lua_api_failover.get_timeline()
+end
+
 local function get_state_provider_status(_, _)
     local result = {}
     for uri, status in pairs(lua_api_failover.get_state_provider_status()) do
@@ -182,6 +210,15 @@ local function init(graphql)
         callback = module_name .. '.get_state_provider_status',
     })
 
+    graphql.add_callback({
+        prefix = 'cluster',
+        name = 'failover_timeline',
+        doc = 'Get failover events recorded on the instance.',
+        args = {},
+        kind = gql_types.list(gql_type_timeline_event.nonNull).nonNull,
+        callback = module_name .. '.get_timeline',
+    })
+
     graphql.add_mutation({
         prefix = 'cluster',
         name = 'failover_params',
@@ -242,6 +279,7 @@ return {
     get_failover_params = get_failover_params,
     set_failover_params = set_failover_params,
     get_state_provider_status = get_state_provider_status,
+    get_timeline = get_timeline,
     promote = promote,
     pause = pause,
     resume = resume,
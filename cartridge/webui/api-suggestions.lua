@@ -93,7 +93,7 @@ local function force_apply(_, _, info)
 
     local cache = info.context.request_cache
     if cache.issues == nil then
-        cache.issues, cache.issues_err = issues.list_on_cluster()
+        cache.issues, cache.issues_err = issues.list_on_cluster_cached()
     end
 
     local reasons_map = {}
@@ -152,7 +152,7 @@ local function disable_servers(_, _, info)
 
     local cache = info.context.request_cache
     if cache.issues == nil then
-        cache.issues, cache.issues_err = issues.list_on_cluster()
+        cache.issues, cache.issues_err = issues.list_on_cluster_cached()
     end
 
     if cache.issues_err == nil then
@@ -184,7 +184,7 @@ local function restart_replication(_, _, info)
 
     local cache = info.context.request_cache
     if cache.issues == nil then
-        cache.issues, cache.issues_err = issues.list_on_cluster()
+        cache.issues, cache.issues_err = issues.list_on_cluster_cached()
     end
     if cache.refined_uri == nil then
         cache.refined_uri = topology.refine_servers_uri(topology_cfg)
@@ -0,0 +1,201 @@
+import os
+import json
+import glob
+import hashlib
+import tempfile
+
+import pygments
+from pygments.filter import apply_filters
+from pygments.token import string_to_tokentype
+
+__all__ = ['TokenCache', 'configure', 'get_tokens']
+
+# Default size of the cache directory, 0 disables caching
+DEFAULT_SIZE = 64 * 1024 * 1024
+# Eviction removes least recently used entries down to this fraction
+EVICT_TO = 0.8
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_stamp = None
+
+
+def stamp():
+    """
+    Hash of the lexers source code and pygments version. It's a part of
+    every key, so that editing a lexer invalidates what it produced.
+    """
+    global _stamp
+    if _stamp is None:
+        h = hashlib.sha256(pygments.__version__.encode())
+        for path in sorted(glob.glob(os.path.join(_here, '*.py'))):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        _stamp = h.hexdigest()
+    return _stamp
+
+
+_tokentypes = {}
+
+
+def _tokentype(name):
+    token = _tokentypes.get(name)
+    if token is None:
+        token = _tokentypes.setdefault(name, string_to_tokentype(name))
+    return token
+
+
+class TokenCache(object):
+    """
+    Content-addressed on-disk cache of token streams.
+
+    Every entry is a JSON file named after the hash of the lexer name,
+    options and the code itself. Hits bump the file mtime, and once the
+    directory grows over `max_bytes` the least recently used entries are
+    evicted. Files are replaced atomically, so concurrent Sphinx
+    processes may share the directory.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, lexer, text):
+        h = hashlib.sha256()
+        h.update(stamp().encode())
+        h.update(repr((
+            lexer.name,
+            sorted((k, repr(v)) for k, v in lexer.options.items()),
+        )).encode())
+        h.update(text.encode('utf-8', errors='surrogatepass'))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tokens = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return [(_tokentype(token), value) for token, value in tokens]
+
+    def store(self, key, tokens):
+        data = json.dumps(
+            [(str(token), value) for token, value in tokens],
+            ensure_ascii=False, separators=(',', ':'),
+        ).encode('utf-8')
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+        except OSError:
+            return
+
+        if self.size is None:
+            self.size = sum(size for _, _, size in self._entries())
+        else:
+            self.size += len(data)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            entries.append((st.st_mtime, entry.path, st.st_size))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        size = sum(size for _, _, size in entries)
+        for _, path, entry_size in entries:
+            if size <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self.size = size
+
+    def get_tokens(self, lexer, text, tokenize):
+        """Unfiltered tokens of the text, `tokenize` is called on miss"""
+        key = self.key(lexer, text)
+        tokens = self.load(key)
+        if tokens is not None:
+            self.hits += 1
+            return tokens
+
+        self.misses += 1
+        tokens = list(tokenize(text, True))
+        self.store(key, tokens)
+        return tokens
+
+
+_cache = None
+
+
+def configure(directory, max_bytes=DEFAULT_SIZE):
+    """Enable the cache in the directory, or disable it with None"""
+    global _cache
+    if directory is None or max_bytes <= 0:
+        _cache = None
+    else:
+        _cache = TokenCache(directory, max_bytes)
+    return _cache
+
+
+def get_tokens(lexer, text, unfiltered, tokenize):
+    """
+    Return `tokenize(text, unfiltered)`, the `get_tokens` of the lexer
+    superclass, taking it from the cache when possible. The cache keeps
+    unfiltered streams, filters (e.g. `raiseonerror` added by Sphinx)
+    are applied on every call.
+    """
+    if _cache is None:
+        return tokenize(text, unfiltered)
+    stream = _cache.get_tokens(lexer, text, tokenize)
+    if not unfiltered:
+        stream = apply_filters(stream, lexer.filters, lexer)
+    return stream
+
+
+def builder_inited(app):
+    directory = app.config.lexer_cache_dir
+    if directory is None:
+        directory = os.path.join(app.doctreedir, 'lexer-cache')
+    configure(directory, app.config.lexer_cache_size)
+
+
+def build_finished(app, exception):
+    if _cache is not None:
+        from sphinx.util import logging
+        logging.getLogger(__name__).info(
+            'lexer cache: %d hits, %d misses', _cache.hits, _cache.misses)
+
+
+def setup(app):
+    app.add_config_value('lexer_cache_dir', None, '')
+    app.add_config_value('lexer_cache_size', DEFAULT_SIZE, '')
+    app.connect('builder-inited', builder_inited)
+    app.connect('build-finished', build_finished)
+    # every process opens the directory on its own,
+    # entries are replaced atomically
+    return {
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
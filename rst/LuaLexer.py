@@ -1,8 +1,13 @@
+import re
+import sphinx
+
 from pygments.lexer import RegexLexer, include, bygroups, combined
 from pygments.token import Text, Comment, Operator, Keyword, Name, String
-from pygments.token import Number, Punctuation
+from pygments.token import Number, Punctuation, Error, Whitespace
 from pygments.util import get_bool_opt, get_list_opt
 
+import LexerCache
+
 __all__ = ['LuaLexer']
 
 
@@ -18,15 +23,23 @@ class LuaLexer(RegexLexer):
     `disabled_modules`
         If given, must be a list of module names whose function names
         should not be highlighted. By default all modules are highlighted.
+    `compiled`
+        If given and ``False``, lex with the stock ``RegexLexer`` engine
+        instead of the single-regex scanner. Both produce the same token
+        stream, the scanner is just faster (default: ``True``).
 
         To get a list of allowed modules have a look into the
-        `_luabuiltins` module:
+        `_luabuiltins` module and the Tarantool `_tarantool_builtins`
+        next to this one:
 
         .. sourcecode:: pycon
 
             >>> from pygments.lexers._luabuiltins import MODULES
             >>> MODULES.keys()
             ['string', 'coroutine', 'modules', 'io', 'basic', ...]
+            >>> from _tarantool_builtins import MODULES
+            >>> MODULES.keys()
+            ['box', 'fiber', 'net.box', 'cartridge']
     """
 
     name = 'lua_tarantool'
@@ -104,16 +117,24 @@ class LuaLexer(RegexLexer):
         self.func_name_highlighting = get_bool_opt(
             options, 'func_name_highlighting', True)
         self.disabled_modules = get_list_opt(options, 'disabled_modules', [])
+        self.compiled = get_bool_opt(options, 'compiled', True)
 
-        self._functions = set()
         if self.func_name_highlighting:
-            from pygments.lexers._lua_builtins import MODULES
-            for mod, func in MODULES.items():
-                if mod not in self.disabled_modules:
-                    self._functions.update(func)
+            self._functions = builtins(self.disabled_modules)
+        else:
+            self._functions = frozenset()
         RegexLexer.__init__(self, **options)
 
+    def get_tokens(self, text, unfiltered=False):
+        return LexerCache.get_tokens(self, text, unfiltered,
+            super(LuaLexer, self).get_tokens)
+
     def get_tokens_unprocessed(self, text):
+        if self.compiled:
+            return _scan(text, self._functions)
+        return self._regex_tokens_unprocessed(text)
+
+    def _regex_tokens_unprocessed(self, text):
         for index, token, value in \
                 RegexLexer.get_tokens_unprocessed(self, text):
             if token is Name:
@@ -129,5 +150,210 @@ class LuaLexer(RegexLexer):
             yield index, token, value
 
 
+_builtins_cache = {}
+
+
+def builtins(disabled_modules=()):
+    """Lua and Tarantool builtin function names except the disabled
+    modules. Built once per set of disabled modules and shared"""
+    key = frozenset(disabled_modules)
+    functions = _builtins_cache.get(key)
+    if functions is None:
+        from pygments.lexers._lua_builtins import MODULES as LUA_MODULES
+        from _tarantool_builtins import MODULES as TARANTOOL_MODULES
+        functions = frozenset(
+            func
+            for modules in (LUA_MODULES, TARANTOOL_MODULES)
+            for mod, funcs in modules.items() if mod not in key
+            for func in funcs
+        )
+        _builtins_cache[key] = functions
+    return functions
+
+
+# The scanner below mirrors `LuaLexer.tokens`. Every state is compiled
+# into a single alternation: the regex engine tries alternatives in order
+# and takes the first one that matches, which is exactly what RegexLexer
+# does rule by rule, but without a Python round trip per failed rule.
+# Keep them in sync, the equivalence test compares both engines.
+
+def _alternation(rules):
+    return re.compile('|'.join(
+        '(?P<{}>{})'.format(name, regex) for name, regex in rules
+    ), re.MULTILINE).match
+
+
+_SHEBANG = re.compile(r'#!(.*?)$', re.MULTILINE).match
+
+_BASE = _alternation([
+    ('comment_multiline', r'--\[(?P<cm_eq>=*)\[(?s:.*?)\](?P=cm_eq)\]'),
+    ('comment_single', r'--.*$'),
+    ('float', r'(?i:(?:\d*\.\d+|\d+\.\d*)(?:e[+-]?\d+)?|\d+e[+-]?\d+)'),
+    ('hex', r'(?i:0x[0-9a-f]*)'),
+    ('integer', r'\d+'),
+    # RegexLexer emits a token per whitespace char, so does the scanner,
+    # but it matches the whole run at once
+    ('space', r'\n|[^\S\n]+'),
+    ('string_multiline', r'\[(?P<sm_eq>=*)\[(?s:.*?)\](?P=sm_eq)\]'),
+    ('operator', r'==|~=|<=|>=|\.\.\.|\.\.|[=+\-*/%^<>#]'),
+    ('punctuation', r'[\[\]\{\}\(\)\.,:;!]'),
+    ('operator_word', r'(?:and|or|not)\b'),
+    ('keyword', r'(?:break|do|else|elseif|end|for|if|in|repeat|return|then|'
+                r'until|while)\b'),
+    ('declaration', r'local\b'),
+    ('constant', r'(?:true|false|nil)\b'),
+    ('function', r'function\b'),
+    ('name', r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)?'),
+    ('sqs', r"'"),
+    ('dqs', r'"'),
+])
+
+_BASE_TOKENS = {
+    'comment_multiline': Comment.Multiline,
+    'comment_single': Comment.Single,
+    'float': Number.Float,
+    'hex': Number.Hex,
+    'integer': Number.Integer,
+    'space': Text,
+    'string_multiline': String,
+    'operator': Operator,
+    'punctuation': Punctuation,
+    'operator_word': Operator.Word,
+    'keyword': Keyword,
+    'declaration': Keyword.Declaration,
+    'constant': Keyword.Constant,
+    'function': Keyword,
+    'sqs': String.Single,
+    'dqs': String.Double,
+}
+
+_FUNCNAME = _alternation([
+    ('space', r'\s+'),
+    ('funcname', r'(?:(?P<fn_class>[A-Za-z_][A-Za-z0-9_]*)(?P<fn_dot>\.))?'
+                 r'(?P<fn_name>[A-Za-z_][A-Za-z0-9_]*)'),
+    ('inline', r'\('),
+])
+
+# `stringescape` combined with `sqs` or `dqs`. Every char is a separate
+# token there, `chars` matches a run of them which can't start anything else.
+_STRING = {
+    "'": _alternation([
+        ('escape', r'''\\(?:[abfnrtv\\"']|\d{1,3})'''),
+        ('close', r"'"),
+        ('chars', r"[^'\\\n]+"),
+        ('char', r'.'),
+    ]),
+    '"': _alternation([
+        ('escape', r'''\\(?:[abfnrtv\\"']|\d{1,3})'''),
+        ('close', r'"'),
+        ('chars', r'[^"\\\n]+'),
+        ('char', r'.'),
+    ]),
+}
+
+
+def _scan(text, functions):
+    pos = 0
+    state = 'root'
+    quote = None
+    while True:
+        if state == 'root':
+            m = _SHEBANG(text, pos)
+            if m:
+                yield pos, Comment.Preproc, m.group()
+                pos = m.end()
+            yield pos, Text, ''
+            state = 'base'
+
+        elif state == 'base':
+            m = _BASE(text, pos)
+            if m is None:
+                if pos >= len(text):
+                    return
+                yield pos, Error, text[pos]
+                pos += 1
+                continue
+
+            kind = m.lastgroup
+            value = m.group()
+            if kind == 'name':
+                if value in functions:
+                    yield pos, Name.Builtin, value
+                elif '.' in value:
+                    a, b = value.split('.')
+                    yield pos, Name, a
+                    yield pos + len(a), Punctuation, u'.'
+                    yield pos + len(a) + 1, Name, b
+                else:
+                    yield pos, Name, value
+            elif kind == 'space':
+                for i, char in enumerate(value, pos):
+                    yield i, Text, char
+            else:
+                yield pos, _BASE_TOKENS[kind], value
+                if kind == 'function':
+                    state = 'funcname'
+                elif kind == 'sqs' or kind == 'dqs':
+                    state = 'string'
+                    quote = value
+            pos = m.end()
+
+        elif state == 'funcname':
+            m = _FUNCNAME(text, pos)
+            if m is None:
+                if pos >= len(text):
+                    return
+                yield pos, Error, text[pos]
+                pos += 1
+                continue
+
+            kind = m.lastgroup
+            if kind == 'space':
+                yield pos, Text, m.group()
+            elif kind == 'inline':
+                yield pos, Punctuation, m.group()
+                state = 'base'
+            else:
+                for group, token in (('fn_class', Name.Class),
+                                     ('fn_dot', Punctuation),
+                                     ('fn_name', Name.Function)):
+                    if m.group(group):
+                        yield m.start(group), token, m.group(group)
+                state = 'base'
+            pos = m.end()
+
+        else:
+            m = _STRING[quote](text, pos)
+            if m is None:
+                if pos >= len(text):
+                    return
+                # unterminated string, at EOL RegexLexer resets to root
+                yield pos, Whitespace, '\n'
+                pos += 1
+                state = 'root'
+                continue
+
+            kind = m.lastgroup
+            if kind == 'escape':
+                yield pos, String.Escape, m.group()
+            elif kind == 'chars':
+                for i, char in enumerate(m.group(), pos):
+                    yield i, String, char
+            else:
+                yield pos, String, m.group()
+                if kind == 'close':
+                    state = 'base'
+            pos = m.end()
+
+
 def setup(app):
-    app.add_lexer("lua_tarantool", LuaLexer())
+    app.setup_extension('LexerCache')
+    if sphinx.version_info < (3, 0, 0):
+        app.add_lexer("lua_tarantool", LuaLexer())
+    else:
+        app.add_lexer("lua_tarantool", LuaLexer)
+    # lexers and caches are per process, nothing is shared
+    return {
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
@@ -8,6 +8,7 @@ from pygments.token import Text, Comment, Operator, Keyword, Name, String, \
 from pygments import unistring as uni
 from sphinx.application import Sphinx
 
+import LexerCache
 from LuaLexer import LuaLexer
 from pygments.lexers import YamlLexer, BashSessionLexer
 
@@ -31,6 +32,20 @@ uriverify = re.compile(
     r'(?:/?|[/?]\S+)$', re.IGNORECASE
 )
 
+_lexer_cache = {}
+
+def cached_lexer(cls, options):
+    """Shared instance of the lexer class for the options.
+    Lexers keep no state between get_tokens_unprocessed calls"""
+    key = (cls, tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in options.items()
+    )))
+    lexer = _lexer_cache.get(key)
+    if lexer is None:
+        lexer = _lexer_cache.setdefault(key, cls(**options))
+    return lexer
+
 def find_prompt(line):
     pos = line.find('> ')
     if pos != -1 and uriverify.match(line[:pos]):
@@ -58,27 +73,44 @@ class TarantoolSessionLexer(Lexer):
     def __init__(self, **options):
         super(TarantoolSessionLexer, self).__init__()
 
-    def get_tokens_unprocessed(self, text):
-        lualexer = LuaLexer(**self.options)
-        ymllexer = YamlLexer(**self.options)
-        shslexer = BashSessionLexer(**self.options)
+    def get_tokens(self, text, unfiltered=False):
+        return LexerCache.get_tokens(self, text, unfiltered,
+            super(TarantoolSessionLexer, self).get_tokens)
 
-        curcode = ''
+    def get_tokens_unprocessed(self, text):
+        return self.get_tokens_from_lines(
+            match.group() for match in line_re.finditer(text)
+        )
+
+    def get_tokens_from_lines(self, lines):
+        """
+        Streaming counterpart of `get_tokens_unprocessed`: `lines` may be
+        any iterable, e.g. a file. Lua, YAML and Bash segments are
+        buffered line by line and flushed as soon as they are closed,
+        so time is linear in the input size and memory is bounded
+        by the longest segment.
+        """
+        lualexer = cached_lexer(LuaLexer, self.options)
+        ymllexer = cached_lexer(YamlLexer, self.options)
+        shslexer = cached_lexer(BashSessionLexer, self.options)
+
+        curcode = []
+        codelen = 0
         insertions = []
         code = False
         prompt_len = 0
 
-        curyml = ''
+        curyml = []
         yml = False
         ymlcnt = 0
 
-        curshs = ''
+        curshs = []
         shs = False
 
-        for match in line_re.finditer(text):
-            line = match.group()
-            # print line
-            # print code, yml, shs
+        pos = 0
+        for line in lines:
+            line_pos = pos
+            pos += len(line)
 
             # First part - if output starts from '$ ' then it's BASH session
             # - We must only check that we're not inside of YAML
@@ -87,13 +119,13 @@ class TarantoolSessionLexer(Lexer):
             # Also, we can match multiline commands only if line ends with '\'
             check_shs = (line.startswith('$ ') and not yml) or shs
             if check_shs:
-                curshs += line
+                curshs.append(line)
                 if line.endswith('\\'):
                     shs = True
                     continue
-                for item in shslexer.get_tokens_unprocessed(curshs):
+                for item in shslexer.get_tokens_unprocessed(''.join(curshs)):
                     yield item
-                curshs = ''
+                curshs = []
                 shs = False
                 continue
 
@@ -101,30 +133,30 @@ class TarantoolSessionLexer(Lexer):
             # 1) It's begin, means (yml == False) and line.strip() == '---'
             # 2) It's middle. (yml == True) and line.strip() not in ('---', '...')
             # 3) It's end - then (yml == False) and line.strip() == '...']
-            check_yml_begin  = (yml == False and line.strip()     in (yml_beg, ))
-            # check_yml_middle = (yml == True  and line.strip() not in (yml_beg, yml_end))
-            check_yml_end    = (yml == True  and line.strip() == yml_end and ymlcnt == 0)
+            stripped = line.strip()
+            check_yml_begin  = (yml == False and stripped     in (yml_beg, ))
+            check_yml_end    = (yml == True  and stripped == yml_end and ymlcnt == 0)
             if (check_yml_begin or yml):
-                # print check_yml_begin, check_yml_middle, check_yml_end
                 # Flush previous code buffers
-                if (yml is True and line.strip() == yml_beg):
+                if (yml is True and stripped == yml_beg):
                     ymlcnt += 1
-                if (not check_yml_end and line.strip() == yml_end):
+                if (not check_yml_end and stripped == yml_end):
                     ymlcnt += 1
-                if check_yml_begin and curcode:
-                    for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+                if check_yml_begin and codelen:
+                    for item in do_insertions(insertions,
+                            lualexer.get_tokens_unprocessed(''.join(curcode))):
                         yield item
                     code = False
-                    curcode = ''
+                    curcode = []
+                    codelen = 0
                     insertions = []
-                curyml += line
+                curyml.append(line)
                 # We finished reading YAML output, so push it to user
                 if check_yml_end:
-                    for item in ymllexer.get_tokens_unprocessed(curyml):
+                    for item in ymllexer.get_tokens_unprocessed(''.join(curyml)):
                         yield item
-                    curyml = ''
+                    curyml = []
                 yml = False if check_yml_end else True
-                # print 'yaml gotcha %d' % yml
                 continue
 
             # Third part - check for Tarantool's Lua
@@ -147,32 +179,43 @@ class TarantoolSessionLexer(Lexer):
                 check_code_flexible = True
             if (check_code_begin or check_code_middle or check_code_flexible):
                 code = True
-                insertions.append((len(curcode), [(0, Generic.Prompt, line[:prompt_len])]))
-                curcode += line[prompt_len:]
+                insertions.append((codelen, [(0, Generic.Prompt, line[:prompt_len])]))
+                body = line[prompt_len:]
+                curcode.append(body)
+                codelen += len(body)
                 continue
 
             # If it's not something before - then we must check for code
             # and push that line as 'Generic.Output'
-            if curcode:
-                for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+            if codelen:
+                for item in do_insertions(insertions,
+                        lualexer.get_tokens_unprocessed(''.join(curcode))):
                     yield item
                 code = False
-                curcode = ''
+                curcode = []
+                codelen = 0
                 insertions = []
-            yield match.start(), Generic.Output, line
+            yield line_pos, Generic.Output, line
 
-        if curcode:
-            for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+        if codelen:
+            for item in do_insertions(insertions,
+                    lualexer.get_tokens_unprocessed(''.join(curcode))):
                 yield item
         if curyml:
-            for item in ymllexer.get_tokens_unprocessed(curyml):
+            for item in ymllexer.get_tokens_unprocessed(''.join(curyml)):
                 yield item
         if curshs:
-            for item in shslexer.get_tokens_unprocessed(curshs):
+            for item in shslexer.get_tokens_unprocessed(''.join(curshs)):
                 yield item
 
 def setup(app: Sphinx):
+    app.setup_extension('LexerCache')
     if sphinx.version_info < (3, 0, 0):
         app.add_lexer("tarantoolsession", TarantoolSessionLexer())
     else:
         app.add_lexer("tarantoolsession", TarantoolSessionLexer)
+    # lexers and caches are per process, nothing is shared
+    return {
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
@@ -0,0 +1,101 @@
+"""
+Names of Tarantool and Cartridge functions highlighted as builtins
+by `LuaLexer`, in addition to ``pygments.lexers._lua_builtins``.
+
+The lexer matches at most one dot in a name, so only ``module.function``
+pairs make sense here. Keys are the module names to be used with the
+``disabled_modules`` option.
+"""
+
+MODULES = {
+    'box': (
+        'box.backup',
+        'box.begin',
+        'box.cfg',
+        'box.commit',
+        'box.ctl',
+        'box.error',
+        'box.execute',
+        'box.func',
+        'box.info',
+        'box.is_in_txn',
+        'box.on_commit',
+        'box.on_rollback',
+        'box.once',
+        'box.prepare',
+        'box.rollback',
+        'box.rollback_to_savepoint',
+        'box.savepoint',
+        'box.schema',
+        'box.sequence',
+        'box.session',
+        'box.slab',
+        'box.snapshot',
+        'box.space',
+        'box.stat',
+        'box.tuple',
+        'box.unprepare',
+    ),
+    'fiber': (
+        'fiber.channel',
+        'fiber.clock',
+        'fiber.clock64',
+        'fiber.cond',
+        'fiber.create',
+        'fiber.find',
+        'fiber.id',
+        'fiber.info',
+        'fiber.kill',
+        'fiber.name',
+        'fiber.new',
+        'fiber.self',
+        'fiber.sleep',
+        'fiber.status',
+        'fiber.testcancel',
+        'fiber.time',
+        'fiber.time64',
+        'fiber.yield',
+    ),
+    'net.box': (
+        'net.box',
+    ),
+    'cartridge': (
+        'cartridge.admin_bootstrap_vshard',
+        'cartridge.admin_disable_failover',
+        'cartridge.admin_disable_servers',
+        'cartridge.admin_edit_replicaset',
+        'cartridge.admin_edit_server',
+        'cartridge.admin_edit_topology',
+        'cartridge.admin_enable_failover',
+        'cartridge.admin_enable_servers',
+        'cartridge.admin_expel_server',
+        'cartridge.admin_get_failover',
+        'cartridge.admin_get_replicasets',
+        'cartridge.admin_get_servers',
+        'cartridge.admin_get_topology',
+        'cartridge.admin_get_uris',
+        'cartridge.admin_join_server',
+        'cartridge.admin_probe_server',
+        'cartridge.admin_restart_replication',
+        'cartridge.cfg',
+        'cartridge.config_force_reapply',
+        'cartridge.config_get_deepcopy',
+        'cartridge.config_get_readonly',
+        'cartridge.config_patch_clusterwide',
+        'cartridge.failover_get_params',
+        'cartridge.failover_promote',
+        'cartridge.failover_set_params',
+        'cartridge.get_opts',
+        'cartridge.get_schema',
+        'cartridge.http_authorize_request',
+        'cartridge.http_get_username',
+        'cartridge.http_render_response',
+        'cartridge.is_healthy',
+        'cartridge.reload_roles',
+        'cartridge.rpc_call',
+        'cartridge.rpc_get_candidates',
+        'cartridge.service_get',
+        'cartridge.service_set',
+        'cartridge.set_schema',
+    ),
+}
@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from contextlib import redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
+
+rst_dir = os.path.dirname(os.path.abspath(__file__))
+
+parser = argparse.ArgumentParser(
+    description='Build gettext templates and HTML docs for every language')
+parser.add_argument('outdir', type=str,
+                    help='output directory, one subdirectory per build')
+parser.add_argument('--srcdir', type=str, default=rst_dir,
+                    help='documentation sources (default: %(default)s)')
+parser.add_argument('--languages', type=str, default='en,ru',
+                    help='comma separated HTML languages (default: %(default)s)')
+parser.add_argument('--no-gettext', action='store_true',
+                    help="don't extract gettext templates")
+parser.add_argument('--serial', action='store_true',
+                    help='run builds one after another')
+parser.add_argument('--jobs', type=str, default='1',
+                    help='sphinx-build -j for every build (default: %(default)s)')
+
+
+def build_jobs(srcdir, outdir, languages, gettext=True):
+    """
+    Arguments of every build. Builds don't depend on each other:
+    translated HTML is made from the committed PO files, so even gettext
+    extraction can run alongside. They share the lexer cache.
+    """
+    jobs = []
+    if gettext:
+        jobs.append(('gettext', 'en'))
+    for language in languages:
+        jobs.append(('html', language))
+
+    return [(builder, language, srcdir, outdir) for builder, language in jobs]
+
+
+def build(builder, language, srcdir, outdir, jobs='1'):
+    """Run a single sphinx-build, return its name, status and duration"""
+    from sphinx.cmd.build import build_main
+
+    name = '{}-{}'.format(builder, language)
+    argv = [
+        srcdir,
+        os.path.join(outdir, builder if builder == 'gettext' else language),
+        '-b', builder,
+        '-d', os.path.join(outdir, 'doctrees', name),
+        '-D', 'language={}'.format(language),
+        '-D', 'lexer_cache_dir={}'.format(os.path.join(outdir, 'lexer-cache')),
+        '-j', str(jobs),
+        '-q',
+    ]
+    os.makedirs(outdir, exist_ok=True)
+    # keep warnings of concurrent builds apart
+    with open(os.path.join(outdir, name + '.log'), 'w') as log, \
+            redirect_stderr(log):
+        time_start = time.time()
+        status = build_main(argv)
+    return name, status, time.time() - time_start
+
+
+def cpu_count():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def build_all(jobs, serial=False, sphinx_jobs='1'):
+    """Run the builds in a process pool (or one by one), return results
+    in the order of jobs.
+
+    Every build gets a fresh process: Sphinx keeps global state (e.g. the
+    translations of the previous language) which slows down the next
+    build in the same process.
+    """
+    workers = 1 if serial else max(min(len(jobs), cpu_count()), 1)
+    options = {'mp_context': multiprocessing.get_context('spawn')}
+    if sys.version_info >= (3, 11):
+        options['max_tasks_per_child'] = 1
+    with ProcessPoolExecutor(max_workers=workers, **options) as executor:
+        futures = [executor.submit(build, *job, jobs=sphinx_jobs) for job in jobs]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+
+    jobs = build_jobs(
+        os.path.abspath(args.srcdir),
+        os.path.abspath(args.outdir),
+        args.languages.split(','),
+        gettext=not args.no_gettext,
+    )
+
+    time_start = time.time()
+    failed = False
+    for name, status, seconds in build_all(jobs, args.serial, args.jobs):
+        print(f'{name}: {"ok" if status == 0 else "failed"} in {seconds:.3f}s')
+        failed = failed or status != 0
+    print(f'total: {time.time() - time_start:.3f}s')
+
+    sys.exit(1 if failed else 0)
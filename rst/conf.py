@@ -24,6 +24,7 @@ exclude_patterns = [
 ]
 
 extensions = [
+    'LuaLexer',
     'TarantoolSessionLexer',
 ]
 
@@ -1,11 +1,26 @@
 #! /usr/bin/env python3
+import os
+import sys
+import json
+import hashlib
 import argparse
 from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+import polib
 from polib import pofile, POFile, _BaseFile, POEntry
 
+MANIFEST = '.cleanup-manifest.json'
+
 parser = argparse.ArgumentParser(description='Cleanup PO and POT files')
 parser.add_argument('extension', type=str, choices=['po', 'pot', 'both'],
                     help='cleanup files with extension: po, pot or both')
+parser.add_argument('--check', action='store_true',
+                    help="don't write anything, exit with 1 "
+                         "if some files need a cleanup")
+parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                    help='number of processes (default: %(default)s)')
+parser.add_argument('--force', action='store_true',
+                    help=f'ignore {MANIFEST} and process every file')
 
 
 class PoFile(POFile):
@@ -20,28 +35,116 @@ class PoFile(POFile):
         return M()
 
 
-def cleanup_files(extension):
-    mask = f'**/*.{extension}'
-    for file_path in glob(mask, recursive=True):
-        print(f'cleanup {file_path}')
-        po_file: POFile = pofile(file_path, klass=PoFile)
-        po_file.header = ''
-        po_file.metadata = {}
-        po_file.metadata_is_fuzzy = False
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def version():
+    """Files cleaned by another version of the tool must be processed again"""
+    with open(__file__, 'rb') as f:
+        return digest(f.read() + polib.__version__.encode())
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != version():
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(path, files):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': version(), 'files': files}, f,
+                  indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def cleanup_file(file_path, check=False):
+    """
+    Cleanup a single catalog. The file is only written when the output
+    differs. Returns the path, whether it was (or, with `check`, would be)
+    changed, and the hash of the clean contents.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
 
-        for item in po_file:
-            # item: POEntry = item
-            item.occurrences = None
+    po_file: POFile = pofile(file_path, klass=PoFile)
+    po_file.header = ''
+    po_file.metadata = {}
+    po_file.metadata_is_fuzzy = False
 
-        po_file.save()
+    for item in po_file:
+        # item: POEntry = item
+        item.occurrences = None
+
+    output = po_file.__unicode__().encode(po_file.encoding)
+    changed = output != data
+    if changed and not check:
+        with open(file_path, 'wb') as f:
+            f.write(output)
+    return file_path, changed, digest(output)
+
+
+def cleanup_files(extensions, check=False, jobs=1, force=False):
+    """
+    Cleanup catalogs with the extensions in a process pool. Files whose
+    hash matches the manifest are known to be clean and aren't parsed.
+    Returns the list of changed files.
+    """
+    manifest = {} if force else load_manifest(MANIFEST)
+    clean = {}
+    pending = []
+    total = 0
+    for extension in extensions:
+        mask = f'**/*.{extension}'
+        for file_path in sorted(glob(mask, recursive=True)):
+            total += 1
+            with open(file_path, 'rb') as f:
+                file_digest = digest(f.read())
+            if manifest.get(file_path) == file_digest:
+                clean[file_path] = file_digest
+            else:
+                pending.append(file_path)
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            results = list(executor.map(cleanup_file, pending,
+                                        [check] * len(pending)))
+    else:
+        results = [cleanup_file(file_path, check) for file_path in pending]
+
+    changed = []
+    for file_path, file_changed, file_digest in results:
+        if file_changed:
+            print(f'{"needs cleanup" if check else "cleanup"} {file_path}')
+            changed.append(file_path)
+        if not (file_changed and check):
+            clean[file_path] = file_digest
+
+    if not check:
+        save_manifest(MANIFEST, clean)
+
+    print(f'{len(pending)} of {total} files processed, {len(changed)} '
+          f'{"need cleanup" if check else "cleaned"}')
+    return changed
 
 
 if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    extensions = []
     if args.extension in ['po', 'both']:
-        cleanup_files('po')
+        extensions.append('po')
 
     if args.extension in ['pot', 'both']:
-        cleanup_files('pot')
+        extensions.append('pot')
+
+    changed = cleanup_files(extensions, args.check, args.jobs, args.force)
+    if args.check and changed:
+        sys.exit(1)
@@ -0,0 +1,267 @@
+#! /usr/bin/env python3
+import os
+import sys
+import json
+import hashlib
+import argparse
+from glob import glob
+import polib
+
+import cleanup
+
+locale_dir = os.path.dirname(os.path.abspath(__file__))
+
+parser = argparse.ArgumentParser(
+    description='Extract POT files and merge them into PO files, '
+                'only for the sources changed since the last run')
+parser.add_argument('--srcdir', type=str,
+                    default=os.path.dirname(locale_dir),
+                    help='documentation sources (default: %(default)s)')
+parser.add_argument('--builddir', type=str,
+                    default=os.path.join(os.path.dirname(locale_dir), '_build', 'locale'),
+                    help='POT files, doctrees and the state of previous runs '
+                         '(default: %(default)s)')
+parser.add_argument('--language', '-l', type=str, default='ru',
+                    help='language of the catalogs to update (default: %(default)s)')
+parser.add_argument('--force', action='store_true',
+                    help='forget the previous runs and update every catalog')
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return digest(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def pot_digest(path):
+    """Hash of the POT file regardless of its creation date"""
+    try:
+        with open(path, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+    except FileNotFoundError:
+        return None
+    return digest(b''.join(
+        line for line in lines if not line.startswith(b'"POT-Creation-Date:')
+    ))
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class Manifest(object):
+    """
+    Dependencies of every catalog: the source document, the files it
+    includes and their hashes as of the last run, plus the POT hash.
+    """
+
+    def __init__(self, path, srcdir):
+        self.path = path
+        self.srcdir = srcdir
+        self.data = load_json(path)
+        self.data.setdefault('catalogs', {})
+
+    def conf_digest(self):
+        return file_digest(os.path.join(self.srcdir, 'conf.py'))
+
+    def documents(self):
+        return sorted(
+            os.path.relpath(path, self.srcdir)
+            for path in glob(os.path.join(self.srcdir, '**', '*.rst'), recursive=True)
+        )
+
+    def stale(self):
+        """Names of catalogs whose sources changed, None if everything
+        must be extracted again"""
+        if self.data.get('conf') != self.conf_digest():
+            return None
+
+        if self.data.get('documents') != self.documents():
+            # new documents may be catalogs or be included somewhere
+            return None
+
+        stale = set()
+        for name, catalog in self.data['catalogs'].items():
+            for source, source_digest in catalog['sources'].items():
+                if file_digest(os.path.join(self.srcdir, source)) != source_digest:
+                    stale.add(name)
+                    break
+        return stale
+
+    def update(self, env):
+        catalogs = {}
+        for docname in sorted(env.found_docs):
+            sources = [env.doc2path(docname, False)]
+            sources += sorted(env.dependencies.get(docname, ()))
+            catalogs[docname] = {
+                'sources': {
+                    source: file_digest(os.path.join(self.srcdir, source))
+                    for source in sources
+                },
+                'pot': self.data['catalogs'].get(docname, {}).get('pot'),
+            }
+        self.data['catalogs'] = catalogs
+        self.data['conf'] = self.conf_digest()
+        self.data['documents'] = self.documents()
+
+    def changed_pots(self, potdir):
+        """Catalogs whose POT differs from the last merged one"""
+        changed = []
+        for name, catalog in self.data['catalogs'].items():
+            pot_hash = pot_digest(os.path.join(potdir, name + '.pot'))
+            if pot_hash is not None and pot_hash != catalog['pot']:
+                changed.append(name)
+        return sorted(changed)
+
+    def merged(self, name, potdir):
+        self.data['catalogs'][name]['pot'] = \
+            pot_digest(os.path.join(potdir, name + '.pot'))
+
+    def save(self):
+        save_json(self.path, self.data)
+
+
+class TranslationMemory(object):
+    """
+    msgid -> msgstr index of all translated entries of a language.
+    Only PO files changed since the last run are parsed again.
+    """
+
+    def __init__(self, path, podir):
+        self.path = path
+        self.podir = podir
+        self.files = load_json(path).get('files', {})
+        self.index = None
+
+    def refresh(self):
+        current = {
+            os.path.relpath(path, self.podir): path
+            for path in glob(os.path.join(self.podir, '**', '*.po'), recursive=True)
+        }
+        for name in list(self.files):
+            if name not in current:
+                del self.files[name]
+                self.index = None
+        for name, path in current.items():
+            self.refresh_file(name, path)
+
+    def refresh_file(self, name, path):
+        po_hash = file_digest(path)
+        if self.files.get(name, {}).get('digest') == po_hash:
+            return
+        self.index = None
+        self.files[name] = {
+            'digest': po_hash,
+            'entries': {
+                entry.msgid: entry.msgstr
+                for entry in polib.pofile(path)
+                if entry.translated()
+            },
+        }
+
+    def lookup(self, msgid):
+        if self.index is None:
+            self.index = {}
+            for name in sorted(self.files, reverse=True):
+                self.index.update(self.files[name]['entries'])
+        return self.index.get(msgid)
+
+    def save(self):
+        save_json(self.path, {'files': self.files})
+
+
+def extract(srcdir, potdir, doctreedir, force=False):
+    """Run the gettext builder. Doctrees are kept between runs, so Sphinx
+    only reads documents changed since then (including their includes)
+    and leaves POT files without new messages untouched."""
+    from sphinx.application import Sphinx
+
+    app = Sphinx(srcdir, srcdir, potdir, doctreedir, 'gettext',
+                 status=None, warning=sys.stderr, freshenv=force)
+    app.build()
+    return app.env
+
+
+def merge(pot_path, po_path, memory):
+    """Merge the template into the catalog like `sphinx-intl update`.
+    New messages translated elsewhere are taken from the translation
+    memory and marked fuzzy for review."""
+    pot = polib.pofile(pot_path)
+    if os.path.exists(po_path):
+        po = polib.pofile(po_path)
+    else:
+        os.makedirs(os.path.dirname(po_path), exist_ok=True)
+        po = polib.POFile()
+        po.metadata = pot.metadata
+
+    known = {entry.msgid for entry in po if not entry.obsolete}
+    po.merge(pot)
+    for entry in po:
+        if entry.obsolete or entry.msgid in known or entry.translated():
+            continue
+        msgstr = memory.lookup(entry.msgid)
+        if msgstr is not None:
+            entry.msgstr = msgstr
+            if 'fuzzy' not in entry.flags:
+                entry.flags.append('fuzzy')
+    po.save(po_path)
+
+
+def update(srcdir, builddir, language, force=False):
+    """Returns the names of updated catalogs"""
+    srcdir = os.path.abspath(srcdir)
+    potdir = os.path.join(builddir, 'pot')
+    podir = os.path.join(srcdir, 'locale', language, 'LC_MESSAGES')
+    os.makedirs(builddir, exist_ok=True)
+
+    manifest = Manifest(os.path.join(builddir, 'manifest.json'), srcdir)
+    if force:
+        manifest.data = {'catalogs': {}}
+
+    stale = manifest.stale()
+    if stale is not None and len(stale) == 0:
+        return []
+
+    env = extract(srcdir, potdir, os.path.join(builddir, 'doctrees'), force)
+    manifest.update(env)
+    changed = manifest.changed_pots(potdir)
+
+    memory = TranslationMemory(
+        os.path.join(builddir, 'memory-{}.json'.format(language)), podir)
+    memory.refresh()
+
+    for name in changed:
+        po_path = os.path.join(podir, name + '.po')
+        merge(os.path.join(potdir, name + '.pot'), po_path, memory)
+        cleanup.cleanup_file(po_path)
+        memory.refresh_file(name + '.po', po_path)
+        manifest.merged(name, potdir)
+        print(f'update {os.path.relpath(po_path, srcdir)}')
+
+    memory.save()
+    manifest.save()
+    return changed
+
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+    changed = update(args.srcdir, args.builddir, args.language, args.force)
+    print(f'{len(changed)} catalogs updated')
@@ -0,0 +1,81 @@
+local fio = require('fio')
+local t = require('luatest')
+local g = t.group()
+
+local helpers = require('test.helper')
+
+g.before_all(function()
+    g.cluster = helpers.Cluster:new({
+        datadir = fio.tempdir(),
+        use_vshard = false,
+        server_command = helpers.entrypoint('srv_basic'),
+        cookie = helpers.random_cookie(),
+        replicasets = {{
+            alias = 'A',
+            roles = {'myrole'},
+            servers = 2,
+        }},
+    })
+    g.cluster:start()
+    g.A1 = g.cluster:server('A-1')
+    g.A2 = g.cluster:server('A-2')
+end)
+
+g.after_all(function()
+    g.cluster:stop()
+    fio.rmtree(g.cluster.datadir)
+end)
+
+local function get_candidates()
+    local candidates = g.A1:exec(function()
+        return require('cartridge.rpc').get_candidates('myrole')
+    end)
+    table.sort(candidates)
+    return candidates
+end
+
+g.after_test('test_candidates', function()
+    g.A2:exec(function()
+        require('membership').set_payload('state', 'RolesConfigured')
+    end)
+end)
+
+function g.test_candidates()
+    t.assert_equals(get_candidates(), {
+        g.A1.advertise_uri,
+        g.A2.advertise_uri,
+    })
+
+    local ok, err = g.A1:exec(function()
+        return require('cartridge.roles').reload()
+    end)
+    t.assert_equals({ok, err}, {true, nil})
+
+    -- Fill the cache after the reload
+    t.assert_equals(get_candidates(), {
+        g.A1.advertise_uri,
+        g.A2.advertise_uri,
+    })
+
+    g.A2:exec(function()
+        require('membership').set_payload('state', 'OperationError')
+    end)
+
+    -- Membership events still drop the cache
+    t.helpers.retrying({}, function()
+        t.assert_equals(get_candidates(), {g.A1.advertise_uri})
+    end)
+end
+
+function g.test_membership_subscription()
+    local same = g.A1:exec(function()
+        local vars = require('cartridge.vars').new('cartridge.rpc')
+        local notification = vars.membership_notification
+
+        -- Load the module again, like hot reload does
+        package.loaded['cartridge.rpc'] = nil
+        require('cartridge.rpc')
+        return vars.membership_notification == notification
+    end)
+    t.assert_equals(same, true)
+end
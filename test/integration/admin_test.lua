@@ -190,3 +190,30 @@ function g.test_login()
     check_401(bauth('guest',  ADMIN_PASSWORD))
     check_200(bauth(ADMIN_USERNAME, ADMIN_PASSWORD))
 end
+
+function g.test_internal_metrics()
+    local function get_metrics(headers)
+        return g.server:http_request('get', '/admin/metrics', {
+            http = {headers = headers},
+            raise = false,
+        })
+    end
+
+    t.assert_equals(get_metrics().status, 401)
+
+    local headers = bauth(ADMIN_USERNAME, ADMIN_PASSWORD)
+    t.assert_equals(get_metrics(headers).status, 404)
+
+    g.server:exec(function()
+        require('cartridge.internal-metrics').set_enabled(true)
+    end)
+    local resp = get_metrics(headers)
+    t.assert_equals(resp.status, 200)
+    t.assert_str_contains(resp.body, '# TYPE ')
+end
+
+g.after_test('test_internal_metrics', function()
+    g.server:exec(function()
+        require('cartridge.internal-metrics').set_enabled(false)
+    end)
+end)
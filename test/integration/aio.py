@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+import threading
+import aiohttp
+import asynctnt
+
+AIO_TIMEOUT = 5.0
+
+# The connection is useless after them, the next request reconnects
+CONNECTION_ERRORS = (
+    asynctnt.exceptions.TarantoolNotConnectedError,
+    asynctnt.exceptions.TarantoolNetworkError,
+    OSError,
+)
+
+
+class AsyncServer(object):
+    """asyncio counterpart of conftest.Server for a running instance.
+    Connections are established lazily and must be released with close()
+    in the same event loop they were used in"""
+    def __init__(self, binary_port, http_port, alias=None, password=None):
+        self.alias = alias
+        self.binary_port = binary_port
+        self.http_port = http_port
+        self.advertise_uri = 'localhost:{}'.format(binary_port)
+        self.baseurl = 'http://localhost:{}'.format(http_port)
+        self.password = password
+
+        self._conn = None
+        self._session = None
+
+    @classmethod
+    def of(cls, srv):
+        return cls(srv.binary_port, srv.http_port,
+            alias=srv.alias,
+            password=srv.env['TARANTOOL_CLUSTER_COOKIE'],
+        )
+
+    async def connect(self):
+        if self._conn is not None and not self._conn.is_connected:
+            # e.g. remote control drops its connections after box.cfg
+            await self.disconnect()
+        if self._conn is None:
+            conn = asynctnt.Connection(
+                host='127.0.0.1', port=self.binary_port,
+                username='admin', password=self.password,
+                # remote control doesn't serve schema spaces
+                fetch_schema=False,
+                auto_refetch_schema=False,
+                connect_timeout=AIO_TIMEOUT,
+                reconnect_timeout=0,
+            )
+            await conn.connect()
+            self._conn = conn
+        return self._conn
+
+    async def disconnect(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.disconnect()
+            except Exception as e:
+                logging.warning('Disconnect from {} failed: {}'.format(
+                    self.advertise_uri, e))
+
+    async def request(self, fn):
+        """Await fn(conn), drop the connection if it's broken"""
+        conn = await self.connect()
+        try:
+            return await fn(conn)
+        except CONNECTION_ERRORS:
+            await self.disconnect()
+            raise
+
+    async def eval(self, expr, args=None, timeout=AIO_TIMEOUT):
+        resp = await self.request(
+            lambda conn: conn.eval(expr, args or [], timeout=timeout))
+        return resp.body
+
+    async def call(self, fn_name, args=None, timeout=AIO_TIMEOUT):
+        resp = await self.request(
+            lambda conn: conn.call(fn_name, args or [], timeout=timeout))
+        return resp.body
+
+    async def batch(self, calls, timeout=AIO_TIMEOUT):
+        """Send all calls at once and gather the responses, so the whole
+        batch costs a single round trip. calls is a list of (fn_name, args)"""
+        def send(conn):
+            return asyncio.gather(*[
+                conn.call(fn_name, args or [], timeout=timeout)
+                for fn_name, args in calls
+            ])
+        return [resp.body for resp in await self.request(send)]
+
+    async def cluster_is_healthy(self):
+        resp = await self.call('package.loaded.cartridge.is_healthy')
+        assert resp[0] == True, resp
+
+    async def graphql(self, query, variables=None, headers=None,
+                      timeout=AIO_TIMEOUT):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+
+        async with self._session.post(self.baseurl + '/admin/api',
+            json={"query": query, "variables": variables},
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as r:
+            r.raise_for_status()
+            json = await r.json()
+
+        if 'errors' in json:
+            logging.warning(json['errors'])
+        return json
+
+    async def close(self):
+        await self.disconnect()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def map_call(servers, fn, concurrency=None, timeout=AIO_TIMEOUT):
+    """Await fn(server) for every server concurrently,
+    similar to `cartridge.pool.map_call`.
+
+    At most `concurrency` calls are in flight at once (unlimited if None),
+    each of them is limited with `timeout` seconds once started.
+    Returns a pair of dicts keyed by server alias: results of
+    successful calls and exceptions of failed ones."""
+    aliases = [srv.alias for srv in servers]
+    if len(set(aliases)) != len(aliases):
+        raise ValueError('Duplicate aliases are prohibited: {}'.format(aliases))
+
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    retmap, errmap = {}, {}
+
+    async def gather_call(srv):
+        try:
+            if semaphore is None:
+                retmap[srv.alias] = await asyncio.wait_for(fn(srv), timeout)
+            else:
+                async with semaphore:
+                    retmap[srv.alias] = await asyncio.wait_for(fn(srv), timeout)
+        except Exception as e:
+            errmap[srv.alias] = e
+
+    await asyncio.gather(*[gather_call(srv) for srv in servers])
+    return retmap, errmap
+
+
+class LoopThread(object):
+    """Event loop running in a daemon thread, lets blocking code
+    keep asyncio connections open between calls"""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def loop_thread():
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = LoopThread()
+        return _loop_thread
+
+
+async def close_all(servers):
+    await asyncio.gather(*[srv.close() for srv in servers])
+
+
+def run_map_call(servers, fn, **kwargs):
+    """Blocking shortcut: run map_call in a fresh event loop
+    and close all connections afterwards"""
+    async def main():
+        try:
+            return await map_call(servers, fn, **kwargs)
+        finally:
+            await close_all(servers)
+
+    return asyncio.run(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import logging
+
+# Benchmarks aren't collected by default, run them explicitly:
+#   pytest test/integration/bench_http.py
+# Results are appended as JSON lines to BENCH_OUTPUT if it's set.
+BENCH_OUTPUT = os.environ.get('BENCH_OUTPUT')
+BENCH_DURATION = float(os.environ.get('BENCH_DURATION', 3.0))
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile, p in [0, 100]"""
+    if len(samples) == 0:
+        return None
+    ordered = sorted(samples)
+    rank = int(round(p / 100.0 * (len(ordered) - 1)))
+    return ordered[rank]
+
+
+def throughput(fn, duration=None):
+    """Call fn() repeatedly for duration seconds, return calls per second"""
+    duration = duration or BENCH_DURATION
+    count = 0
+    time_start = time.time()
+    while time.time() - time_start < duration:
+        fn()
+        count += 1
+    return count / (time.time() - time_start)
+
+
+def report(name, result):
+    logging.warning('Benchmark {}: {}'.format(name, result))
+    if BENCH_OUTPUT is None:
+        return
+
+    with open(BENCH_OUTPUT, 'a') as f:
+        f.write(json.dumps({
+            'name': name,
+            'time': time.time(),
+            'result': result,
+        }, sort_keys=True) + '\n')
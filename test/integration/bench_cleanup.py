@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import glob
+import time
+import shutil
+import bench
+
+locale_abspath = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'rst', 'locale')
+)
+sys.path.insert(0, locale_abspath)
+
+import cleanup
+
+# Copies of the ru catalogs in the synthetic translation tree
+BENCH_CATALOG_COPIES = int(os.environ.get('BENCH_CATALOG_COPIES', 50))
+
+
+def make_tree(basedir):
+    catalogs = glob.glob(os.path.join(locale_abspath, 'ru', 'LC_MESSAGES', '*.po'))
+    for n in range(BENCH_CATALOG_COPIES):
+        dst = os.path.join(basedir, 'lang{}'.format(n), 'LC_MESSAGES')
+        os.makedirs(dst)
+        for path in catalogs:
+            shutil.copy(path, dst)
+    return len(catalogs) * BENCH_CATALOG_COPIES
+
+
+def timed(fn, *args, **kwargs):
+    time_start = time.time()
+    fn(*args, **kwargs)
+    return time.time() - time_start
+
+
+def test_cleanup(tmpdir):
+    cwd = os.getcwd()
+    result = {'jobs': os.cpu_count()}
+    try:
+        for mode, jobs in (('serial', 1), ('pool', os.cpu_count())):
+            basedir = str(tmpdir.join(mode))
+            result['files'] = make_tree(basedir)
+            os.chdir(basedir)
+            result[mode] = {
+                'first_seconds': timed(cleanup.cleanup_files, ['po'], jobs=jobs),
+                'unchanged_seconds': timed(cleanup.cleanup_files, ['po'], jobs=jobs),
+                'check_seconds': timed(cleanup.cleanup_files, ['po'],
+                    check=True, jobs=jobs),
+            }
+            assert cleanup.cleanup_files(['po'], check=True, force=True,
+                jobs=jobs) == []
+            os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+
+    bench.report('po_cleanup', result)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+
+from conftest import Server
+
+# Numbers of sections in the clusterwide config
+BENCH_SECTIONS = [int(n) for n in
+    os.environ.get('BENCH_SECTIONS', '10,100,500').split(',')]
+# Size of every section, KiB
+BENCH_SECTION_SIZE = int(os.environ.get('BENCH_SECTION_SIZE', 64))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = [],
+    )
+]
+
+# Populate the clusterwide config with large YAML sections
+PATCH_SECTIONS = """
+    local count, size = ...
+    local digest = require('digest')
+    local patch = {}
+    for i = 1, count do
+        local items = {}
+        for j = 1, size / 64 do
+            items[j] = {key = j, value = digest.urandom(24):hex()}
+        end
+        patch[string.format('bench/section-%04d', i)] = items
+    end
+    return require('cartridge').config_patch_clusterwide(patch)
+"""
+
+# Local part of the patch-apply: copy, validate and hash the new config
+MEASURE_PATCH = """
+    local clock = require('clock')
+    local confapplier = require('cartridge.confapplier')
+    local active = confapplier.get_active_config()
+    active:get_checksum()
+    collectgarbage()
+
+    local t0 = clock.monotonic()
+    local cfg = assert(active:copy_and_patch({['bench/patched'] = {n = 1}}))
+    assert(cfg:update_luatables())
+    cfg:get_checksum()
+    return clock.monotonic() - t0
+"""
+
+
+def test_clusterwide_config(cluster):
+    router = cluster['router']
+    router.connect()
+
+    curve = []
+    for count in BENCH_SECTIONS:
+        resp = router.conn.eval(PATCH_SECTIONS, [count, BENCH_SECTION_SIZE * 1024])
+        assert resp[0] is True, resp
+
+        patch_local = router.conn.eval(MEASURE_PATCH)[0]
+
+        time_start = time.time()
+        resp = router.conn.eval(
+            'return require("cartridge").config_patch_clusterwide(...)',
+            [{'bench/patched': {'n': count}}]
+        )
+        patch_2pc = time.time() - time_start
+        assert resp[0] is True, resp
+
+        # the config is loaded, validated and hashed from scratch
+        router.stop()
+        time_start = time.time()
+        router.start()
+        router.wait_configured()
+        restart = time.time() - time_start
+
+        curve.append({
+            'sections': count,
+            'restart_seconds': restart,
+            'patch_local_seconds': patch_local,
+            'patch_2pc_seconds': patch_2pc,
+        })
+
+    bench.report('clusterwide_config', {
+        'section_size_kib': BENCH_SECTION_SIZE,
+        'curve': curve,
+    })
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import bench
+
+rst_abspath = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'rst')
+)
+sys.path.insert(0, rst_abspath)
+
+import build_docs
+
+
+def test_docs_build(tmpdir):
+    result = {'cpus': build_docs.cpu_count()}
+    for mode in ('serial', 'pool'):
+        outdir = str(tmpdir.join(mode))
+        jobs = build_docs.build_jobs(rst_abspath, outdir, ['en', 'ru'])
+
+        time_start = time.time()
+        builds = build_docs.build_all(jobs, serial=(mode == 'serial'))
+        total = time.time() - time_start
+
+        for name, status, _ in builds:
+            assert status == 0, '{} failed, see {}'.format(name, outdir)
+        result[mode] = {
+            'total_seconds': total,
+            'slowest_seconds': max(seconds for _, _, seconds in builds),
+            'builds': {name: seconds for name, _, seconds in builds},
+        }
+
+    result['speedup'] = result['serial']['total_seconds'] / \
+        result['pool']['total_seconds']
+    bench.report('docs_build', result)
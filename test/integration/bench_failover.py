@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+import logging
+import pytest
+import tarantool
+
+from subprocess import Popen, DEVNULL
+from conftest import Server, srv_abspath, COOKIE
+
+# Failover modes to measure
+BENCH_FAILOVER_MODES = os.environ.get(
+    'BENCH_FAILOVER_MODES', 'eventual,stateful,raft').split(',')
+# Masters killed in every mode
+BENCH_FAILOVER_KILLS = int(os.environ.get('BENCH_FAILOVER_KILLS', 10))
+# Seconds, membership marks suspect members dead after it
+BENCH_FAILOVER_TIMEOUT = float(os.environ.get('BENCH_FAILOVER_TIMEOUT', 1.0))
+# Seconds to wait for a new writable leader
+SWITCH_TIMEOUT = 30.0
+
+STORAGE_UUID = 'bbbbbbbb-0000-4000-b000-000000000001'
+
+env = {
+    'TARANTOOL_SWIM_PROTOCOL_PERIOD_SECONDS': '0.2',
+    'TARANTOOL_ELECTION_TIMEOUT': '1',
+    'TARANTOOL_REPLICATION_TIMEOUT': '0.25',
+}
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'aaaaaaaa-aaaa-4000-b000-000000000001',
+        replicaset_uuid = 'aaaaaaaa-0000-4000-b000-000000000001',
+        roles = ['failover-coordinator'],
+    ),
+    Server(
+        alias = 'storage-1',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000001',
+        replicaset_uuid = STORAGE_UUID,
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-2',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000002',
+        replicaset_uuid = STORAGE_UUID,
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-3',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000003',
+        replicaset_uuid = STORAGE_UUID,
+        roles = [],
+    ),
+]
+
+TIMELINE_EVENTS = ['detection', 'decision', 'appointment', 'box_cfg', 'apply']
+
+TIMELINE_QUERY = """
+    {
+        cluster {
+            failover_timeline { step event time leader_uuid read_only error }
+        }
+    }
+"""
+
+SET_FAILOVER_PARAMS = """
+    mutation(
+        $mode: String!
+        $state_provider: String
+        $failover_timeout: Float
+        $tarantool_params: FailoverStateProviderCfgInputTarantool
+    ) {
+        cluster {
+            failover_params(
+                mode: $mode
+                state_provider: $state_provider
+                failover_timeout: $failover_timeout
+                tarantool_params: $tarantool_params
+            ) { mode }
+        }
+    }
+"""
+
+
+class Stateboard(object):
+    """Local state provider for the stateful failover"""
+    def __init__(self, port, workdir):
+        self.port = port
+        self.uri = 'localhost:{}'.format(port)
+        self.password = COOKIE
+        self.env = os.environ.copy()
+        self.env['TARANTOOL_LISTEN'] = self.uri
+        self.env['TARANTOOL_PASSWORD'] = self.password
+        self.env['TARANTOOL_WORKDIR'] = workdir
+        self.env['TARANTOOL_LOCK_DELAY'] = str(BENCH_FAILOVER_TIMEOUT)
+        self.process = None
+
+    def ping(self):
+        conn = tarantool.connect('127.0.0.1', self.port,
+            user='client', password=self.password)
+        conn.close()
+
+    def start(self, helpers):
+        command = [os.path.join(srv_abspath, 'srv_stateboard.lua')]
+        self.process = Popen(command, env=self.env, stdout=DEVNULL, stderr=DEVNULL)
+        helpers.wait_for(self.ping)
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+
+@pytest.fixture(scope='module')
+def stateboard(request, module_tmpdir, port_allocator, helpers):
+    stateboard = Stateboard(port_allocator.allocate(),
+        os.path.join(module_tmpdir, 'stateboard'))
+    request.addfinalizer(stateboard.kill)
+    stateboard.start(helpers)
+    return stateboard
+
+
+def set_failover_params(router, **params):
+    resp = router.graphql(SET_FAILOVER_PARAMS, variables=params)
+    assert 'errors' not in resp, resp['errors'][0]['message']
+
+
+def get_leader(router):
+    return router.conn.eval(
+        'return require("cartridge.failover").get_active_leaders()[...]',
+        [STORAGE_UUID])[0]
+
+
+def is_rw(srv):
+    return not srv.conn.eval('return box.info.ro')[0]
+
+
+def wait_writable(candidates, timeout):
+    """Poll the instances with a fixed 10 ms interval (no backoff),
+    return the first writable one and the time it's seen writable"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for srv in candidates:
+            try:
+                if is_rw(srv):
+                    return srv, time.time()
+            except tarantool.error.Error:
+                pass
+        time.sleep(0.01)
+    raise TimeoutError('No writable leader in {} sec'.format(timeout))
+
+
+def wait_stable(router, storages, helpers):
+    """Every storage is alive, the leader is writable
+    and the replicas are read-only"""
+    def check():
+        leader_uuid = get_leader(router)
+        for srv in storages.values():
+            srv.connect()
+            assert is_rw(srv) == (srv.instance_uuid == leader_uuid), srv.alias
+    helpers.wait_for(check, timeout=SWITCH_TIMEOUT)
+
+
+def kill_master(router, storages, helpers):
+    master = storages[get_leader(router)]
+    candidates = [srv for srv in storages.values() if srv is not master]
+
+    kill_time = time.time()
+    master.kill()
+    leader, rw_time = wait_writable(candidates, SWITCH_TIMEOUT)
+
+    # The timeline lags behind writability a bit (roles are applied
+    # after box.cfg), wait for the switch to complete.
+    def get_step():
+        events = [e for e in
+            leader.graphql(TIMELINE_QUERY)['data']['cluster']['failover_timeline']
+            if e['time'] >= kill_time]
+        step = events[-1]['step']
+        events = {e['event']: e for e in events if e['step'] == step}
+        assert 'apply' in events
+        return events
+    events = helpers.wait_for(get_step, timeout=SWITCH_TIMEOUT)
+
+    sample = {
+        'killed': master.alias,
+        'leader': leader.alias,
+        'rw_ms': (rw_time - kill_time) * 1000,
+    }
+    for name in TIMELINE_EVENTS:
+        if name in events:
+            sample[name + '_ms'] = (events[name]['time'] - kill_time) * 1000
+
+    master.start()
+    master.wait_configured(timeout=SWITCH_TIMEOUT)
+    wait_stable(router, storages, helpers)
+    return sample
+
+
+def distribution(samples, key):
+    values = [s[key] for s in samples if key in s]
+    return {
+        'p50': bench.percentile(values, 50),
+        'p90': bench.percentile(values, 90),
+        'p99': bench.percentile(values, 99),
+        'max': max(values) if values else None,
+    }
+
+
+def test_failover_switch(cluster, stateboard, helpers):
+    router = cluster['router']
+    router.connect()
+    router.conn.eval("""
+        local vars = require('cartridge.vars').new('cartridge.roles.coordinator')
+        vars.options.IMMUNITY_TIMEOUT = 1
+        vars.options.RECONNECT_PERIOD = 1
+    """)
+    storages = {srv.instance_uuid: srv for alias, srv in cluster.items()
+                if alias.startswith('storage')}
+
+    result = {}
+    for mode in BENCH_FAILOVER_MODES:
+        params = {'mode': mode, 'failover_timeout': BENCH_FAILOVER_TIMEOUT}
+        if mode == 'stateful':
+            params['state_provider'] = 'tarantool'
+            params['tarantool_params'] = {
+                'uri': stateboard.uri,
+                'password': stateboard.password,
+            }
+
+        try:
+            set_failover_params(router, **params)
+            wait_stable(router, storages, helpers)
+        except Exception as e:
+            logging.warning('Failover mode {} unavailable: {}'.format(mode, e))
+            result[mode] = {'error': str(e)}
+            continue
+
+        samples = []
+        for _ in range(BENCH_FAILOVER_KILLS):
+            sample = kill_master(router, storages, helpers)
+            logging.warning('{} failover: {}'.format(mode, sample))
+            samples.append(sample)
+
+        result[mode] = {'samples': samples, 'rw_ms': distribution(samples, 'rw_ms')}
+        for name in TIMELINE_EVENTS:
+            result[mode][name + '_ms'] = distribution(samples, name + '_ms')
+
+    set_failover_params(router, mode='disabled')
+
+    bench.report('failover_switch', {
+        'kills': BENCH_FAILOVER_KILLS,
+        'failover_timeout': BENCH_FAILOVER_TIMEOUT,
+        'result': result,
+    })
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+import random
+import threading
+
+from conftest import Server
+
+# Number of operators polling the dashboard at the same time
+BENCH_CONCURRENCY = int(os.environ.get('BENCH_CONCURRENCY', 8))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = ['vshard-router'],
+    ),
+    Server(
+        alias = 'storage',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000002',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = ['vshard-storage'],
+    ),
+    Server(
+        alias = 'storage-replica',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000003',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = ['vshard-storage'],
+    )
+]
+
+# (name, weight, query, variables)
+QUERY_MIX = [
+    ('servers', 30, """
+        {
+            servers {
+                uri alias status message uuid
+                replicaset { uuid }
+                statistics { quota_used_ratio arena_used_ratio }
+            }
+        }
+    """, None),
+    ('replicasets', 20, """
+        {
+            replicasets {
+                uuid alias roles status weight vshard_group
+                master { uuid }
+                active_master { uuid }
+                servers { uri uuid priority }
+            }
+        }
+    """, None),
+    ('cluster.issues', 20, """
+        {
+            cluster { issues { level topic message instance_uuid } }
+        }
+    """, None),
+    ('cluster.self', 20, """
+        {
+            cluster { self { uri uuid alias state error } }
+        }
+    """, None),
+    ('mutation.probe_server', 5, """
+        mutation($uri: String!) { probe_server(uri: $uri) }
+    """, 'uri'),
+    ('mutation.auth_params', 5, """
+        mutation {
+            cluster { auth_params(enabled: false) { enabled } }
+        }
+    """, None),
+]
+
+
+def run_load(srv, duration, concurrency, seed=0):
+    names = [q[0] for q in QUERY_MIX]
+    weights = [q[1] for q in QUERY_MIX]
+    queries = {q[0]: (q[2], q[3]) for q in QUERY_MIX}
+
+    lock = threading.Lock()
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    failures = []
+    deadline = time.time() + duration
+
+    def worker(n):
+        try:
+            run_worker(n)
+        except Exception as e:
+            # a dead worker would silently lower the throughput
+            with lock:
+                failures.append(e)
+
+    def run_worker(n):
+        rng = random.Random(seed + n)
+        while time.time() < deadline:
+            name = rng.choices(names, weights)[0]
+            query, variables = queries[name]
+            if variables == 'uri':
+                variables = {'uri': srv.advertise_uri}
+
+            time_start = time.perf_counter()
+            resp = srv.graphql(query, variables)
+            elapsed = time.perf_counter() - time_start
+
+            with lock:
+                if 'errors' in resp:
+                    errors[name] += 1
+                else:
+                    samples[name].append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    time_start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - time_start
+
+    if len(failures) > 0:
+        raise RuntimeError('{} of {} workers failed'.format(
+            len(failures), concurrency)) from failures[0]
+
+    result = {}
+    for name in names:
+        latencies = [s * 1000 for s in samples[name]]
+        result[name] = {
+            'count': len(latencies),
+            'errors': errors[name],
+            'rps': len(latencies) / elapsed,
+            'p50_ms': bench.percentile(latencies, 50),
+            'p99_ms': bench.percentile(latencies, 99),
+            'p999_ms': bench.percentile(latencies, 99.9),
+        }
+    return result
+
+
+def test_graphql_load(cluster):
+    srv = cluster['router']
+    resp = srv.graphql('{ servers { boxinfo { cartridge { version } } } }')
+    version = resp['data']['servers'][0]['boxinfo']['cartridge']['version']
+
+    result = run_load(srv, bench.BENCH_DURATION, BENCH_CONCURRENCY)
+    bench.report('graphql_load', {
+        'cartridge_version': version,
+        'concurrency': BENCH_CONCURRENCY,
+        'duration': bench.BENCH_DURATION,
+        'queries': result,
+    })
+
+    for name, stats in result.items():
+        assert stats['errors'] == 0, name
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import hashlib
+import bench
+import resources
+
+from conftest import Server
+
+# Requests sent in every mode
+BENCH_REQUESTS = int(os.environ.get('BENCH_REQUESTS', 2000))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = ['vshard-router', 'vshard-storage'],
+    )
+]
+
+# The query WebUI polls on the cluster page
+QUERY = """
+    query serverList {
+        serverList: servers {
+            uuid alias uri status message disabled priority
+            statistics { arena_used_ratio quota_used_ratio arena_size }
+            replicaset { uuid }
+            labels { name value }
+        }
+        replicasetList: replicasets {
+            uuid alias roles status weight vshard_group all_rw
+            master { uuid }
+            active_master { uuid }
+            servers { uri uuid priority }
+        }
+        cluster {
+            self { uri uuid alias state error }
+            issues { level topic message instance_uuid replicaset_uuid }
+        }
+    }
+"""
+
+
+def set_cache_size(srv, size):
+    srv.conn.eval(
+        'require("cartridge.graphql").set_query_cache_size(...)', [size])
+
+
+def run_requests(srv, body, count):
+    url = srv.baseurl + '/admin/api'
+    latencies = []
+    cpu_start = resources.read_proc(srv.process.pid).cpu
+    for _ in range(count):
+        time_start = time.perf_counter()
+        r = srv.session.post(url, json=body)
+        latencies.append((time.perf_counter() - time_start) * 1000)
+        r.raise_for_status()
+        assert 'errors' not in r.json(), r.json()
+    cpu = resources.read_proc(srv.process.pid).cpu - cpu_start
+
+    return {
+        'p50_ms': bench.percentile(latencies, 50),
+        'p99_ms': bench.percentile(latencies, 99),
+        'cpu_us_per_request': cpu / count * 1e6,
+    }
+
+
+def test_graphql_query_cache(cluster):
+    srv = cluster['router']
+    srv.connect()
+    persisted = {'persistedQuery': {
+        'version': 1,
+        'sha256Hash': hashlib.sha256(QUERY.encode()).hexdigest(),
+    }}
+
+    set_cache_size(srv, 0)
+    uncached = run_requests(srv, {'query': QUERY}, BENCH_REQUESTS)
+
+    set_cache_size(srv, 128)
+    cached = run_requests(srv, {'query': QUERY}, BENCH_REQUESTS)
+
+    # register the query, then send the hash only
+    run_requests(srv, {'query': QUERY, 'extensions': persisted}, 1)
+    hash_only = run_requests(srv, {'extensions': persisted}, BENCH_REQUESTS)
+
+    bench.report('graphql_query_cache', {
+        'requests': BENCH_REQUESTS,
+        'uncached': uncached,
+        'cached': cached,
+        'persisted': hash_only,
+        'cpu_us_saved': uncached['cpu_us_per_request'] - cached['cpu_us_per_request'],
+    })
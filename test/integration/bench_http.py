@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import bench
+import requests
+
+from conftest import Server
+
+cluster = [
+    Server(
+        alias = 'master',
+        instance_uuid = 'cccccccc-cccc-4000-b000-000000000001',
+        replicaset_uuid = 'cccccccc-0000-4000-b000-000000000000',
+        roles = [],
+        binary_port = 13321,
+        http_port = 8101,
+    )
+]
+
+QUERY = '{ cluster { self { uuid } } }'
+
+def test_keepalive(cluster):
+    srv = cluster['master']
+    url = srv.baseurl + '/admin/api'
+
+    def oneshot():
+        # what Server did before: a new connection for every request
+        r = requests.post(url, json={"query": QUERY})
+        r.raise_for_status()
+
+    def pooled():
+        srv.graphql(QUERY)
+
+    oneshot_rps = bench.throughput(oneshot)
+    pooled_rps = bench.throughput(pooled)
+
+    bench.report('http_keepalive', {
+        'oneshot_rps': oneshot_rps,
+        'pooled_rps': pooled_rps,
+        'speedup': pooled_rps / oneshot_rps,
+    })
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+import resources
+import threading
+
+from conftest import Server
+
+# Numbers of WebUI tabs polling issues at the same time
+BENCH_VIEWERS = [int(n) for n in
+    os.environ.get('BENCH_VIEWERS', '1,4,16,64').split(',')]
+# Seconds, TTL of the issues snapshot
+BENCH_SNAPSHOT_TTL = float(os.environ.get('BENCH_SNAPSHOT_TTL', 1.0))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = ['vshard-router'],
+    ),
+    Server(
+        alias = 'storage',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000002',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = ['vshard-storage'],
+    ),
+    Server(
+        alias = 'storage-replica',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000003',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = ['vshard-storage'],
+    )
+]
+
+ISSUES_QUERY = """
+    {
+        cluster {
+            issues { level topic message instance_uuid replicaset_uuid }
+        }
+    }
+"""
+
+
+def run_viewers(cluster, viewers, duration):
+    router = cluster['router']
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+    deadline = time.time() + duration
+
+    def viewer():
+        while time.time() < deadline:
+            time_start = time.perf_counter()
+            resp = router.graphql(ISSUES_QUERY)
+            elapsed = time.perf_counter() - time_start
+            with lock:
+                if 'errors' in resp:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed * 1000)
+
+    # the fan-out costs CPU on every instance, not only on the router
+    cpu_start = {alias: resources.read_proc(srv.process.pid).cpu
+                 for alias, srv in cluster.items()}
+    threads = [threading.Thread(target=viewer) for _ in range(viewers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cpu = sum(resources.read_proc(srv.process.pid).cpu - cpu_start[alias]
+              for alias, srv in cluster.items())
+
+    count = max(len(latencies), 1)
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'p50_ms': bench.percentile(latencies, 50),
+        'p99_ms': bench.percentile(latencies, 99),
+        'cluster_cpu_us_per_request': cpu / count * 1e6,
+    }
+
+
+def test_issues_viewers(cluster):
+    router = cluster['router']
+    router.connect()
+
+    result = {}
+    for mode, ttl in [('direct', 0), ('snapshot', BENCH_SNAPSHOT_TTL)]:
+        router.conn.eval('require("cartridge.issues").set_snapshot_ttl(...)', [ttl])
+        result[mode] = {
+            viewers: run_viewers(cluster, viewers, bench.BENCH_DURATION)
+            for viewers in BENCH_VIEWERS
+        }
+    router.conn.eval('require("cartridge.issues").set_snapshot_ttl(0)')
+
+    bench.report('issues_viewers', {
+        'snapshot_ttl': BENCH_SNAPSHOT_TTL,
+        'duration': bench.BENCH_DURATION,
+        'result': result,
+    })
+
+    for mode in result.values():
+        for stats in mode.values():
+            assert stats['errors'] == 0
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+
+from test_lexers import LuaLexer, TarantoolSessionLexer, TRANSCRIPT
+from test_lexers import lua_sources
+
+
+def test_lua_lexer():
+    texts = []
+    for path in lua_sources():
+        with open(path) as f:
+            texts.append(f.read())
+    size = sum(len(text) for text in texts)
+
+    def lex(lexer):
+        def fn():
+            for text in texts:
+                for _ in lexer.get_tokens_unprocessed(text):
+                    pass
+        return fn
+
+    regex_rps = bench.throughput(lex(LuaLexer(compiled=False)))
+    compiled_rps = bench.throughput(lex(LuaLexer()))
+
+    bench.report('lua_lexer', {
+        'files': len(texts),
+        'bytes': size,
+        'regex_bytes_per_second': regex_rps * size,
+        'compiled_bytes_per_second': compiled_rps * size,
+        'speedup': compiled_rps / regex_rps,
+    })
+
+
+# Transcript sizes in KiB
+BENCH_SESSION_SIZES = [int(n) for n in
+    os.environ.get('BENCH_SESSION_SIZES', '256,1024,4096').split(',')]
+
+
+def session_transcripts(size):
+    """Many short segments and a single huge one of each kind"""
+    rows = size // 32
+    yield 'segments', TRANSCRIPT * (size // len(TRANSCRIPT) + 1)
+    yield 'yaml', 'tarantool> box.space.test:select()\n---\n' + \
+        "- [1, 'a', 'some text']\n" * rows + '...\n'
+    yield 'lua', 'tarantool> x = {\n' + \
+        "         >   1, 'a', 'some text',\n" * rows + '         > }\n'
+
+
+def test_session_scaling(tmpdir):
+    lexer = TarantoolSessionLexer()
+    curve = []
+    for kib in BENCH_SESSION_SIZES:
+        for kind, text in session_transcripts(kib * 1024):
+            path = tmpdir.join('{}-{}.txt'.format(kind, kib))
+            path.write(text)
+            time_start = time.time()
+            with open(str(path)) as f:
+                for _ in lexer.get_tokens_from_lines(f):
+                    pass
+            seconds = time.time() - time_start
+            curve.append({
+                'kind': kind,
+                'bytes': len(text),
+                'seconds': seconds,
+                'bytes_per_second': len(text) / seconds,
+            })
+
+    bench.report('session_lexer_scaling', {'curve': curve})
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import bench
+import logging
+import py
+
+from conftest import PhaseTimer, TOPOLOGY_TIMEOUT, EDIT_TOPOLOGY_MUTATION
+from conftest import bringup_parallel, build_replicasets, map_parallel
+from conftest import workdir_path
+from bench_topology import generate_topology, build_servers
+
+# Number of instances in every topology, see bench_topology.py
+BENCH_SIZES = [int(n) for n in os.environ.get('BENCH_RPC_SIZES', '3,9,17,33').split(',')]
+
+# Calls are made by the router in a loop for BENCH_DURATION seconds.
+# "uncached" drops memoized candidates before every call, which is what
+# every call cost before.
+MEASURE = """
+    local mode, fn, duration = ...
+    local fiber = require('fiber')
+    local rpc = require('cartridge.rpc')
+    local vars = require('cartridge.vars').new('cartridge.rpc')
+
+    local call
+    if fn == 'get_candidates' then
+        call = function()
+            return rpc.get_candidates('myrole-permanent', {leader_only = true})
+        end
+    else
+        call = function()
+            return assert(rpc.call('myrole-permanent', 'cow_goes', nil,
+                {leader_only = true, prefer_local = false}))
+        end
+    end
+
+    local count = 0
+    local deadline = fiber.clock() + duration
+    while fiber.clock() < deadline do
+        if mode == 'uncached' then
+            vars.candidates_sources = {}
+        end
+        call()
+        count = count + 1
+    end
+    return count / duration
+"""
+
+
+def measure(servers, helpers, start):
+    router = servers[0]
+    rest = servers[1:]
+
+    bringup_parallel({}, [router], PhaseTimer(), helpers, start)
+    for srv in rest:
+        start(srv)
+    map_parallel(lambda srv: srv.wait_ready(), rest)
+    helpers.wait_for(router.probe_uris, [[srv.advertise_uri for srv in rest]])
+
+    resp = router.graphql(
+        query = EDIT_TOPOLOGY_MUTATION,
+        variables = {"replicasets": build_replicasets(rest)},
+        timeout = TOPOLOGY_TIMEOUT
+    )
+    assert "errors" not in resp, resp['errors'][0]['message']
+    map_parallel(lambda srv: srv.wait_configured(), rest)
+
+    result = {}
+    for fn in ['get_candidates', 'call']:
+        for mode in ['uncached', 'cached']:
+            rps = router.conn.eval(MEASURE, [mode, fn, bench.BENCH_DURATION])[0]
+            result['{}_{}_rps'.format(fn, mode)] = rps
+    return result
+
+
+def test_rpc_scale(helpers, port_allocator):
+    curve = []
+    for size in BENCH_SIZES:
+        basedir = py.path.local(tempfile.mkdtemp())
+        instances, replicasets = generate_topology(size)
+        servers = build_servers(instances, replicasets, str(basedir), port_allocator)
+
+        def start(srv):
+            srv.start(workdir=workdir_path(str(basedir), srv))
+
+        try:
+            result = measure(servers, helpers, start)
+        finally:
+            map_parallel(lambda srv: srv.kill(), [
+                srv for srv in servers if srv.process is not None
+            ])
+            basedir.remove(rec=1)
+
+        result['size'] = size
+        logging.warning('rpc in topology of {} instances: {}'.format(size, result))
+        curve.append(result)
+
+    bench.report('rpc_scale', {
+        'duration': bench.BENCH_DURATION,
+        'curve': curve,
+    })
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import bench
+import subprocess
+
+# Keep every module in a single worker so that module-scoped
+# cluster fixture isn't bootstrapped twice
+BENCH_WORKERS = int(os.environ.get('BENCH_WORKERS', os.cpu_count() or 1))
+
+project_root = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..')
+)
+
+def run_suite(*args):
+    time_start = time.time()
+    subprocess.run(
+        [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider'] + list(args),
+        cwd=project_root, check=True,
+    )
+    return time.time() - time_start
+
+def test_sharding():
+    serial = run_suite()
+    sharded = run_suite('-n', str(BENCH_WORKERS), '--dist', 'loadfile')
+
+    bench.report('suite_sharding', {
+        'workers': BENCH_WORKERS,
+        'serial_seconds': serial,
+        'sharded_seconds': sharded,
+        'speedup': serial / sharded,
+    })
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import os
+import bench
+
+from conftest import Server
+
+# Numbers of files in the archive
+BENCH_TAR_FILES = [int(n) for n in
+    os.environ.get('BENCH_TAR_FILES', '1,10,100,1000,10000').split(',')]
+# Total size of files in the archive, KiB
+BENCH_TAR_SIZE = int(os.environ.get('BENCH_TAR_SIZE', 10 * 1024))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = [],
+    )
+]
+
+# Lua heap growth is measured with GC stopped, so it accounts
+# every intermediate string created on the way.
+MEASURE = """
+    local count, total_size, duration = ...
+    local tar = require('cartridge.tar')
+    local clock = require('clock')
+    local digest = require('digest')
+
+    local files = {}
+    local file_size = math.floor(total_size / count)
+    for i = 1, count do
+        files[string.format('section-%05d.yml', i)] =
+            digest.urandom(math.ceil(file_size / 2)):hex():sub(1, file_size)
+    end
+
+    local function measure(fn)
+        collectgarbage()
+        collectgarbage('stop')
+        local kb_before = collectgarbage('count')
+        local result = fn()
+        local heap_growth = collectgarbage('count') - kb_before
+        collectgarbage('restart')
+
+        local n = 0
+        local t0 = clock.monotonic()
+        repeat
+            fn()
+            n = n + 1
+            if n % 10 == 0 then
+                collectgarbage('step')
+            end
+        until clock.monotonic() - t0 >= duration
+        local elapsed = clock.monotonic() - t0
+
+        return result, {
+            ops_per_second = n / elapsed,
+            mib_per_second = n * total_size / elapsed / 1024 / 1024,
+            lua_heap_growth_kib = heap_growth,
+        }
+    end
+
+    local packed, pack_stats = measure(function()
+        return assert(tar.pack(files))
+    end)
+    local _, unpack_stats = measure(function()
+        return assert(tar.unpack(packed))
+    end)
+
+    return {
+        archive_size = #packed,
+        pack = pack_stats,
+        unpack = unpack_stats,
+    }
+"""
+
+
+def test_tar_throughput(cluster):
+    router = cluster['router']
+    router.connect()
+
+    curve = []
+    for count in BENCH_TAR_FILES:
+        result = router.conn.eval(MEASURE,
+            [count, BENCH_TAR_SIZE * 1024, bench.BENCH_DURATION])[0]
+        result['files'] = count
+        curve.append(result)
+
+    bench.report('tar_throughput', {
+        'total_size_kib': BENCH_TAR_SIZE,
+        'curve': curve,
+    })
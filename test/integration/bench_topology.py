@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import uuid
+import yaml
+import bench
+import logging
+import tempfile
+import py
+
+from conftest import Server, PhaseTimer, TARANTOOL_CONNECTION_TIMEOUT
+from conftest import EDIT_TOPOLOGY_MUTATION, TOPOLOGY_TIMEOUT
+from conftest import bringup_parallel, build_replicasets, map_parallel
+from conftest import workdir_path
+
+# Number of instances in every topology, the first one is a router,
+# the rest are storages with REPLICAS instances per replicaset
+BENCH_SIZES = [int(n) for n in os.environ.get('BENCH_SIZES', '3,5,9,17,33').split(',')]
+BENCH_REPEAT = int(os.environ.get('BENCH_REPEAT', 5))
+REPLICAS = 2
+
+EDIT_ALIAS_MUTATION = """
+    mutation($uuid: String!, $alias: String!) {
+        cluster {
+            edit_topology(replicasets: [{uuid: $uuid, alias: $alias}]) {
+                replicasets { uuid }
+            }
+        }
+    }
+"""
+
+
+def generate_topology(size):
+    """Build instances.yml and replicasets.yml alike dicts"""
+    names = ['srv-{}'.format(i) for i in range(1, size + 1)]
+    replicasets = {
+        'R': {'instances': names[:1], 'roles': []},
+    }
+    storages = names[1:]
+    for n in range(0, len(storages), REPLICAS):
+        replicasets['S-{}'.format(n // REPLICAS + 1)] = {
+            'instances': storages[n:n + REPLICAS],
+            'roles': [],
+        }
+
+    instances = {'cartridge.{}'.format(name): {} for name in names}
+    return instances, replicasets
+
+
+def build_servers(instances, replicasets, basedir, port_allocator):
+    servers = []
+    for alias, replicaset in replicasets.items():
+        replicaset_uuid = str(uuid.uuid4())
+        for name in replicaset['instances']:
+            srv = Server(
+                alias = name,
+                instance_uuid = str(uuid.uuid4()),
+                replicaset_uuid = replicaset_uuid,
+                roles = replicaset['roles'],
+            )
+            srv.allocate_ports(port_allocator)
+            instances['cartridge.' + name].update({
+                'workdir': workdir_path(basedir, srv),
+                'advertise_uri': srv.advertise_uri,
+                'http_port': srv.http_port,
+            })
+            servers.append(srv)
+
+    # keep them next to workdirs for reproducing the run manually
+    with open(os.path.join(basedir, 'instances.yml'), 'w') as f:
+        yaml.safe_dump(instances, f, default_flow_style=False)
+    with open(os.path.join(basedir, 'replicasets.yml'), 'w') as f:
+        yaml.safe_dump(replicasets, f, default_flow_style=False)
+
+    return servers
+
+
+def twophase_phases(log, since):
+    """Durations of 2PC phases logged by the coordinator"""
+    events = log.events_since(since)
+    phases = {}
+    for (t1, n1), (t2, n2) in zip(events, events[1:]):
+        if n1.startswith('2pc ') and n1 != '2pc done':
+            phases[n1[len('2pc '):]] = t2 - t1
+        if n2 == '2pc done':
+            break
+    return phases
+
+
+def apply_time(log, since):
+    """Time spent between ConfiguringRoles and RolesConfigured"""
+    configuring = None
+    for t, state in log.states_since(since):
+        if state == 'ConfiguringRoles':
+            configuring = t
+        elif state == 'RolesConfigured' and configuring is not None:
+            return t - configuring
+    return None
+
+
+def measure(servers, helpers, start):
+    router = servers[0]
+    rest = servers[1:]
+
+    bringup_parallel({}, [router], PhaseTimer(), helpers, start)
+    for srv in rest:
+        start(srv)
+    map_parallel(lambda srv: srv.wait_ready(), rest)
+    helpers.wait_for(router.probe_uris, [[srv.advertise_uri for srv in rest]])
+
+    time_start = time.time()
+    resp = router.graphql(
+        query = EDIT_TOPOLOGY_MUTATION,
+        variables = {"replicasets": build_replicasets(rest)},
+        timeout = TOPOLOGY_TIMEOUT
+    )
+    assert "errors" not in resp, resp['errors'][0]['message']
+    join_seconds = time.time() - time_start
+    map_parallel(lambda srv: srv.wait_configured(), rest)
+
+    edits = []
+    for n in range(BENCH_REPEAT):
+        time_start = time.time()
+        resp = router.graphql(
+            query = EDIT_ALIAS_MUTATION,
+            variables = {"uuid": router.replicaset_uuid, "alias": "R-{}".format(n)},
+            timeout = TOPOLOGY_TIMEOUT
+        )
+        assert "errors" not in resp, resp['errors'][0]['message']
+        edit_seconds = time.time() - time_start
+
+        router.log.wait_event('2pc done', time_start, TARANTOOL_CONNECTION_TIMEOUT)
+
+        def applied(srv):
+            # log lines may still be on their way through the pipe
+            t = apply_time(srv.log, time_start)
+            assert t is not None, srv.alias
+            return t
+        applies = [helpers.wait_for(applied, [srv]) for srv in servers]
+
+        edits.append({
+            'edit_seconds': edit_seconds,
+            'phases': twophase_phases(router.log, time_start),
+            'apply_p50_seconds': bench.percentile(applies, 50),
+            'apply_max_seconds': max(applies),
+        })
+
+    edits.sort(key=lambda e: e['edit_seconds'])
+    median = edits[len(edits) // 2]
+    return dict(median, join_seconds=join_seconds)
+
+
+def test_topology_scale(helpers, port_allocator):
+    curve = []
+    for size in BENCH_SIZES:
+        basedir = py.path.local(tempfile.mkdtemp())
+        instances, replicasets = generate_topology(size)
+        servers = build_servers(instances, replicasets, str(basedir), port_allocator)
+
+        def start(srv):
+            srv.start(workdir=workdir_path(str(basedir), srv))
+
+        try:
+            result = measure(servers, helpers, start)
+        finally:
+            map_parallel(lambda srv: srv.kill(), [
+                srv for srv in servers if srv.process is not None
+            ])
+            basedir.remove(rec=1)
+
+        result['size'] = size
+        logging.warning('Topology of {} instances: {}'.format(size, result))
+        curve.append(result)
+
+    bench.report('topology_scale', {
+        'repeat': BENCH_REPEAT,
+        'curve': curve,
+    })
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import shutil
+import bench
+
+rst_abspath = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'rst')
+)
+sys.path.insert(0, os.path.join(rst_abspath, 'locale'))
+
+import update
+
+
+def timed(fn, *args, **kwargs):
+    time_start = time.time()
+    ret = fn(*args, **kwargs)
+    return time.time() - time_start, ret
+
+
+def edit_one_word(path):
+    with open(path) as f:
+        text = f.read()
+    with open(path, 'w') as f:
+        f.write(text.replace(' the ', ' THE ', 1))
+
+
+def test_incremental_update(tmpdir):
+    srcdir = str(tmpdir.join('rst'))
+    shutil.copytree(rst_abspath, srcdir,
+        ignore=shutil.ignore_patterns('_build', '__pycache__'))
+    builddir = str(tmpdir.join('build'))
+
+    result = {}
+    result['cold_seconds'], changed = timed(update.update, srcdir, builddir, 'ru')
+    result['cold_catalogs'] = len(changed)
+
+    result['noop_seconds'], changed = timed(update.update, srcdir, builddir, 'ru')
+    assert changed == []
+
+    edit_one_word(os.path.join(srcdir, 'troubleshooting.rst'))
+    result['edit_seconds'], changed = timed(update.update, srcdir, builddir, 'ru')
+    assert changed == ['troubleshooting']
+
+    edit_one_word(os.path.join(srcdir, 'topics', 'failover.rst'))
+    result['edit_include_seconds'], changed = timed(update.update,
+        srcdir, builddir, 'ru')
+    assert changed == ['cartridge_dev']
+
+    result['force_seconds'], _ = timed(update.update, srcdir, builddir, 'ru',
+        force=True)
+
+    bench.report('translations_update', result)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import bench
+import resources
+import threading
+
+from conftest import Server
+
+# Sizes of the uploaded config section, MiB
+BENCH_UPLOAD_SIZES = [int(n) for n in
+    os.environ.get('BENCH_UPLOAD_SIZES', '1,10,50,100').split(',')]
+# Chunk size of the streamed mode, bytes
+BENCH_CHUNK_SIZE = int(os.environ.get('BENCH_CHUNK_SIZE', 1024 * 1024))
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000001',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000001',
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-1',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000002',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-2',
+        instance_uuid = 'eeeeeeee-eeee-4000-b000-000000000003',
+        replicaset_uuid = 'eeeeeeee-0000-4000-b000-000000000002',
+        roles = [],
+    )
+]
+
+PATCH_SECTION = """
+    local size = ...
+    local text = require('digest').urandom(size / 2):hex()
+    collectgarbage()
+    return require('cartridge').config_patch_clusterwide({['bench.txt'] = text})
+"""
+
+
+class PeakRSS(object):
+    """Track the maximum RSS of the processes while the block runs"""
+    def __init__(self, servers, interval=0.05):
+        self.servers = servers
+        self.interval = interval
+        self.peak = {}
+
+    def _run(self):
+        while not self.done.is_set():
+            for srv in self.servers:
+                sample = resources.read_proc(srv.process.pid)
+                if sample is not None:
+                    self.peak[srv.alias] = max(self.peak.get(srv.alias, 0), sample.rss)
+            self.done.wait(self.interval)
+
+    def __enter__(self):
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.done.set()
+        self.thread.join()
+
+
+def test_upload_scaling(cluster, module_tmpdir):
+    servers = list(cluster.values())
+    for srv in servers:
+        srv.connect()
+        # every instance is a transmitter, as if they were on different hosts
+        srv.conn.eval('require("cartridge.upload").set_upload_prefix(...)',
+            [os.path.join(module_tmpdir, 'upload-' + srv.alias)])
+
+    router = cluster['router']
+    router.conn.eval('require("cartridge.twophase").set_upload_config_timeout(300)')
+
+    result = {}
+    for mode, chunk_size in [('single', 0), ('streamed', BENCH_CHUNK_SIZE)]:
+        router.conn.eval('require("cartridge.twophase").set_upload_chunk_size(...)',
+            [chunk_size])
+        result[mode] = {}
+        for mib in BENCH_UPLOAD_SIZES:
+            baseline = {srv.alias: resources.read_proc(srv.process.pid).rss
+                        for srv in servers}
+            with PeakRSS(servers) as rss:
+                time_start = time.time()
+                resp = router.conn.eval(PATCH_SECTION, [mib * 1024 * 1024])
+                elapsed = time.time() - time_start
+            assert resp[0] is True, resp
+
+            result[mode][mib] = {
+                'seconds': elapsed,
+                'coordinator_peak_rss_mib':
+                    rss.peak['router'] / 1024 / 1024,
+                'coordinator_rss_growth_mib':
+                    (rss.peak['router'] - baseline['router']) / 1024 / 1024,
+                'max_peak_rss_mib':
+                    max(rss.peak[srv.alias] for srv in servers) / 1024 / 1024,
+            }
+
+    bench.report('upload_scaling', {
+        'chunk_size': BENCH_CHUNK_SIZE,
+        'sizes_mib': BENCH_UPLOAD_SIZES,
+        'result': result,
+    })
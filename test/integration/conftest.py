@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import re
+import json
+import yaml
+import shutil
 import pytest
 import logging
 import tempfile
@@ -8,10 +12,16 @@ import py
 import tarantool
 import time
 import requests
+import readiness
+import ports
+import aio
+import resources
 
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from socket import socket, AF_INET, SOCK_DGRAM
 from socket import timeout as SocketTimeout
-from subprocess import Popen, PIPE, STDOUT
+from subprocess import Popen, PIPE, STDOUT, TimeoutExpired
 
 logging.basicConfig(format='%(name)s > %(message)s', level=logging.INFO)
 
@@ -23,26 +33,37 @@ srv_abspath = os.path.realpath(
 
 TARANTOOL_CONNECTION_TIMEOUT = 5.0
 
+# edit_topology runs a 2PC across every joined server at once
+TOPOLOGY_TIMEOUT = 30.0
+
 COOKIE = 'cluster-cookies-for-the-cluster-monster'
 
+
+def worker_cookie():
+    """Clusters of different pytest-xdist workers must never talk"""
+    if ports.worker_id() is None:
+        return COOKIE
+    return '{}-{}'.format(COOKIE, ports.worker_id())
+
+
+def worker_mkdtemp():
+    if ports.worker_id() is None:
+        return tempfile.mkdtemp()
+    return tempfile.mkdtemp(prefix='cartridge-{}-'.format(ports.worker_id()))
+
+# Keep-alive connections per Server, enough for parallel bring-up
+HTTP_POOL_SIZE = 32
+
+# Instance states to stop waiting at, the errors fail fast
+CONFIGURED_STATES = ('RolesConfigured', 'BootError', 'OperationError')
+FAILED_STATES = ('BootError', 'OperationError')
+
 class Helpers:
     @staticmethod
     def wait_for(fn, args=[], kwargs={}, timeout=TARANTOOL_CONNECTION_TIMEOUT):
         """Repeatedly call fn(*args, **kwargs)
         until it returns something or timeout occurs"""
-        time_start = time.time()
-        while True:
-            now = time.time()
-            if now > time_start + timeout:
-                break
-
-            try:
-                return fn(*args, **kwargs)
-            except:
-                time.sleep(0.1)
-
-        # after timeout call fn once more to propagate exception
-        return fn(*args, **kwargs)
+        return readiness.wait_for(fn, args, kwargs, timeout)
 
     @staticmethod
     def find(array, key, value):
@@ -56,11 +77,23 @@ def helpers():
 
 @pytest.fixture(scope='module')
 def module_tmpdir(request):
-    dir = py.path.local(tempfile.mkdtemp())
+    dir = py.path.local(worker_mkdtemp())
     request.addfinalizer(lambda: dir.remove(rec=1))
     return str(dir)
 
 
+@pytest.fixture(scope='session')
+def cluster_templates(request):
+    dir = py.path.local(worker_mkdtemp())
+    request.addfinalizer(lambda: dir.remove(rec=1))
+    return ClusterTemplates(str(dir))
+
+
+@pytest.fixture(scope='session')
+def port_allocator():
+    return ports.PortAllocator()
+
+
 @pytest.fixture(scope='module')
 def datadir(request):
     dir = os.path.join(request.fspath.dirname, 'data')
@@ -76,21 +109,24 @@ def confdir(request):
 
 
 class Server(object):
-    def __init__(self, binary_port, http_port,
+    def __init__(self, binary_port=None, http_port=None,
                 alias=None, instance_uuid=None,
                 replicaset_uuid=None, roles=None,
                 labels=None, vshard_group=None):
+        """Ports which aren't specified are allocated
+        by the cluster fixture before the server starts"""
 
         self.script = "srv_basic.lua"
 
         self.alias = alias
-        self.binary_port = binary_port
-        self.http_port = http_port
-        self.advertise_uri = 'localhost:{}'.format(self.binary_port)
-        self.baseurl = 'http://localhost:{}'.format(http_port)
+        self.set_ports(binary_port, http_port)
+        self.ports_allocated = False
 
         self.conn = None
         self.env = None
+        self.process = None
+        self._session = None
+        self._aio = None
 
         self.instance_uuid = instance_uuid
         self.replicaset_uuid = replicaset_uuid
@@ -100,14 +136,26 @@ class Server(object):
 
         pass
 
+    def set_ports(self, binary_port, http_port):
+        self.binary_port = binary_port
+        self.http_port = http_port
+        self.advertise_uri = 'localhost:{}'.format(self.binary_port)
+        self.baseurl = 'http://localhost:{}'.format(http_port)
+
+    def allocate_ports(self, allocator):
+        if not self.ports_allocated:
+            self.set_ports(allocator.allocate(), allocator.allocate())
+            self.ports_allocated = True
+
     def start(self, script=None, workdir=None, env={}):
+        assert self.binary_port != None and self.http_port != None
         if self.env == None:
             self.env = os.environ.copy()
             self.env['TARANTOOL_ALIAS'] = str(self.alias)
             self.env['TARANTOOL_WORKDIR'] = str(workdir)
             self.env['TARANTOOL_HTTP_PORT'] = str(self.http_port)
             self.env['TARANTOOL_ADVERTISE_URI'] = str(self.advertise_uri)
-            self.env['TARANTOOL_CLUSTER_COOKIE'] = COOKIE
+            self.env['TARANTOOL_CLUSTER_COOKIE'] = worker_cookie()
 
         if script != None:
             self.script = script
@@ -123,9 +171,53 @@ class Server(object):
             self.env[var_name] = var_value
         logging.warning(' '.join(command))
 
-        self.process = Popen(command, env=self.env)
+        self.process = Popen(command, env=self.env, stdout=PIPE, stderr=STDOUT)
+        self.log = readiness.LogWatcher(self.process.stdout)
+        resources.watch(self.alias, self.process.pid)
         logging.warning('PID %d', self.process.pid)
 
+    def fail(self, reason):
+        raise RuntimeError('{} {}, last output:\n{}'.format(
+            self.alias, reason, self.log.last_lines()))
+
+    def check_alive(self):
+        """Fail right away if the process has exited"""
+        if self.log.closed:
+            # The output is closed a moment before the process is gone
+            try:
+                self.process.wait(1)
+            except TimeoutExpired:
+                pass
+        code = self.process.poll()
+        if code is not None:
+            self.fail('exited with code {}'.format(code))
+
+    def check_marker(self, name, timeout):
+        if not self.log.wait_marker(name, timeout):
+            self.check_alive()
+            self.fail('did not log {!r} marker in {:.3f}s'.format(name, timeout))
+        self.check_alive()
+
+    def wait_ready(self, timeout=TARANTOOL_CONNECTION_TIMEOUT):
+        """Wait until the instance accepts binary and membership requests.
+        The log is watched first, probes only confirm it"""
+        self.check_marker('remote_control', timeout)
+        Helpers.wait_for(self.ping_udp, timeout=timeout)
+
+    def wait_http(self, timeout=TARANTOOL_CONNECTION_TIMEOUT):
+        self.check_marker('http', timeout)
+        Helpers.wait_for(self.graphql, ["{}"], timeout=timeout)
+
+    def wait_configured(self, timeout=TARANTOOL_CONNECTION_TIMEOUT):
+        """Wait until the instance applies the config and connect to it"""
+        if not self.log.wait_state(CONFIGURED_STATES, timeout):
+            self.check_alive()
+            self.fail('is still {} after {:.3f}s'.format(self.log.state, timeout))
+        if self.log.state in FAILED_STATES:
+            self.fail('failed with {}'.format(self.log.state))
+        self.check_alive()
+        Helpers.wait_for(self.connect, timeout=timeout)
+
     def ping_udp(self):
         s = socket(AF_INET, SOCK_DGRAM)
         s.settimeout(0.1)
@@ -152,70 +244,135 @@ class Server(object):
                 user='admin',
                 password=self.env['TARANTOOL_CLUSTER_COOKIE']
             )
-        resp = self.conn.eval('return is_initialized()')
+        resp = self.conn.call('is_initialized')
         err = resp[1] if len(resp) > 1 else None
         assert (resp[0], err) == (True, None)
 
+    def call_batch(self, calls, timeout=TARANTOOL_CONNECTION_TIMEOUT):
+        """Call functions pipelined over a single connection.
+        calls is a list of (fn_name, args), returns a list of results.
+        Works before the instance is bootstrapped as well"""
+        if self._aio is None:
+            self._aio = aio.AsyncServer.of(self)
+        try:
+            return aio.loop_thread().run(self._aio.batch(calls, timeout))
+        except aio.CONNECTION_ERRORS:
+            # start over with a new connection next time
+            self.close_aio()
+            raise
+
+    def close_aio(self):
+        if self._aio is not None:
+            aio.loop_thread().run(self._aio.close())
+            self._aio = None
+
     def cluster_is_healthy(self):
-        self.conn.eval("assert(package.loaded['cartridge'].is_healthy())")
+        resp = self.conn.call('package.loaded.cartridge.is_healthy')
+        assert resp[0] == True, resp
+
+    def probe_uris(self, uris):
+        """Make membership of the instance aware of all uris at once"""
+        results = self.call_batch([
+            ('package.loaded.membership.probe_uri', [uri]) for uri in uris
+        ])
+        for uri, resp in zip(uris, results):
+            assert resp[0] == True, (uri, resp)
+
+    @property
+    def session(self):
+        """Keep-alive HTTP session to the instance"""
+        if self._session is None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=HTTP_POOL_SIZE
+            )
+            self._session = requests.Session()
+            self._session.mount('http://', adapter)
+        return self._session
 
-    def kill(self):
+    def close_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def close_connections(self):
         if self.conn != None:
             # logging.warning('Closing connection to {}'.format(self.port))
             self.conn.close()
             self.conn = None
+        self.close_session()
+        self.close_aio()
+
+    def kill(self):
+        self.close_connections()
         self.process.kill()
+        # reap it, otherwise zombies pile up until the session ends
+        self.process.wait()
         logging.warning('localhost:'+str(self.binary_port)+' killed')
 
+    def stop(self, timeout=TARANTOOL_CONNECTION_TIMEOUT):
+        """Terminate the process with SIGTERM and reap it.
+        Fall back to SIGKILL if it doesn't exit within timeout"""
+        self.close_connections()
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except TimeoutExpired:
+            logging.warning('localhost:{} ignored SIGTERM for {:.3f}s'.format(
+                self.binary_port, timeout))
+            self.process.kill()
+            self.process.wait()
+        logging.warning('localhost:'+str(self.binary_port)+' stopped')
+
     def get(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.get(url, data=data, json=json, headers=headers, **args)
+        r = self.session.get(url, data=data, json=json, headers=headers, **args)
         r.raise_for_status()
 
         return r.text
 
     def get_raw(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.get(url, data=data, json=json, headers=headers, **args)
+        r = self.session.get(url, data=data, json=json, headers=headers, **args)
         r.raise_for_status()
 
         return r
 
     def put(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.put(url, data=data, json=json, headers=headers, **args)
+        r = self.session.put(url, data=data, json=json, headers=headers, **args)
         r.raise_for_status()
 
         return r.text
 
     def put_raw(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.put(url, data=data, json=json, headers=headers, **args)
+        r = self.session.put(url, data=data, json=json, headers=headers, **args)
 
         return r
 
     def post(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.post(url, data=data, json=json, headers=headers, **args)
+        r = self.session.post(url, data=data, json=json, headers=headers, **args)
         r.raise_for_status()
 
         return r.text
 
     def post_raw(self, path, data=None, json=None, headers=None, **args):
         url = self.baseurl + '/' + path.lstrip('/')
-        r = requests.post(url, data=data, json=json, headers=headers, **args)
+        r = self.session.post(url, data=data, json=json, headers=headers, **args)
 
         return r
 
-    def graphql(self, query, variables=None, headers=None, **kwargs):
+    def graphql(self, query, variables=None, headers=None,
+                timeout=TARANTOOL_CONNECTION_TIMEOUT, **kwargs):
         url = self.baseurl + '/admin/api'
 
         request = {"query": query, "variables": variables}
 
-        r = requests.post(url,
+        r = self.session.post(url,
             json=request,
             headers=headers,
-            timeout=TARANTOOL_CONNECTION_TIMEOUT,
+            timeout=timeout,
             **kwargs
         )
 
@@ -226,78 +383,398 @@ class Server(object):
             logging.warning(json['errors'])
         return json
 
-@pytest.fixture(scope="module")
-def cluster(request, confdir, module_tmpdir, helpers):
-    cluster = {}
-    bootserv = None
-    env = getattr(request.module, "env", {})
-    init_script = getattr(request.module, "init_script", None)
+# Tarantool never modifies these files in place after they are written,
+# so template copies can share them with the template itself
+IMMUTABLE_SUFFIXES = ('.snap', '.xlog')
 
-    for srv in getattr(request.module, "cluster", []):
-        assert srv.roles != None
-        assert srv.alias != None
-        srv.start(
-            script=init_script,
-            workdir="{}/localhost-{}".format(module_tmpdir, srv.binary_port),
-            env=env
+
+def clone_file(src, dst):
+    if src.endswith(IMMUTABLE_SUFFIXES):
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            # e.g. cross-device link, fall back to copying
+            pass
+    shutil.copy2(src, dst)
+
+
+def clone_workdir(src, dst):
+    for root, dirs, files in os.walk(src):
+        target = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            clone_file(os.path.join(root, name), os.path.join(target, name))
+
+
+def rewrite_topology(workdir, uris):
+    """Replace server URIs in the clusterwide config saved in workdir"""
+    path = os.path.join(workdir, 'config', 'topology.yml')
+    if not os.path.exists(path):
+        return
+
+    with open(path) as f:
+        topology = yaml.safe_load(f)
+
+    for srv in (topology.get('servers') or {}).values():
+        if isinstance(srv, dict) and srv.get('uri') in uris:
+            srv['uri'] = uris[srv['uri']]
+
+    with open(path, 'w') as f:
+        yaml.safe_dump(topology, f,
+            default_flow_style=False, explicit_start=True, explicit_end=True
         )
-        request.addfinalizer(srv.kill)
-        helpers.wait_for(srv.ping_udp)
-        if len(cluster) == 0:
-            bootserv = srv
-            helpers.wait_for(srv.graphql, ["{}"])
-        else:
-            helpers.wait_for(bootserv.conn.eval,
-                ["assert(require('membership').probe_uri(...))", srv.advertise_uri]
+
+
+class ClusterTemplate(object):
+    """Workdirs of a bootstrapped and stopped cluster"""
+    def __init__(self, basedir, servers):
+        self.basedir = basedir
+        self.workdirs = {}
+        self.uris = {}
+        for srv in servers:
+            self.workdirs[srv.alias] = workdir_path(basedir, srv)
+            self.uris[srv.alias] = srv.advertise_uri
+
+    def clone(self, basedir, servers):
+        """Copy template workdirs for servers into basedir.
+        Servers may listen other ports than the template ones,
+        they're rewritten in the clusterwide config copies"""
+        uris = {}
+        for srv in servers:
+            uris[self.uris[srv.alias]] = srv.advertise_uri
+
+        for srv in servers:
+            workdir = workdir_path(basedir, srv)
+            clone_workdir(self.workdirs[srv.alias], workdir)
+            rewrite_topology(workdir, uris)
+
+
+class ClusterTemplates(object):
+    """Session-wide registry of cluster templates keyed by topology.
+    Instance UUIDs are persisted in snapshots and can't be rewritten,
+    so they are part of the key. Ports aren't."""
+    def __init__(self, basedir):
+        self.basedir = basedir
+        self.templates = {}
+
+    @staticmethod
+    def key(servers, init_script, env):
+        return json.dumps({
+            'init_script': init_script,
+            'env': env,
+            'servers': [{
+                'alias': srv.alias,
+                'instance_uuid': srv.instance_uuid,
+                'replicaset_uuid': srv.replicaset_uuid,
+                'roles': srv.roles,
+                'labels': srv.labels,
+                'vshard_group': srv.vshard_group,
+            } for srv in servers],
+        }, sort_keys=True)
+
+    def get(self, key):
+        return self.templates.get(key)
+
+    def mkdir(self):
+        return tempfile.mkdtemp(dir=self.basedir)
+
+    def add(self, key, basedir, servers):
+        template = ClusterTemplate(basedir, servers)
+        self.templates[key] = template
+        return template
+
+
+def workdir_path(basedir, srv):
+    return "{}/localhost-{}".format(basedir, srv.binary_port)
+
+
+JOIN_SERVER_MUTATION = """
+    mutation(
+        $uri: String!
+        $instance_uuid: String
+        $replicaset_uuid: String
+        $roles: [String!]
+        $timeout: Float,
+        $labels: [LabelInput]
+        $vshard_group: String
+    ) {
+        join_server(
+            uri: $uri,
+            instance_uuid: $instance_uuid,
+            replicaset_uuid: $replicaset_uuid,
+            roles: $roles
+            timeout: $timeout
+            labels: $labels
+            vshard_group: $vshard_group
+        )
+    }
+"""
+
+EDIT_TOPOLOGY_MUTATION = """
+    mutation($replicasets: [EditReplicasetInput]) {
+        cluster {
+            edit_topology(replicasets: $replicasets) {
+                servers { uri }
+            }
+        }
+    }
+"""
+
+BRINGUP_MODES = ('serial', 'parallel')
+TEARDOWN_MODES = ('kill', 'graceful')
+# Graceful teardown waits that long for all instances together
+STOP_TIMEOUT = 10.0
+RESOURCE_INTERVAL = 0.5
+METRICS_PATH = '/admin/metrics'
+
+bringup_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bringup', choices=BRINGUP_MODES, default='serial',
+        help='How the cluster fixture starts instances (default: serial)')
+    parser.addoption('--allocate-ports', action='store_true', default=False,
+        help='Replace hardcoded server ports with allocated ones.'
+            ' Always enabled in pytest-xdist workers')
+    parser.addoption('--cluster-templates', action='store_true', default=False,
+        help='Bootstrap each distinct topology once per session'
+            ' and start modules from a copy of its workdirs')
+    parser.addoption('--teardown', choices=TEARDOWN_MODES, default='kill',
+        help='How the cluster fixture shuts instances down: SIGKILL them'
+            ' or SIGTERM all at once and wait (default: kill)')
+    parser.addoption('--resource-interval', type=float, default=RESOURCE_INTERVAL,
+        help='Seconds between RSS, CPU time and fd count samples'
+            ' of every instance, 0 to disable (default: %(default)s)')
+    parser.addoption('--metrics-output', default=os.environ.get('METRICS_OUTPUT'),
+        help='Enable internal metrics of cluster instances and save their'
+            ' snapshot per test to this directory (default: $METRICS_OUTPUT)')
+
+
+def pytest_configure(config):
+    config.stash[bringup_key] = []
+    resources.start(config.getoption('resource_interval'))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # attribute waits (including module fixtures setup) to the test
+    readiness.stats.current = item.nodeid
+    if resources.sampler is not None:
+        resources.sampler.current = item.nodeid
+    yield
+    readiness.stats.current = None
+    if resources.sampler is not None:
+        resources.sampler.current = None
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    reports = config.stash.get(bringup_key, [])
+    if len(reports) > 0:
+        terminalreporter.section('cluster bring-up')
+        for module, mode, timings in reports:
+            phases = ', '.join(
+                '{} {:.3f}s'.format(phase, spent) for phase, spent in timings.items()
+            )
+            terminalreporter.write_line('{} [{}]: total {:.3f}s ({})'.format(
+                module, mode, sum(timings.values()), phases
+            ))
+
+    waits = readiness.stats.records
+    if len(waits) > 0:
+        terminalreporter.section('readiness waits')
+        totals = {
+            nodeid: sum(r.elapsed for r in records)
+            for nodeid, records in waits.items()
+        }
+        for nodeid in sorted(totals, key=totals.get, reverse=True):
+            records = waits[nodeid]
+            slowest = max(records, key=lambda r: r.elapsed)
+            terminalreporter.write_line(
+                '{}: {} waits, {} attempts, {:.3f}s total,'
+                ' slowest {} {:.3f}s'.format(
+                    nodeid, len(records), sum(r.attempts for r in records),
+                    totals[nodeid], slowest.label, slowest.elapsed,
+                )
             )
 
+    sampler = resources.sampler
+    usage = {} if sampler is None else {
+        nodeid: sampler.report(nodeid) for nodeid in list(sampler.samples)
+        if nodeid is not None
+    }
+    usage = {nodeid: report for nodeid, report in usage.items() if len(report) > 0}
+    if len(usage) > 0:
+        terminalreporter.section('resource usage')
+        mib = 1024 * 1024
+        cpu = {
+            nodeid: sum(r['cpu'] for r in report.values())
+            for nodeid, report in usage.items()
+        }
+        for nodeid in sorted(cpu, key=cpu.get, reverse=True):
+            report = usage[nodeid]
+            rss = max(report, key=lambda alias: report[alias]['rss_max'])
+            fds = max(report, key=lambda alias: report[alias]['fds_max'])
+            terminalreporter.write_line(
+                '{}: {} instances, cpu {:.3f}s, rss max {:.1f}MiB ({}),'
+                ' rss growth {:.1f}MiB, fds max {} ({})'.format(
+                    nodeid, len(report), cpu[nodeid],
+                    report[rss]['rss_max'] / mib, rss,
+                    sum(r['rss_growth'] for r in report.values()) / mib,
+                    report[fds]['fds_max'], fds,
+                )
+            )
+
+
+class PhaseTimer(object):
+    """Accumulate wall-clock time spent in named phases"""
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        time_start = time.time()
+        try:
+            yield
+        finally:
+            spent = time.time() - time_start
+            self.timings[name] = self.timings.get(name, 0) + spent
+
+
+def map_parallel(fn, items):
+    """Call fn(item) for every item concurrently and return the results.
+    The first exception raised by any call is propagated."""
+    items = list(items)
+    if len(items) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        return list(executor.map(fn, items))
+
+
+def stop_all(servers, timeout=STOP_TIMEOUT):
+    """Send SIGTERM to all servers at once and wait for them to exit.
+    The timeout is shared, those still running past it get SIGKILL"""
+    deadline = time.time() + timeout
+    map_parallel(lambda srv: srv.stop(max(deadline - time.time(), 0)), servers)
+
+
+def teardown_cluster(servers, mode):
+    started = [srv for srv in servers if srv.process is not None]
+    if mode == 'graceful':
+        stop_all(started)
+    else:
+        for srv in reversed(started):
+            srv.kill()
+
+
+def bringup_serial(cluster, servers, timer, helpers, start):
+    bootserv = None
+
+    for srv in servers:
+        with timer.phase('start'):
+            start(srv)
+        with timer.phase('ping'):
+            srv.wait_ready()
+            if len(cluster) == 0:
+                bootserv = srv
+                srv.wait_http()
+            else:
+                helpers.wait_for(bootserv.probe_uris, [[srv.advertise_uri]])
+
         logging.warning('Join {} ({}) {} '.format(srv.advertise_uri, srv.alias, srv.roles))
-        resp = bootserv.graphql(
-            query = """
-                mutation(
-                    $uri: String!
-                    $instance_uuid: String
-                    $replicaset_uuid: String
-                    $roles: [String!]
-                    $timeout: Float,
-                    $labels: [LabelInput]
-                    $vshard_group: String
-                ) {
-                    join_server(
-                        uri: $uri,
-                        instance_uuid: $instance_uuid,
-                        replicaset_uuid: $replicaset_uuid,
-                        roles: $roles
-                        timeout: $timeout
-                        labels: $labels
-                        vshard_group: $vshard_group
-                    )
+        with timer.phase('join'):
+            resp = bootserv.graphql(
+                query = JOIN_SERVER_MUTATION,
+                variables = {
+                    "uri": srv.advertise_uri,
+                    "instance_uuid": srv.instance_uuid,
+                    "replicaset_uuid": srv.replicaset_uuid,
+                    "roles": srv.roles,
+                    "timeout": TARANTOOL_CONNECTION_TIMEOUT,
+                    "labels": srv.labels,
+                    "vshard_group": srv.vshard_group
                 }
-            """,
-            variables = {
-                "uri": srv.advertise_uri,
-                "instance_uuid": srv.instance_uuid,
-                "replicaset_uuid": srv.replicaset_uuid,
-                "roles": srv.roles,
-                "timeout": TARANTOOL_CONNECTION_TIMEOUT,
-                "labels": srv.labels,
-                "vshard_group": srv.vshard_group
-            }
-        )
-        assert "errors" not in resp, resp['errors'][0]['message']
+            )
+            assert "errors" not in resp, resp['errors'][0]['message']
 
         # wait when server is bootstrapped
-        helpers.wait_for(srv.connect)
+        with timer.phase('connect'):
+            srv.wait_configured()
 
         if len(cluster) != 0:
             # wait for bootserv to see that the new member is alive
-            helpers.wait_for(bootserv.cluster_is_healthy)
+            with timer.phase('healthy'):
+                helpers.wait_for(bootserv.cluster_is_healthy)
 
         # speedup tests by amplifying membership message exchange
         srv.conn.eval('require("membership.options").PROTOCOL_PERIOD_SECONDS = 0.2')
 
         cluster[srv.alias] = srv
 
+
+def build_replicasets(servers):
+    """Group servers by replicaset_uuid into EditReplicasetInput list.
+    Servers without replicaset_uuid form replicasets of their own."""
+    replicasets = []
+    replicaset_by_uuid = {}
+    for srv in servers:
+        replicaset = replicaset_by_uuid.get(srv.replicaset_uuid)
+        if replicaset is None:
+            replicaset = {
+                "uuid": srv.replicaset_uuid,
+                "roles": srv.roles,
+                "vshard_group": srv.vshard_group,
+                "join_servers": [],
+            }
+            replicasets.append(replicaset)
+            if srv.replicaset_uuid is not None:
+                replicaset_by_uuid[srv.replicaset_uuid] = replicaset
+
+        replicaset["join_servers"].append({
+            "uri": srv.advertise_uri,
+            "uuid": srv.instance_uuid,
+            "labels": srv.labels,
+        })
+    return replicasets
+
+
+def bringup_parallel(cluster, servers, timer, helpers, start):
+    if len(servers) == 0:
+        return
+    bootserv = servers[0]
+
+    with timer.phase('start'):
+        for srv in servers:
+            start(srv)
+
+    with timer.phase('ping'):
+        map_parallel(lambda srv: srv.wait_ready(), servers)
+        bootserv.wait_http()
+        helpers.wait_for(bootserv.probe_uris,
+            [[srv.advertise_uri for srv in servers[1:]]])
+
+    logging.warning('Join {} servers at once'.format(len(servers)))
+    with timer.phase('join'):
+        resp = bootserv.graphql(
+            query = EDIT_TOPOLOGY_MUTATION,
+            variables = {"replicasets": build_replicasets(servers)},
+            timeout = TOPOLOGY_TIMEOUT
+        )
+        assert "errors" not in resp, resp['errors'][0]['message']
+
+    with timer.phase('connect'):
+        map_parallel(lambda srv: srv.wait_configured(), servers)
+
+    with timer.phase('healthy'):
+        map_parallel(lambda srv: helpers.wait_for(srv.cluster_is_healthy), servers)
+
+    for srv in servers:
+        # speedup tests by amplifying membership message exchange
+        srv.conn.eval('require("membership.options").PROTOCOL_PERIOD_SECONDS = 0.2')
+        cluster[srv.alias] = srv
+
+
+def bootstrap_vshard(cluster, timer):
     routers = [srv for alias, srv in cluster.items() if 'vshard-router' in srv.roles]
     if len(routers) > 0:
         srv = routers[0]
@@ -312,23 +789,181 @@ def cluster(request, confdir, module_tmpdir, helpers):
         assert resp['data']['cluster']['can_bootstrap_vshard']
 
         logging.warning('Bootstrapping vshard.router on {}'.format(srv.advertise_uri))
-        resp = srv.graphql(
-            query = """
-                mutation { bootstrap_vshard }
-            """
-        )
+        with timer.phase('vshard'):
+            resp = srv.graphql(
+                query = """
+                    mutation { bootstrap_vshard }
+                """
+            )
         assert 'errors' not in resp, resp['errors'][0]['message']
     else:
         logging.warning('No vshard routers configured, skipping vshard bootstrap')
 
-    for srv in getattr(request.module, "unconfigured", []):
+
+def bootstrap_cluster(cluster, servers, mode, timer, helpers, start):
+    if mode == 'parallel':
+        bringup_parallel(cluster, servers, timer, helpers, start)
+    else:
+        bringup_serial(cluster, servers, timer, helpers, start)
+
+    bootstrap_vshard(cluster, timer)
+
+
+def restart_cluster(cluster, servers, timer, helpers, start):
+    """Start servers which are already bootstrapped"""
+    with timer.phase('start'):
+        for srv in servers:
+            start(srv)
+
+    with timer.phase('connect'):
+        map_parallel(lambda srv: srv.wait_configured(), servers)
+
+    with timer.phase('healthy'):
+        map_parallel(lambda srv: helpers.wait_for(srv.cluster_is_healthy), servers)
+
+    for srv in servers:
+        # speedup tests by amplifying membership message exchange
+        srv.conn.eval('require("membership.options").PROTOCOL_PERIOD_SECONDS = 0.2')
+        cluster[srv.alias] = srv
+
+
+def make_template(templates, key, servers, mode, timer, helpers, init_script, env):
+    basedir = templates.mkdir()
+
+    def start(srv):
+        srv.start(script=init_script, workdir=workdir_path(basedir, srv), env=env)
+
+    logging.warning('Bootstrapping cluster template in {}'.format(basedir))
+    template_timer = PhaseTimer()
+    try:
+        bootstrap_cluster({}, servers, mode, template_timer, helpers, start)
+    finally:
+        stop_all([srv for srv in servers if srv.process is not None])
+        for srv in servers:
+            # next start should pick up the new workdir
+            srv.env = None
+
+    for phase, spent in template_timer.timings.items():
+        timer.timings['template ' + phase] = spent
+
+    return templates.add(key, basedir, servers)
+
+
+@pytest.fixture(scope="module")
+def cluster(request, confdir, module_tmpdir, helpers):
+    cluster = {}
+    env = getattr(request.module, "env", {})
+    if request.config.getoption('metrics_output') is not None:
+        env = dict(env, TARANTOOL_INTERNAL_METRICS='true')
+    init_script = getattr(request.module, "init_script", None)
+    mode = getattr(request.module, "bringup", request.config.getoption('bringup'))
+    assert mode in BRINGUP_MODES, mode
+    use_templates = getattr(request.module, "cluster_template",
+        request.config.getoption('cluster_templates'))
+    teardown = getattr(request.module, "teardown", request.config.getoption('teardown'))
+    assert teardown in TEARDOWN_MODES, teardown
+
+    started = []
+    request.addfinalizer(lambda: teardown_cluster(started, teardown))
+
+    def start(srv):
         srv.start(
             script=init_script,
-            workdir="{}/localhost-{}".format(module_tmpdir, srv.binary_port),
-            env = env,
+            workdir=workdir_path(module_tmpdir, srv),
+            env=env
         )
-        request.addfinalizer(srv.kill)
-        helpers.wait_for(srv.ping_udp)
+        started.append(srv)
+
+    servers = getattr(request.module, "cluster", [])
+    for srv in servers:
+        assert srv.roles != None
+        assert srv.alias != None
+
+    unconfigured = getattr(request.module, "unconfigured", [])
+    allocate_all = request.config.getoption('allocate_ports') \
+        or ports.worker_id() is not None
+    for srv in servers + unconfigured:
+        if allocate_all or srv.binary_port is None or srv.http_port is None:
+            srv.allocate_ports(request.getfixturevalue('port_allocator'))
+
+    timer = PhaseTimer()
+    if use_templates and len(servers) > 0:
+        templates = request.getfixturevalue('cluster_templates')
+        key = templates.key(servers, init_script, env)
+        template = templates.get(key)
+        if template is None:
+            template = make_template(templates, key, servers, mode, timer,
+                helpers, init_script, env)
+
+        with timer.phase('clone'):
+            template.clone(module_tmpdir, servers)
+        restart_cluster(cluster, servers, timer, helpers, start)
+    else:
+        bootstrap_cluster(cluster, servers, mode, timer, helpers, start)
+
+    for srv in unconfigured:
+        start(srv)
         cluster[srv.alias] = srv
+    if mode == 'parallel':
+        map_parallel(lambda srv: srv.wait_ready(), unconfigured)
+    else:
+        for srv in unconfigured:
+            srv.wait_ready()
+
+    if len(timer.timings) > 0:
+        logging.warning('Cluster bring-up ({}): {}'.format(mode, timer.timings))
+        request.config.stash[bringup_key].append(
+            (request.module.__name__, mode, timer.timings)
+        )
 
     return cluster
+
+
+def is_running(srv):
+    return srv.process is not None and srv.process.poll() is None
+
+
+def reset_metrics(srv):
+    try:
+        if srv.conn is None:
+            srv.connect()
+        srv.conn.eval('require("cartridge.internal-metrics").reset()')
+    except Exception as e:
+        logging.warning('Reset metrics of {} failed: {}'.format(srv.alias, e))
+
+
+def save_metrics(srv, path):
+    try:
+        r = srv.get_raw(METRICS_PATH,
+            auth=('admin', srv.env['TARANTOOL_CLUSTER_COOKIE']),
+            timeout=TARANTOOL_CONNECTION_TIMEOUT)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning('Metrics of {} unavailable: {}'.format(srv.alias, e))
+        return
+    with open(path, 'w') as f:
+        f.write(r.text)
+
+
+@pytest.fixture(autouse=True)
+def internal_metrics(request):
+    """Save the internal metrics of every running instance collected
+    during the test, one Prometheus text file per instance:
+    <metrics-output>/<test id>/<alias>.prom"""
+    outdir = request.config.getoption('metrics_output')
+    if outdir is None or 'cluster' not in request.fixturenames:
+        yield
+        return
+
+    cluster = request.getfixturevalue('cluster')
+    for srv in cluster.values():
+        if is_running(srv):
+            reset_metrics(srv)
+
+    yield
+
+    testdir = os.path.join(outdir, re.sub(r'[^\w.-]+', '_', request.node.nodeid))
+    os.makedirs(testdir, exist_ok=True)
+    for alias, srv in cluster.items():
+        if is_running(srv):
+            save_metrics(srv, os.path.join(testdir, alias + '.prom'))
@@ -597,6 +597,45 @@ g.test_sigkill = function()
     t.assert_equals(get_master(replicaset_uuid), {storage_1_uuid, storage_1_uuid})
 end
 
+g.test_timeline = function()
+    set_failover(true)
+    set_master(replicaset_uuid, storage_1_uuid)
+    cluster:retrying({}, check_active_master, storage_1_uuid)
+
+    local server = cluster:server('storage-1')
+    server:stop()
+    cluster:retrying({}, check_active_master, storage_2_uuid)
+
+    -- The last step may still be in progress
+    local events = cluster:retrying({}, function()
+        local timeline = cluster:server('storage-2'):graphql({query = [[{
+            cluster {
+                failover_timeline { step event time mode leader_uuid read_only }
+            }
+        }]]}).data.cluster.failover_timeline
+
+        local step = timeline[#timeline].step
+        local events = fun.iter(timeline)
+            :filter(function(e) return e.step == step end)
+            :totable()
+        t.assert_equals(
+            fun.iter(events):map(function(e) return e.event end):totable(),
+            {'detection', 'decision', 'appointment', 'box_cfg', 'apply'}
+        )
+        return events
+    end)
+
+    for i = 2, #events do
+        t.assert_le(events[i - 1].time, events[i].time)
+    end
+    t.assert_covers(events[2], {mode = 'eventual', leader_uuid = storage_2_uuid})
+    t.assert_covers(events[4], {read_only = false})
+
+    server:start()
+    cluster:retrying({}, function() server:connect_net_box() end)
+    cluster:retrying({}, check_active_master, storage_1_uuid)
+end
+
 g.test_all_rw_failover = function()
     cluster:retrying({}, function() set_failover(true) end)
     set_all_rw(replicaset_uuid, true)
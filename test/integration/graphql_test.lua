@@ -290,3 +290,87 @@ function g.test_middleware()
         }
     )
 end
+
+function g.test_query_cache()
+    local server = cluster.main_server
+    server:eval([[
+        require('cartridge.graphql').set_query_cache_size(2)
+    ]])
+
+    local function cache_stats()
+        return server:eval([[
+            local cache = require('cartridge.vars').new('cartridge.graphql').query_cache
+            return {count = cache.count, hits = cache.hits, misses = cache.misses}
+        ]])
+    end
+
+    local q1 = '{ cluster { self { uuid } } }'
+    local q2 = '{ servers { uri } }'
+    local q3 = '{ replicasets { uuid } }'
+
+    server:graphql({query = q1})
+    server:graphql({query = q1})
+    t.assert_equals(cache_stats(), {count = 1, hits = 1, misses = 1})
+
+    -- Invalid queries aren't cached
+    t.assert_error_msg_equals(
+        'Field "unknown" is not defined on type "Server"',
+        helpers.Server.graphql, server, {query = '{ servers { unknown } }'}
+    )
+    t.assert_equals(cache_stats(), {count = 1, hits = 1, misses = 2})
+
+    -- The least recently used q1 is evicted
+    server:graphql({query = q2})
+    server:graphql({query = q3})
+    server:graphql({query = q1})
+    t.assert_equals(cache_stats(), {count = 2, hits = 1, misses = 5})
+
+    -- New types drop cached queries
+    server:eval([[
+        package.loaded['test'] = package.loaded['test'] or {}
+        package.loaded['test']['cached'] = function() return 'C' end
+
+        local graphql = require('cartridge.graphql')
+        local types = require('graphql.types')
+        graphql.add_callback({
+            name = 'cached',
+            kind = types.string.nonNull,
+            callback = 'test.cached',
+        })
+    ]])
+    t.assert_equals(server:graphql({query = '{ cached }'}).data.cached, 'C')
+    server:graphql({query = q1})
+    t.assert_equals(cache_stats(), {count = 2, hits = 0, misses = 2})
+
+    server:eval([[
+        require('cartridge.graphql').set_query_cache_size(128)
+    ]])
+end
+
+function g.test_persisted_queries()
+    local server = cluster.main_server
+    local digest = require('digest')
+
+    local query = '{ cluster { self { alias } } }'
+    local function request(body)
+        return server:http_request('post', '/admin/api', {json = body}).json
+    end
+
+    local persisted = {
+        persistedQuery = {version = 1, sha256Hash = digest.sha256_hex(query)},
+    }
+
+    t.assert_equals(request({extensions = persisted}), {errors = {{
+        message = 'PersistedQueryNotFound',
+        extensions = {code = 'PERSISTED_QUERY_NOT_FOUND'},
+    }}})
+
+    local expected = {data = {cluster = {self = {alias = server.alias}}}}
+    t.assert_equals(request({query = query, extensions = persisted}), expected)
+    t.assert_equals(request({extensions = persisted}), expected)
+
+    t.assert_equals(request({
+        query = '{ servers { uri } }',
+        extensions = persisted,
+    }), {errors = {{message = 'Provided sha256Hash does not match query'}}})
+end
@@ -115,6 +115,219 @@ function g.test_issues_limits()
     t.assert_equals(helpers.list_cluster_issues(server), {})
 end
 
+function g.test_snapshot()
+    g.master:exec(function()
+        _G.list_on_instance_original = _G.__cartridge_issues_list_on_instance
+        _G.list_on_instance_calls = 0
+        _G.__cartridge_issues_list_on_instance = function(...)
+            _G.list_on_instance_calls = _G.list_on_instance_calls + 1
+            return _G.list_on_instance_original(...)
+        end
+    end)
+
+    local function count_polls(mode)
+        return g.master:exec(function(mode)
+            local fiber = require('fiber')
+            local issues = require('cartridge.issues')
+            _G.list_on_instance_calls = 0
+            local fibers = {}
+            for i = 1, 5 do
+                local f = fiber.new(function()
+                    if mode == 'sequential' then
+                        fiber.sleep(i * 0.1)
+                    end
+                    return issues.list_on_cluster_cached()
+                end)
+                f:set_joinable(true)
+                table.insert(fibers, f)
+            end
+            for _, f in ipairs(fibers) do
+                assert(f:join())
+            end
+            return _G.list_on_instance_calls
+        end, {mode})
+    end
+
+    -- Concurrent requests share a single poll
+    t.assert_equals(count_polls('concurrent'), 1)
+    t.assert_equals(count_polls('sequential'), 5)
+
+    -- Requests within TTL are served from the snapshot
+    g.master:exec(function()
+        require('cartridge.issues').set_snapshot_ttl(60)
+    end)
+    t.assert_equals(count_polls('sequential'), 1)
+    t.assert_equals(count_polls('sequential'), 0)
+    t.assert_equals(helpers.list_cluster_issues(g.master), {})
+end
+
+g.after_test('test_snapshot', function()
+    g.master:exec(function()
+        require('cartridge.issues').set_snapshot_ttl(0)
+        _G.__cartridge_issues_list_on_instance = _G.list_on_instance_original
+    end)
+end)
+
+function g.test_snapshot_invalidation()
+    local function count_map_calls(ttl)
+        return g.master:exec(function(ttl)
+            local pool = require('cartridge.pool')
+            local issues = require('cartridge.issues')
+            issues.set_snapshot_ttl(ttl)
+
+            local calls = 0
+            local map_call_original = pool.map_call
+            pool.map_call = function(fn_name, ...)
+                if fn_name == '_G.__cartridge_issues_list_on_instance' then
+                    calls = calls + 1
+                end
+                return map_call_original(fn_name, ...)
+            end
+
+            issues.list_on_cluster_cached()
+            local before_apply = calls
+            local ok, err = require('cartridge').config_patch_clusterwide({
+                ['issues_test.txt'] = tostring(require('clock').time()),
+            })
+            assert(ok, err)
+            issues.list_on_cluster_cached()
+
+            pool.map_call = map_call_original
+            issues.set_snapshot_ttl(0)
+            return {before_apply, calls - before_apply}
+        end, {ttl})
+    end
+
+    -- The snapshot isn't reused after the config is applied
+    t.assert_equals(count_map_calls(60), {1, 1})
+end
+
+function g.test_snapshot_errors()
+    local ret = g.master:exec(function()
+        local fiber = require('fiber')
+        local pool = require('cartridge.pool')
+        local issues = require('cartridge.issues')
+
+        local calls = 0
+        local map_call_original = pool.map_call
+        pool.map_call = function()
+            calls = calls + 1
+            fiber.sleep(0.1)
+            error('Artificial map_call error', 0)
+        end
+
+        local fibers = {}
+        for _ = 1, 5 do
+            local f = fiber.new(pcall, issues.list_on_cluster_cached)
+            f:set_joinable(true)
+            table.insert(fibers, f)
+        end
+
+        local errors = {}
+        for _, f in ipairs(fibers) do
+            local _, ok, err = f:join()
+            assert(not ok)
+            table.insert(errors, err)
+        end
+
+        pool.map_call = map_call_original
+        return {calls = calls, errors = errors}
+    end)
+
+    -- Waiters get the failed result instead of retrying on their own
+    t.assert_equals(ret.calls, 1)
+    t.assert_equals(ret.errors, {
+        'Artificial map_call error',
+        'Artificial map_call error',
+        'Artificial map_call error',
+        'Artificial map_call error',
+        'Artificial map_call error',
+    })
+end
+
+function g.test_snapshot_side_effects()
+    local ret = g.master:exec(function(failing_uri)
+        local fiber = require('fiber')
+        local errors = require('errors')
+        local pool = require('cartridge.pool')
+        local issues = require('cartridge.issues')
+        local vars = require('cartridge.vars').new('cartridge.issues')
+
+        local map_call_original = pool.map_call
+        pool.map_call = function(fn_name, args, opts)
+            local uri_list = {}
+            local errmap = {}
+            for _, uri in ipairs(opts.uri_list) do
+                if uri == failing_uri then
+                    errmap[uri] = errors.new_class('ArtificialError'):new('Boo')
+                else
+                    table.insert(uri_list, uri)
+                end
+            end
+            local retmap, err = map_call_original(fn_name, args,
+                {uri_list = uri_list, timeout = opts.timeout}
+            )
+            for uri, e in pairs(err and err.suberrors or {}) do
+                errmap[uri] = e
+            end
+            if next(errmap) == nil then
+                return retmap
+            end
+            return retmap, pool.unite_errors(errmap)
+        end
+
+        issues.set_snapshot_ttl(0.2)
+        local _, err = issues.list_on_cluster_cached()
+
+        -- The aggregator rebuilds the snapshot, but doesn't handle issues
+        rawset(_G, '__cartridge_issues_cnt', -1)
+        local clock = vars.snapshot.clock
+        fiber.sleep(0.5)
+        local rebuilt = vars.snapshot.clock > clock
+        local issues_cnt = rawget(_G, '__cartridge_issues_cnt')
+
+        issues.set_snapshot_ttl(0)
+        pool.map_call = map_call_original
+        return {
+            rebuilt = rebuilt,
+            issues_cnt = issues_cnt,
+            class_name = err.class_name,
+            suberror = err.suberrors[failing_uri].class_name,
+        }
+    end, {g.replica2.advertise_uri})
+
+    t.assert_equals(ret, {
+        rebuilt = true,
+        issues_cnt = -1,
+        -- Same error as polling all instances at once
+        class_name = 'NetboxMapCallError',
+        suberror = 'ArtificialError',
+    })
+end
+
+function g.test_aggregator_restart()
+    local alive = g.master:exec(function()
+        local issues = require('cartridge.issues')
+        local vars = require('cartridge.vars').new('cartridge.issues')
+        issues.set_snapshot_ttl(60)
+        issues.list_on_cluster_cached()
+        local aggregator = vars.aggregator_fiber
+        assert(aggregator:status() ~= 'dead')
+
+        -- That's what hot reload does
+        aggregator:cancel()
+        require('fiber').yield()
+        assert(aggregator:status() == 'dead')
+
+        issues.list_on_cluster_cached()
+        local alive = vars.aggregator_fiber ~= aggregator
+            and vars.aggregator_fiber:status() ~= 'dead'
+        issues.set_snapshot_ttl(0)
+        return alive
+    end)
+    t.assert_equals(alive, true)
+end
+
 function g.test_broken_replica()
     g.master:eval([[
         __replication = box.cfg.replication
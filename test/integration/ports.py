@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import socket
+
+# Every pytest-xdist worker gets its own range of ports below
+# the ephemeral range used by the kernel for outgoing connections
+PORT_RANGE_BASE = 20000
+PORT_RANGE_SIZE = 500
+
+
+def worker_id():
+    """Name of the pytest-xdist worker (e.g. 'gw3') or None"""
+    return os.environ.get('PYTEST_XDIST_WORKER')
+
+
+def worker_index():
+    match = re.match(r'^gw(\d+)$', worker_id() or '')
+    return int(match.group(1)) if match else 0
+
+
+def port_is_free(port):
+    # Tarantool listens TCP on the binary port and UDP (membership) on the
+    # same port number, HTTP needs TCP only. Check both to be on the safe side.
+    for kind in (socket.SOCK_STREAM, socket.SOCK_DGRAM):
+        s = socket.socket(socket.AF_INET, kind)
+        try:
+            s.bind(('0.0.0.0', port))
+        except OSError:
+            return False
+        finally:
+            s.close()
+    return True
+
+
+class PortAllocator(object):
+    def __init__(self, index=None):
+        if index is None:
+            index = worker_index()
+        self.next = PORT_RANGE_BASE + index * PORT_RANGE_SIZE
+        self.end = self.next + PORT_RANGE_SIZE
+
+    def allocate(self):
+        """Return the next port of the range which isn't busy"""
+        while self.next < self.end:
+            port = self.next
+            self.next += 1
+            if port_is_free(port):
+                return port
+
+        raise RuntimeError('Port range exhausted')
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import re
+import sys
+import time
+import threading
+
+from collections import deque, namedtuple
+
+# Lifecycle messages cartridge writes to the log while booting
+MARKERS = {
+    'http': re.compile(r'Listening HTTP on '),
+    'remote_control': re.compile(r'Remote control ready to accept connections'),
+}
+STATE_RE = re.compile(r'Instance state changed: (\S+) -> (\S+)')
+# Clusterwide config 2PC progress, logged by the coordinator
+TWOPHASE_RE = re.compile(r'\(2PC\) \S+ (\w+) phase')
+TWOPHASE_DONE_RE = re.compile(r'Clusterwide config (?:updated successfully|update failed)')
+
+# Lines of output kept to explain why an instance failed
+TAIL_LINES = 20
+
+# Adaptive backoff: start polling fast, slow down exponentially
+BACKOFF_INITIAL = 0.005
+BACKOFF_FACTOR = 2
+BACKOFF_MAX = 0.25
+
+
+class Backoff(object):
+    def __init__(self, initial=BACKOFF_INITIAL, factor=BACKOFF_FACTOR,
+                 maximum=BACKOFF_MAX):
+        self.delay = initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def sleep(self, deadline):
+        """Sleep for the next delay, but never past the deadline"""
+        delay = min(self.delay, max(deadline - time.time(), 0))
+        time.sleep(delay)
+        self.delay = min(self.delay * self.factor, self.maximum)
+
+
+WaitRecord = namedtuple('WaitRecord', ['label', 'elapsed', 'attempts', 'ok'])
+
+
+class WaitStats(object):
+    """Durations and attempt counts of every wait, grouped by test"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = None
+        self.records = {}
+
+    def add(self, label, elapsed, attempts, ok):
+        with self.lock:
+            records = self.records.setdefault(self.current, [])
+            records.append(WaitRecord(label, elapsed, attempts, ok))
+
+    def pop(self, nodeid):
+        with self.lock:
+            return self.records.pop(nodeid, [])
+
+
+stats = WaitStats()
+
+
+def describe(fn, args):
+    label = getattr(fn, '__qualname__', None) or repr(fn)
+    owner = getattr(fn, '__self__', None)
+    alias = getattr(owner, 'alias', None)
+    if alias is not None:
+        label = '{}({})'.format(label, alias)
+    elif len(args) > 0 and isinstance(args[0], str):
+        label = '{}({!r})'.format(label, args[0][:40])
+    return label
+
+
+def wait_for(fn, args=[], kwargs={}, timeout=5.0, label=None):
+    """Repeatedly call fn(*args, **kwargs) with exponential backoff
+    until it returns something or timeout occurs"""
+    label = label or describe(fn, args)
+    time_start = time.time()
+    deadline = time_start + timeout
+    backoff = Backoff()
+    attempts = 0
+    ok = False
+    try:
+        while time.time() < deadline:
+            attempts += 1
+            try:
+                ret = fn(*args, **kwargs)
+                ok = True
+                return ret
+            except Exception:
+                backoff.sleep(deadline)
+
+        # after timeout call fn once more to propagate exception
+        attempts += 1
+        ret = fn(*args, **kwargs)
+        ok = True
+        return ret
+    finally:
+        stats.add(label, time.time() - time_start, attempts, ok)
+
+
+class LogWatcher(object):
+    """Copy process output to stderr and keep track of lifecycle markers
+    so that waiters are woken up right when a marker is logged"""
+    def __init__(self, stream, out=None):
+        self.stream = stream
+        self.out = out or sys.stderr
+        self.cond = threading.Condition()
+        self.seen = set()
+        self.state = None
+        # (time, state) and (time, event name) as they are logged
+        self.states = []
+        self.events = []
+        self.closed = False
+        self.tail = deque(maxlen=TAIL_LINES)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for raw in iter(self.stream.readline, b''):
+                line = raw.decode('utf-8', errors='replace')
+                self.out.write(line)
+                with self.cond:
+                    self.tail.append(line)
+                self._parse(line)
+        finally:
+            with self.cond:
+                self.closed = True
+                self.cond.notify_all()
+
+    def _parse(self, line):
+        for name, regex in MARKERS.items():
+            if regex.search(line):
+                with self.cond:
+                    self.seen.add(name)
+                    self.cond.notify_all()
+
+        match = STATE_RE.search(line)
+        if match:
+            with self.cond:
+                self.state = match.group(2)
+                self.states.append((time.time(), self.state))
+                self.cond.notify_all()
+
+        match = TWOPHASE_RE.search(line)
+        if match:
+            self._event('2pc ' + match.group(1))
+        elif TWOPHASE_DONE_RE.search(line):
+            self._event('2pc done')
+
+    def _event(self, name):
+        with self.cond:
+            self.events.append((time.time(), name))
+            self.cond.notify_all()
+
+    def _wait(self, predicate, timeout, label):
+        time_start = time.time()
+        with self.cond:
+            ok = self.cond.wait_for(
+                lambda: predicate() or self.closed, timeout
+            )
+            ok = ok and predicate()
+        stats.add(label, time.time() - time_start, 1, ok)
+        return ok
+
+    def wait_marker(self, name, timeout):
+        """Wait until the marker is logged.
+        Returns False on timeout or when the process exits"""
+        assert name in MARKERS, name
+        return self._wait(lambda: name in self.seen, timeout,
+            'log marker {}'.format(name))
+
+    def wait_state(self, states, timeout):
+        """Wait until the instance reports one of the states.
+        Returns False on timeout or when the process exits"""
+        return self._wait(lambda: self.state in states, timeout,
+            'log state {}'.format('|'.join(states)))
+
+    def wait_event(self, name, since, timeout):
+        """Wait until the event is logged after `since` timestamp"""
+        return self._wait(
+            lambda: any(t >= since and n == name for t, n in self.events),
+            timeout, 'log event {}'.format(name))
+
+    def last_lines(self):
+        """The tail of the output, to be shown on failures"""
+        with self.cond:
+            return ''.join(self.tail)
+
+    def events_since(self, since):
+        with self.cond:
+            return [(t, n) for t, n in self.events if t >= since]
+
+    def states_since(self, since):
+        with self.cond:
+            return [(t, s) for t, s in self.states if t >= since]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import threading
+
+from collections import namedtuple
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+Sample = namedtuple('Sample', ['time', 'rss', 'cpu', 'fds'])
+
+
+def read_proc(pid):
+    """Sample process resources from /proc.
+    Returns None if the process is gone"""
+    try:
+        with open('/proc/{}/statm'.format(pid)) as f:
+            rss = int(f.read().split()[1]) * PAGE_SIZE
+        with open('/proc/{}/stat'.format(pid)) as f:
+            # comm may contain spaces, fields are counted after it
+            fields = f.read().rsplit(')', 1)[1].split()
+            cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+        fds = len(os.listdir('/proc/{}/fd'.format(pid)))
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    return Sample(time.time(), rss, cpu, fds)
+
+
+class ResourceSampler(object):
+    """Periodically sample RSS, CPU time and fd count of the watched
+    processes. Samples are grouped by the current test"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.current = None
+        self.processes = {}
+        self.samples = {}
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def watch(self, label, pid):
+        with self.lock:
+            self.processes[label] = pid
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        with self.lock:
+            processes = list(self.processes.items())
+            current = self.current
+
+        for label, pid in processes:
+            sample = read_proc(pid)
+            with self.lock:
+                if sample is None:
+                    if self.processes.get(label) == pid:
+                        del self.processes[label]
+                    continue
+                by_label = self.samples.setdefault(current, {})
+                by_label.setdefault(label, []).append(sample)
+
+    def report(self, nodeid):
+        """Summary of the samples taken during the test, per process"""
+        with self.lock:
+            by_label = self.samples.get(nodeid, {})
+            return {
+                label: {
+                    'rss_max': max(s.rss for s in samples),
+                    'rss_growth': samples[-1].rss - samples[0].rss,
+                    'cpu': samples[-1].cpu - samples[0].cpu,
+                    'fds_max': max(s.fds for s in samples),
+                } for label, samples in by_label.items()
+            }
+
+
+sampler = None
+
+
+def start(interval):
+    global sampler
+    if interval > 0 and os.path.exists('/proc/self/statm'):
+        sampler = ResourceSampler(interval)
+
+
+def watch(label, pid):
+    if sampler is not None:
+        sampler.watch(label, pid)
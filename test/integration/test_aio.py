@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import aio
+import pytest
+
+from aio import AsyncServer, run_map_call
+from conftest import Server
+
+cluster = [
+    Server(
+        alias = 'master',
+        instance_uuid = 'dddddddd-dddd-4000-b000-000000000001',
+        replicaset_uuid = 'dddddddd-0000-4000-b000-000000000000',
+        roles = [],
+        binary_port = 13331,
+        http_port = 8111,
+    ),
+    Server(
+        alias = 'replica',
+        instance_uuid = 'dddddddd-dddd-4000-b000-000000000002',
+        replicaset_uuid = 'dddddddd-0000-4000-b000-000000000000',
+        roles = [],
+        binary_port = 13332,
+        http_port = 8112,
+    )
+]
+
+async def check(srv):
+    await srv.cluster_is_healthy()
+    resp = await srv.graphql('{ servers { uri } cluster { issues { message } } }')
+    assert "errors" not in resp, resp['errors'][0]['message']
+    return resp['data']
+
+def test_map_call(cluster):
+    servers = [AsyncServer.of(srv) for srv in cluster.values()]
+    retmap, errmap = run_map_call(servers, check, concurrency=1)
+
+    assert errmap == {}
+    assert sorted(retmap.keys()) == ['master', 'replica']
+    for data in retmap.values():
+        assert len(data['servers']) == 2
+        assert data['cluster']['issues'] == []
+
+def test_partial_errors(cluster):
+    servers = [AsyncServer.of(srv) for srv in cluster.values()]
+    # nobody listens there
+    servers.append(AsyncServer(13339, 8119, alias='dead'))
+
+    retmap, errmap = run_map_call(servers, check, timeout=1)
+
+    assert sorted(retmap.keys()) == ['master', 'replica']
+    assert list(errmap.keys()) == ['dead']
+
+def test_duplicates(cluster):
+    srv = AsyncServer.of(cluster['master'])
+    with pytest.raises(ValueError):
+        run_map_call([srv, srv], check)
+
+def test_call_batch(cluster):
+    srv = cluster['master']
+    results = srv.call_batch([
+        ('is_initialized', []),
+        ('package.loaded.cartridge.is_healthy', []),
+        ('package.loaded.membership.probe_uri', [cluster['replica'].advertise_uri]),
+    ])
+    assert [r[0] for r in results] == [True, True, True]
+
+def test_call_batch_reconnect(cluster):
+    srv = cluster['master']
+    assert srv.call_batch([('is_initialized', [])])[0][0] == True
+
+    # the way remote control drops it after box.cfg
+    conn = srv._aio._conn
+    aio.loop_thread().run(conn.disconnect())
+    assert not conn.is_connected
+
+    assert srv.call_batch([('is_initialized', [])])[0][0] == True
+    assert srv._aio._conn is not conn
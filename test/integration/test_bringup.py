@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import pytest
+import resources
+
+from conftest import Server
+
+bringup = 'parallel'
+teardown = 'graceful'
+
+cluster = [
+    Server(
+        alias = 'router',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000001',
+        replicaset_uuid = 'bbbbbbbb-0000-4000-b000-000000000001',
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-1',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000002',
+        replicaset_uuid = 'bbbbbbbb-0000-4000-b000-000000000002',
+        roles = [],
+    ),
+    Server(
+        alias = 'storage-2',
+        instance_uuid = 'bbbbbbbb-bbbb-4000-b000-000000000003',
+        replicaset_uuid = 'bbbbbbbb-0000-4000-b000-000000000002',
+        roles = [],
+    )
+]
+
+def test_topology(cluster):
+    resp = cluster['router'].graphql(query="""
+        {
+            replicasets {
+                uuid
+                master { uuid }
+                servers { uuid }
+            }
+        }
+    """)
+    assert "errors" not in resp, resp['errors'][0]['message']
+
+    replicasets = {r['uuid']: r for r in resp['data']['replicasets']}
+    assert len(replicasets) == 2
+
+    storage = replicasets['bbbbbbbb-0000-4000-b000-000000000002']
+    assert storage['master']['uuid'] == 'bbbbbbbb-bbbb-4000-b000-000000000002'
+    assert len(storage['servers']) == 2
+
+def test_healthy(cluster):
+    for srv in cluster.values():
+        srv.cluster_is_healthy()
+
+@pytest.mark.skipif(resources.sampler is None, reason="resource sampling disabled")
+def test_resources(cluster, request):
+    resources.sampler.sample()
+    report = resources.sampler.report(request.node.nodeid)
+    assert set(report) == set(cluster)
+    for usage in report.values():
+        assert usage['rss_max'] > 0
+        assert usage['fds_max'] > 0
+
+def fake_server(tmpdir, script):
+    """Server running a shell script instead of tarantool"""
+    path = tmpdir.join('fake.sh')
+    path.write('#!/bin/sh\n' + script)
+    path.chmod(0o755)
+    srv = Server(alias = 'fake', binary_port = 1, http_port = 1)
+    srv.start(script=str(path), workdir=str(tmpdir))
+    return srv
+
+def test_dead_server(tmpdir):
+    srv = fake_server(tmpdir, 'echo "Failed to bind"; exit 3\n')
+    time_start = time.time()
+    with pytest.raises(RuntimeError) as e:
+        srv.wait_ready(timeout=30)
+    assert time.time() - time_start < 5
+    assert 'exited with code 3' in str(e.value)
+    assert 'Failed to bind' in str(e.value)
+
+def test_failed_server(tmpdir):
+    srv = fake_server(tmpdir,
+        'echo "Instance state changed: Unconfigured -> BootError"\n' +
+        'exec sleep 30\n'
+    )
+    time_start = time.time()
+    try:
+        with pytest.raises(RuntimeError) as e:
+            srv.wait_configured(timeout=30)
+    finally:
+        srv.kill()
+    assert time.time() - time_start < 5
+    assert 'failed with BootError' in str(e.value)
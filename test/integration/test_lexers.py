@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import glob
+import random
+import subprocess
+import pytest
+
+rst_abspath = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'rst')
+)
+sys.path.insert(0, rst_abspath)
+
+from pygments.lexer import do_insertions
+from pygments.token import Name, Generic
+from pygments.lexers import YamlLexer, BashSessionLexer
+from LuaLexer import LuaLexer, builtins
+from TarantoolSessionLexer import TarantoolSessionLexer, cached_lexer
+from TarantoolSessionLexer import line_re, find_prompt, yml_beg, yml_end
+import LexerCache
+
+cartridge_abspath = os.path.realpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'cartridge')
+)
+
+# Snippets covering every rule of every state, including the odd ones:
+# unterminated strings reset the state at EOL, stray chars become errors
+SNIPPETS = [
+    '#!/usr/bin/env tarantool\nlocal x = 1\n',
+    '#!shebang',
+    'local s = [==[ long\n ]] string ]==] .. [[x]]\n',
+    '--[[ comment\n]] --[=[ another ]] ]=] -- single\n',
+    'x = 1.5e+10 + .5 + 5. + 3e2 + 0xFF + 0x + 42\n',
+    'if a ~= b and not c or d >= e then return ... end\n',
+    'function foo.bar(a, b) end\nfunction baz() end\n',
+    'local f = function (x) return x end\n',
+    'function\n\n  spaced()\nfunction 5 x()\n',
+    "s = 'esc \\n \\' \\\\ \\123 \\x \\z' .. \"dq \\\" ok\"\n",
+    "s = 'unterminated\n#!after reset\nlocal y = 'again\n",
+    'a = "unterminated at eof',
+    'x = a.b.c + box.cfg + string.format + print\n',
+    'do_something(); end_ = nil; local_x = true\n',
+    'weird @ $ ` ? & | \\ ~ ∑ юникод\n',
+    '\t\t x\r\n  \n',
+    '',
+]
+
+FRAGMENTS = [fragment for snippet in SNIPPETS
+    for fragment in snippet.split(' ')]
+
+
+def lua_sources():
+    return sorted(glob.glob(os.path.join(cartridge_abspath, '**', '*.lua'),
+        recursive=True))
+
+
+def assert_equivalent(text, **options):
+    compiled = LuaLexer(**options)
+    regex = LuaLexer(compiled=False, **options)
+    assert list(compiled.get_tokens_unprocessed(text)) == \
+        list(regex.get_tokens_unprocessed(text))
+    assert list(compiled.get_tokens(text)) == list(regex.get_tokens(text))
+
+
+@pytest.mark.parametrize('text', SNIPPETS)
+def test_snippets(text):
+    assert_equivalent(text)
+    assert_equivalent(text, func_name_highlighting=False)
+    assert_equivalent(text, disabled_modules=['string'])
+
+
+def test_fuzz():
+    rnd = random.Random(0)
+    for _ in range(500):
+        text = ' '.join(rnd.choice(FRAGMENTS)
+            for _ in range(rnd.randint(1, 20)))
+        assert_equivalent(text)
+
+
+def test_sources():
+    sources = lua_sources()
+    assert len(sources) > 0
+    for path in sources:
+        with open(path) as f:
+            assert_equivalent(f.read())
+
+
+def test_builtins():
+    functions = builtins()
+    assert isinstance(functions, frozenset)
+    assert builtins() is functions
+    for name in ('print', 'string.format', 'box.cfg',
+                 'fiber.sleep', 'net.box', 'cartridge.rpc_call'):
+        assert name in functions
+
+    without_box = builtins(['box', 'string'])
+    assert builtins(('string', 'box')) is without_box
+    assert 'box.cfg' not in without_box
+    assert 'string.format' not in without_box
+    assert 'fiber.sleep' in without_box
+
+    tokens = list(LuaLexer().get_tokens('box.cfg{} fiber.sleep(0)'))
+    assert (Name.Builtin, 'box.cfg') in tokens
+    assert (Name.Builtin, 'fiber.sleep') in tokens
+    tokens = list(LuaLexer(func_name_highlighting=False).get_tokens('box.cfg{}'))
+    assert (Name, 'box') in tokens
+
+
+def test_cached_lexer():
+    lexer = cached_lexer(LuaLexer, {})
+    assert cached_lexer(LuaLexer, {}) is lexer
+    assert cached_lexer(YamlLexer, {}) is not lexer
+
+    disabled = cached_lexer(LuaLexer, {'disabled_modules': ['box']})
+    assert disabled is not lexer
+    assert cached_lexer(LuaLexer, {'disabled_modules': ['box']}) is disabled
+    assert 'box.cfg' not in disabled._functions
+
+    session = TarantoolSessionLexer()
+    text = 'tarantool> box.cfg{}\n---\n...\n\n'
+    assert list(session.get_tokens(text)) == list(session.get_tokens(text))
+
+
+TRANSCRIPT = """\
+$ tarantool
+tarantool> box.space.test:select()
+---
+- - [1, 'a']
+...
+
+tarantool> for i = 1, 3 do
+         >   print(i)
+         > end
+1
+2
+3
+---
+...
+
+localhost:3301> x = 'unterminated
+tarantool> y = [[
+         > long string ]]
+---
+- nested: ---
+  end: ...
+...
+...
+"""
+
+
+class BaselineSessionLexer(TarantoolSessionLexer):
+    """TarantoolSessionLexer before streaming: the whole text is split
+    into lines and segments are accumulated with str +="""
+
+    def get_tokens_unprocessed(self, text):
+        lualexer = LuaLexer(compiled=False, **self.options)
+        ymllexer = YamlLexer(**self.options)
+        shslexer = BashSessionLexer(**self.options)
+
+        curcode = ''
+        insertions = []
+        code = False
+        prompt_len = 0
+
+        curyml = ''
+        yml = False
+        ymlcnt = 0
+
+        curshs = ''
+        shs = False
+
+        for match in line_re.finditer(text):
+            line = match.group()
+
+            check_shs = (line.startswith('$ ') and not yml) or shs
+            if check_shs:
+                curshs += line
+                if line.endswith('\\'):
+                    shs = True
+                    continue
+                for item in shslexer.get_tokens_unprocessed(curshs):
+                    yield item
+                curshs = ''
+                shs = False
+                continue
+
+            check_yml_begin  = (yml == False and line.strip()     in (yml_beg, ))
+            check_yml_end    = (yml == True  and line.strip() == yml_end and ymlcnt == 0)
+            if (check_yml_begin or yml):
+                if (yml is True and line.strip() == yml_beg):
+                    ymlcnt += 1
+                if (not check_yml_end and line.strip() == yml_end):
+                    ymlcnt += 1
+                if check_yml_begin and curcode:
+                    for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+                        yield item
+                    code = False
+                    curcode = ''
+                    insertions = []
+                curyml += line
+                if check_yml_end:
+                    for item in ymllexer.get_tokens_unprocessed(curyml):
+                        yield item
+                    curyml = ''
+                yml = False if check_yml_end else True
+                continue
+
+            prompt_pos_flexible = find_prompt(line)
+            prompt_pos_strict   = prompt_pos_flexible if not code else None
+            if prompt_pos_strict:
+                prompt_len = prompt_pos_strict + 2
+
+            check_code_begin = bool(prompt_pos_strict)
+            check_code_middle = code and line.startswith(' ' * (prompt_len - 2) + '> ')
+            check_code_flexible = False
+            if code and check_code_middle is False and bool(prompt_pos_flexible):
+                prompt_len = prompt_pos_flexible + 2
+                check_code_flexible = True
+            if (check_code_begin or check_code_middle or check_code_flexible):
+                code = True
+                insertions.append((len(curcode), [(0, Generic.Prompt, line[:prompt_len])]))
+                curcode += line[prompt_len:]
+                continue
+
+            if curcode:
+                for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+                    yield item
+                code = False
+                curcode = ''
+                insertions = []
+            yield match.start(), Generic.Output, line
+
+        if curcode:
+            for item in do_insertions(insertions, lualexer.get_tokens_unprocessed(curcode)):
+                yield item
+        if curyml:
+            for item in ymllexer.get_tokens_unprocessed(curyml):
+                yield item
+        if curshs:
+            for item in shslexer.get_tokens_unprocessed(curshs):
+                yield item
+
+
+SESSION_FRAGMENTS = TRANSCRIPT.splitlines(keepends=True) + [
+    '$ tarantool \\\n', '  --version\n', 'tarantool> ---\n', '--- |\n',
+    '...\n', '   ...   \n', 'localhost:3301> box.cfg{}\n', '10.0.0.1> x\n',
+    '         > y\n', '    > z\n', 'output\n', '\n', 'no newline at eof',
+]
+
+
+def assert_session_baseline(text):
+    lexer = TarantoolSessionLexer()
+    baseline = BaselineSessionLexer()
+    assert list(lexer.get_tokens(text)) == list(baseline.get_tokens(text))
+    assert list(lexer.get_tokens_unprocessed(text)) == \
+        list(baseline.get_tokens_unprocessed(text))
+
+    # get_tokens() ensures the trailing newline, files of transcripts
+    # end with it as well. Without it, the last line is dropped by
+    # get_tokens_unprocessed() but not by get_tokens_from_lines()
+    if not text.endswith('\n'):
+        text += '\n'
+    assert list(lexer.get_tokens_from_lines(io.StringIO(text))) == \
+        list(baseline.get_tokens_unprocessed(text))
+
+
+def test_session_baseline():
+    assert_session_baseline(TRANSCRIPT * 3)
+    assert_session_baseline('')
+
+    rnd = random.Random(0)
+    for _ in range(300):
+        assert_session_baseline(''.join(rnd.choice(SESSION_FRAGMENTS)
+            for _ in range(rnd.randint(1, 30))))
+
+
+def test_session_streaming():
+    lexer = TarantoolSessionLexer()
+    text = TRANSCRIPT * 3
+    expected = list(lexer.get_tokens_unprocessed(text))
+    assert len(expected) > 0
+    assert list(lexer.get_tokens_from_lines(io.StringIO(text))) == expected
+    # output lines carry their absolute offsets
+    for index, token, value in expected:
+        if value == '1\n':
+            assert text[index:index + 2] == '1\n'
+
+
+@pytest.fixture
+def token_cache(tmpdir):
+    cache = LexerCache.configure(str(tmpdir.join('lexer-cache')))
+    yield cache
+    LexerCache.configure(None)
+
+
+def test_token_cache(token_cache):
+    text = TRANSCRIPT
+    lexer = TarantoolSessionLexer()
+    expected = list(lexer.get_tokens(text))
+    assert (token_cache.hits, token_cache.misses) == (0, 1)
+
+    assert list(TarantoolSessionLexer().get_tokens(text)) == expected
+    assert (token_cache.hits, token_cache.misses) == (1, 1)
+
+    # the cached stream is unfiltered, filters are applied on top of it
+    lexer = TarantoolSessionLexer()
+    lexer.add_filter('raiseonerror')
+    assert list(lexer.get_tokens(text)) == expected
+    lexer = LuaLexer()
+    lexer.add_filter('raiseonerror')
+    with pytest.raises(Exception):
+        list(lexer.get_tokens('x = @'))
+    assert list(LuaLexer().get_tokens('x = @'))
+
+    # options and code are parts of the key
+    list(LuaLexer(disabled_modules=['box']).get_tokens(text))
+    list(LuaLexer().get_tokens(text + ' '))
+    assert (token_cache.hits, token_cache.misses) == (3, 4)
+
+
+def test_token_cache_eviction(tmpdir):
+    directory = tmpdir.join('lexer-cache')
+    cache = LexerCache.TokenCache(str(directory), max_bytes=4096)
+    lexer = LuaLexer()
+    for n in range(100):
+        cache.get_tokens(lexer, 'x = {}\n'.format(n), lexer.get_tokens)
+
+    assert cache.misses == 100
+    assert cache.size <= 4096
+    assert sum(f.size() for f in directory.listdir()) == cache.size
+    # the most recent entries survive
+    cache.get_tokens(lexer, 'x = 99\n', lexer.get_tokens)
+    assert cache.hits == 1
+
+
+SPHINX_CONF = """
+import sys
+sys.path.insert(0, {rst!r})
+master_doc = 'index'
+extensions = ['LuaLexer', 'TarantoolSessionLexer']
+"""
+
+SPHINX_PAGE = """
+Page {n}
+=======
+
+.. code-block:: lua_tarantool
+
+    local cartridge = require('cartridge')
+    box.cfg{{}}
+
+.. code-block:: tarantoolsession
+
+    tarantool> box.info.ro
+    ---
+    - false
+    ...
+"""
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_sphinx_build(tmpdir, jobs):
+    """Build docs highlighted with both lexers. Warnings are errors,
+    including those about extensions unsafe for parallel builds"""
+    src = tmpdir.mkdir('src')
+    src.join('conf.py').write(SPHINX_CONF.format(rst=rst_abspath))
+    # parallel read only kicks in for more than 5 documents
+    pages = ['page{}'.format(n) for n in range(8)]
+    src.join('index.rst').write('Index\n=====\n\n.. toctree::\n\n' +
+        ''.join('    {}\n'.format(page) for page in pages))
+    for n, page in enumerate(pages):
+        src.join(page + '.rst').write(SPHINX_PAGE.format(n=n))
+
+    out = tmpdir.join('html')
+    proc = subprocess.run([sys.executable, '-m', 'sphinx', '-b', 'html',
+        '-W', '-j', jobs, '-q', str(src), str(out)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        universal_newlines=True)
+    assert proc.returncode == 0, proc.stdout
+
+    html = out.join('page0.html').read()
+    assert 'highlight-lua_tarantool' in html
+    assert 'highlight-tarantoolsession' in html
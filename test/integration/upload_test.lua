@@ -168,3 +168,97 @@ g.after_test('test_finish_failure', function()
         _G.__cartridge_upload_finish = _G.upload_finish_original
     ]])
 end)
+
+g.before_test('test_chunked_upload', function()
+    g.s1:exec(function()
+        require('cartridge.twophase').set_upload_chunk_size(16)
+    end)
+    g.s3:eval([[
+        _G.upload_transmit_chunk_original = _G.__cartridge_upload_transmit_chunk
+        _G.chunk_failures = 0
+        _G.__cartridge_upload_transmit_chunk = function(upload_id, offset, chunk)
+            if offset == 32 and _G.chunk_failures == 0 then
+                _G.chunk_failures = _G.chunk_failures + 1
+                error('Artificial chunk failure', 0)
+            end
+            return _G.upload_transmit_chunk_original(upload_id, offset, chunk)
+        end
+    ]])
+end)
+
+function g.test_chunked_upload()
+    local text = string.rep('Chunks, chunks, chunks. ', 40)
+    local ok, err = g.s1:call(
+        'package.loaded.cartridge.config_patch_clusterwide',
+        {{['todo_list.txt'] = text}}
+    )
+    t.assert_equals({ok, err}, {true, nil})
+
+    -- The failed chunk was resent
+    t.assert_equals(g.s3:eval('return _G.chunk_failures'), 1)
+
+    for _, srv in pairs({g.s1, g.s2, g.s3}) do
+        t.assert_equals(
+            srv:exec(function()
+                return require('cartridge').config_get_readonly('todo_list.txt')
+            end),
+            text
+        )
+    end
+
+    t.assert_equals(fio.listdir(g.upload_path_1), {})
+    t.assert_equals(fio.listdir(g.upload_path_2), {})
+end
+
+g.after_test('test_chunked_upload', function()
+    g.s1:exec(function()
+        require('cartridge.twophase').set_upload_chunk_size(1024 * 1024)
+    end)
+    g.s3:eval([[
+        _G.__cartridge_upload_transmit_chunk = _G.upload_transmit_chunk_original
+    ]])
+end)
+
+g.before_test('test_chunked_upload_old_peer', function()
+    g.s1:exec(function()
+        require('cartridge.twophase').set_upload_chunk_size(16)
+    end)
+    g.s3:eval([[
+        _G.upload_transmit_chunk_original = _G.__cartridge_upload_transmit_chunk
+        _G.upload_transmit_original = _G.__cartridge_upload_transmit
+        _G.__cartridge_upload_transmit_chunk = nil
+        _G.transmit_calls = 0
+        _G.__cartridge_upload_transmit = function(...)
+            _G.transmit_calls = _G.transmit_calls + 1
+            return _G.upload_transmit_original(...)
+        end
+    ]])
+end)
+
+function g.test_chunked_upload_old_peer()
+    local text = string.rep('Older peers, older peers. ', 40)
+    local ok, err = g.s1:call(
+        'package.loaded.cartridge.config_patch_clusterwide',
+        {{['todo_list.txt'] = text}}
+    )
+    t.assert_equals({ok, err}, {true, nil})
+
+    -- The peer without chunks support got the whole payload at once
+    t.assert_equals(g.s3:eval('return _G.transmit_calls'), 1)
+    t.assert_equals(
+        g.s3:exec(function()
+            return require('cartridge').config_get_readonly('todo_list.txt')
+        end),
+        text
+    )
+end
+
+g.after_test('test_chunked_upload_old_peer', function()
+    g.s1:exec(function()
+        require('cartridge.twophase').set_upload_chunk_size(1024 * 1024)
+    end)
+    g.s3:eval([[
+        _G.__cartridge_upload_transmit_chunk = _G.upload_transmit_chunk_original
+        _G.__cartridge_upload_transmit = _G.upload_transmit_original
+    ]])
+end)
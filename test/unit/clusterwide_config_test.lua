@@ -465,3 +465,82 @@ function g.test_checksum()
     )
 
 end
+
+function g.test_checksum_incremental()
+    -- Combined per-section digests must be equal to the plain
+    -- checksum, otherwise instances of different versions would
+    -- report config mismatch.
+    local function crc32_plain(plaintext)
+        local keys = {}
+        for section, _ in pairs(plaintext) do
+            table.insert(keys, section)
+        end
+        table.sort(keys)
+
+        local checksum = require('digest').crc32.new()
+        for _, section in ipairs(keys) do
+            checksum:update(string.format('[%s] = ', section))
+            checksum:update(plaintext[section])
+        end
+        return checksum:result()
+    end
+
+    local cfg = ClusterwideConfig.new({
+        ['a.yml'] = yaml.encode({data = string.rep('x', 100000)}),
+        ['b.txt'] = 'Lorem ipsum dolor sit amet',
+        ['c'] = '',
+    })
+    t.assert_equals(cfg:get_checksum(), crc32_plain(cfg:get_plaintext()))
+    t.assert_equals(ClusterwideConfig.new():get_checksum(), crc32_plain({}))
+
+    local digests = cfg._digests
+    local cfg2 = cfg:copy():set_plaintext('b.txt', 'Hello there')
+    t.assert_equals(cfg2:get_checksum(), crc32_plain(cfg2:get_plaintext()))
+    -- Unchanged sections aren't rehashed
+    t.assert_is(cfg2._digests['a.yml'], digests['a.yml'])
+    t.assert_is_not(cfg2._digests['b.txt'], digests['b.txt'])
+
+    cfg2:set_plaintext('c', nil)
+    t.assert_equals(cfg2:get_checksum(), crc32_plain(cfg2:get_plaintext()))
+    t.assert_equals(cfg2._digests['c'], nil)
+end
+
+function g.test_lazy_sections()
+    local cfg = ClusterwideConfig.new()
+    cfg:set_plaintext('good.yml', '{fizz: buzz}')
+    cfg:set_plaintext('bad.yml', ',')
+
+    -- Only the requested section is decoded
+    t.assert_equals(cfg:get_readonly('good'), {fizz = 'buzz'})
+    t.assert_equals(cfg:get_readonly('good.yml'), '{fizz: buzz}')
+    t.assert_equals(cfg:get_readonly('missing'), nil)
+    t.assert_equals(cfg._luatables, nil)
+    t.assert_error_msg_contains(
+        'LoadConfigError: Error parsing section "bad.yml":' ..
+        ' unexpected END event',
+        cfg.get_readonly, cfg, 'bad'
+    )
+
+    -- Unchanged sections are shared between copies
+    local cfg1 = ClusterwideConfig.new({
+        ['a.yml'] = '{a: [1, 2, 3]}',
+        ['b.yml'] = '{b: 4}',
+        ['file.yml'] = '{__file: some.txt}',
+        ['some.txt'] = 'Hi',
+    })
+    local cfg2 = cfg1:copy_and_patch({b = {b = 5}})
+    t.assert_is(cfg2:get_readonly('a'), cfg1:get_readonly('a'))
+    t.assert_equals(cfg2:get_readonly('b'), {b = 5})
+    t.assert_equals(cfg2:get_readonly('file'), 'Hi')
+    t.assert_is(cfg2:get_readonly().a, cfg1:get_readonly().a)
+
+    -- Sections with inclusions aren't
+    local cfg3 = cfg1:copy_and_patch({['some.txt'] = 'Bye'})
+    t.assert_equals(cfg3:get_readonly('file'), 'Bye')
+    t.assert_equals(cfg1:get_readonly('file'), 'Hi')
+
+    t.assert_error_msg_contains(
+        'table is read-only',
+        function() cfg2:get_readonly('a').a = {} end
+    )
+end
@@ -0,0 +1,104 @@
+#!/usr/bin/env tarantool
+
+local t = require('luatest')
+local g = t.group()
+
+local internal_metrics = require('cartridge.internal-metrics')
+
+g.before_each(function()
+    internal_metrics.reset()
+    internal_metrics.set_enabled(true)
+end)
+
+g.after_each(function()
+    internal_metrics.set_enabled(false)
+    internal_metrics.reset()
+end)
+
+local function find(name)
+    for _, collector in ipairs(internal_metrics.collect()) do
+        if collector.name == name then
+            return collector
+        end
+    end
+end
+
+function g.test_disabled()
+    local c = internal_metrics.counter('test_disabled_total', 'Counter')
+    local h = internal_metrics.histogram('test_disabled_seconds', 'Histogram')
+
+    internal_metrics.set_enabled(false)
+    c:inc(1)
+    h:observe(0.1)
+    h:observe_since(internal_metrics.clock())
+
+    t.assert_equals(find('test_disabled_total').series, {})
+    t.assert_equals(find('test_disabled_seconds').series, {})
+end
+
+function g.test_counter()
+    local c = internal_metrics.counter('test_counter_total', 'Counter', {'op'})
+    t.assert_is(internal_metrics.counter('test_counter_total', 'Counter', {'op'}), c)
+
+    c:inc(1, 'read')
+    c:inc(2, 'read')
+    c:inc(5, 'write')
+
+    t.assert_equals(find('test_counter_total'), {
+        name = 'test_counter_total',
+        kind = 'counter',
+        help = 'Counter',
+        label_names = {'op'},
+        series = {
+            {labels = {op = 'read'}, value = 3},
+            {labels = {op = 'write'}, value = 5},
+        },
+    })
+end
+
+function g.test_histogram()
+    local h = internal_metrics.histogram('test_histogram_seconds', 'Histogram')
+    h:observe(0.0001)
+    h:observe(0.003)
+    h:observe(0.003)
+    h:observe(100)
+
+    local series = find('test_histogram_seconds').series
+    t.assert_equals(#series, 1)
+    t.assert_equals(series[1].count, 4)
+    t.assert_almost_equals(series[1].sum, 100.0061, 1e-9)
+
+    local buckets = series[1].buckets
+    t.assert_equals(#buckets, #internal_metrics.BUCKETS)
+    t.assert_equals(buckets[1], {le = 0.0005, count = 1})
+    t.assert_equals(buckets[3], {le = 0.0025, count = 1})
+    t.assert_equals(buckets[4], {le = 0.005, count = 3})
+    -- the last one exceeds every bucket and is counted in +Inf only
+    t.assert_equals(buckets[#buckets].count, 3)
+end
+
+function g.test_render()
+    local c = internal_metrics.counter('test_render_total', 'Line\nbreak', {'path'})
+    local h = internal_metrics.histogram('test_render_seconds', 'Histogram', {'stage'})
+    c:inc(1, 'a"b\\c')
+    h:observe(0.2, 'parse')
+
+    local text = internal_metrics.render()
+    t.assert_str_contains(text,
+        '# HELP test_render_total Line\\nbreak\n' ..
+        '# TYPE test_render_total counter\n' ..
+        'test_render_total{path="a\\"b\\\\c"} 1\n'
+    )
+    t.assert_str_contains(text,
+        '# TYPE test_render_seconds histogram\n'
+    )
+    t.assert_str_contains(text,
+        'test_render_seconds_bucket{stage="parse",le="0.1"} 0\n' ..
+        'test_render_seconds_bucket{stage="parse",le="0.25"} 1\n'
+    )
+    t.assert_str_contains(text,
+        'test_render_seconds_bucket{stage="parse",le="+Inf"} 1\n' ..
+        'test_render_seconds_sum{stage="parse"} 0.2\n' ..
+        'test_render_seconds_count{stage="parse"} 1\n'
+    )
+end
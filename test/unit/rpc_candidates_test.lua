@@ -296,3 +296,40 @@ g.test_with_labels = function()
     t.assert_items_equals(candidates, {'a2', 'b1', 'b2'})
 end
 
+
+g.test_memoization = function()
+    apply_topology(draft)
+    t.assert_items_equals(get_candidates('target-role'), {'a1', 'a2'})
+
+    -- Candidates are memoized until membership notifies about changes
+    g.server:eval([[
+        _G.get_member_original = package.loaded['membership'].get_member
+        package.loaded['membership'].get_member = function() return nil end
+    ]])
+    t.assert_items_equals(get_candidates('target-role'), {'a1', 'a2'})
+    t.assert_items_equals(get_candidates('target-role', {healthy_only = false}),
+        {'a1', 'a2', 'a3', 'a4'}
+    )
+
+    local candidates = g.server:eval([[
+        local vars = require('cartridge.vars').new('cartridge.rpc')
+        vars.membership_notification:broadcast()
+        require('fiber').yield()
+        return require('cartridge.rpc').get_candidates('target-role')
+    ]])
+    t.assert_items_equals(candidates, {})
+
+    -- The result is a copy, callers may modify it
+    local candidates = g.server:eval([[
+        package.loaded['membership'].get_member = _G.get_member_original
+        local rpc = require('cartridge.rpc')
+        table.remove(rpc.get_candidates('some-other-role', {healthy_only = false}))
+        return rpc.get_candidates('some-other-role', {healthy_only = false})
+    ]])
+    t.assert_items_equals(candidates, {'b1', 'b2', 'b3', 'b4'})
+
+    -- Config apply invalidates the cache too
+    draft[1][2].status = 'dead'
+    apply_topology(draft)
+    t.assert_items_equals(get_candidates('target-role'), {'a1'})
+end
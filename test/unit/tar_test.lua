@@ -189,6 +189,39 @@ function g.test_truncated()
     t.assert_equals(unpacked, config)
 end
 
+function g.test_format()
+    -- The layout must stay byte-for-byte the same
+    local expected = table.concat({
+        string.ljust('a.txt', 100, '\0'), -- name
+        string.ljust('644', 8, '\0'), -- mode
+        string.rep('\0', 8 + 8), -- uid, gid
+        string.ljust('4', 12, '\0'), -- size
+        string.rep('\0', 12), -- mtime
+        string.ljust('3200', 8, '\0'), -- chksum
+        '0', -- typeflag
+        string.rep('\0', 100), -- linkname
+        'ustar\0', '00', -- magic, version
+        string.rep('\0', 32 + 32 + 8 + 8 + 155 + 12),
+        string.ljust('Test', BLOCKSIZE, '\0'),
+        string.rep('\0', 2 * BLOCKSIZE),
+    })
+    t.assert_equals(#expected, 4 * BLOCKSIZE)
+    t.assert_equals(tar.pack({['a.txt'] = 'Test'}), expected)
+end
+
+function g.test_many_files()
+    local files = {}
+    for i = 1, 1000 do
+        files[string.format('dir-%d/file-%d.txt', i % 7, i)] =
+            digest.urandom(i)
+    end
+
+    local packed, err = tar.pack(files)
+    t.assert_equals(err, nil)
+    local unpacked, err = tar.unpack(packed)
+    t.assert_equals(err, nil)
+    t.assert_equals(unpacked, files)
+end
 
 function g.test_errors()
     t.assert_error_msg_contains(
@@ -82,6 +82,43 @@ function g.test_transmit()
     t.assert_equals({ok, err}, {true, nil})
 end
 
+function g.test_transmit_chunk()
+    local prefix = g.datadir
+    upload.set_upload_prefix(prefix)
+
+    local ok, err = _G.__cartridge_upload_transmit_chunk('upload_id', 0, 'data')
+    t.assert_equals(ok, nil)
+    t.assert_covers(err, {
+        class_name = 'UploadError',
+        err = string.format(
+            '%s/payload: %s',
+            upload.get_upload_path('upload_id'),
+            errno.strerror(errno.ENOENT)
+        )
+    })
+    t.assert_equals(_G.__cartridge_upload_chunks('upload_id'), {})
+
+    _G.__cartridge_upload_begin('upload_id')
+    local payload = msgpack.encode({'chunked', 'data'})
+
+    -- Chunks may arrive in any order
+    local ok, err = _G.__cartridge_upload_transmit_chunk('upload_id', 4, payload:sub(5))
+    t.assert_equals({ok, err}, {true, nil})
+    t.assert_equals(_G.__cartridge_upload_chunks('upload_id'), {4})
+
+    local ok, err = _G.__cartridge_upload_transmit_chunk('upload_id', 0, payload:sub(1, 4))
+    t.assert_equals({ok, err}, {true, nil})
+    t.assert_equals(_G.__cartridge_upload_chunks('upload_id'), {0, 4})
+
+    local ok, err = _G.__cartridge_upload_finish('upload_id')
+    t.assert_equals({ok, err}, {true, nil})
+    t.assert_equals(upload.inbox['upload_id'], {'chunked', 'data'})
+    upload.inbox['upload_id'] = nil
+
+    _G.__cartridge_upload_cleanup('upload_id')
+    t.assert_equals(_G.__cartridge_upload_chunks('upload_id'), {})
+end
+
 function g.test_finish()
     local prefix = g.datadir
     upload.set_upload_prefix(prefix)